@@ -0,0 +1,341 @@
+"""
+Async serving mode for Campus Info Chatbot (aiohttp).
+Same routes as app.py, but one process holds many in-flight slow requests:
+- Gemini via generate_content_async (shared answer cache)
+- DB via aiomysql (modules/async_db.py); chat logs go through the
+  write-behind buffer (modules/chat_log_buffer.py), never awaited
+- Telegram webhook acks at once and hands the update to the same worker
+  pool as app.py (modules/chat_core.py)
+- the Gemini model is created on the default executor at startup, so the
+  ~0.7s google.generativeai import never runs on the event loop
+WhatsApp commands and FAQ/notices lookups share modules/chat_core.py with
+app.py (this module never imports app.py, so it builds no Flask app) and run
+on the default executor: they are short DB reads, the slow part (Gemini)
+stays on the loop.
+
+Run:
+    python async_app.py
+    gunicorn async_app:make_app --worker-class aiohttp.GunicornWebWorker --bind 0.0.0.0:5000
+"""
+import asyncio
+import contextvars
+import json
+import os
+import time
+from functools import partial
+
+from aiohttp import web
+
+from modules.async_db import run_query_async, close_pool
+from modules.response_cache import ResponseCache, cached_answer_async, gemini_cache
+from modules.faq_index import best_answer, faq_index
+from modules.gemini_ai import get_model
+from modules.update_queue import telegram_chat_id
+from modules.commands import router as command_router
+from modules import chat_core, metrics, query_profiler
+
+json_response = partial(web.json_response, dumps=partial(json.dumps, default=str))
+
+
+def run_sync(fn, *args):
+    """Run blocking code (modules/chat_core.py, DB lookups) on the default thread pool, in the caller's context."""
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(None, partial(context.run, fn, *args))
+
+
+async def json_body(request):
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+
+async def ai_model():
+    """
+    get_model() off the event loop: until the startup warm-up is done it
+    blocks on the google.generativeai import (~0.7s) behind a threading lock.
+    """
+    return await run_sync(get_model)
+
+
+async def generate_async(model, prompt):
+    response = await model.generate_content_async(prompt)
+    return response.text.strip() if response and response.text else None
+
+
+# ---------------- Basic routes ----------------
+async def home(request):
+    return web.Response(text="🎓 Campus Info Chatbot (async) is Running!")
+
+
+async def get_faqs(request):
+    data = await run_query_async("SELECT * FROM faqs", fetch=True)
+    if not data:
+        return json_response({"message": "No FAQs found."})
+    return json_response(data)
+
+
+async def get_notices(request):
+    data = await run_query_async("SELECT * FROM notices ORDER BY date DESC LIMIT 10", fetch=True)
+    if not data:
+        return json_response({"message": "No notices available yet."})
+    return json_response(data)
+
+
+async def add_faq(request):
+    content = await json_body(request)
+    question = content.get("question")
+    answer = content.get("answer")
+    if not question or not answer:
+        return json_response({"error": "Missing question or answer"}, status=400)
+
+    await run_query_async("INSERT INTO faqs (question, answer) VALUES (%s, %s)", (question, answer))
+    await run_sync(partial(faq_index.refresh, force=True))
+    return json_response({"message": "FAQ added successfully!"})
+
+
+async def chat(request):
+    data = await json_body(request)
+    user_message = (data.get("message") or "").strip()
+
+    if not user_message:
+        return json_response({"reply": "Please send a valid message."})
+
+    try:
+        faq = await run_sync(best_answer, user_message)
+        model = None if faq else await ai_model()
+        if faq:
+            reply = faq["answer"]
+        elif model:
+            reply = await cached_answer_async(
+                "chat", user_message, partial(generate_async, model, chat_core.chat_prompt(user_message))
+            ) or "I could not generate a response."
+        else:
+            reply = "AI service is currently not configured."
+    except Exception as e:
+        print("Gemini error:", e)
+        reply = "AI is temporarily unavailable. Please try again later."
+
+    chat_core.log_chat(user_message, reply)
+    return json_response({"reply": reply})
+
+
+async def chat_stream(request):
+    data = await json_body(request)
+    user_message = (data.get("message") or "").strip()
+
+    if not user_message:
+        return json_response({"reply": "Please send a valid message."})
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await response.prepare(request)
+
+    parts = []
+    completed = False
+    try:
+        faq = await run_sync(best_answer, user_message)
+        cache_key = ResponseCache.make_key("chat", user_message)
+        answer = faq["answer"] if faq else gemini_cache.get(cache_key)
+        model = await ai_model() if answer is None else None
+        if answer is None and not model:
+            answer = "AI service is currently not configured."
+
+        if answer is not None:
+            parts.append(answer)
+            await response.write(chat_core.sse_event({"delta": answer}).encode())
+        else:
+            try:
+                stream = await model.generate_content_async(
+                    chat_core.chat_prompt(user_message), stream=True
+                )
+                async for chunk in stream:
+                    text = chunk.text if chunk.parts else ""
+                    if text:
+                        parts.append(text)
+                        await response.write(chat_core.sse_event({"delta": text}).encode())
+                if parts:
+                    gemini_cache.set(cache_key, "".join(parts).strip())
+            except (ConnectionResetError, asyncio.CancelledError):
+                raise
+            except Exception as e:
+                print("Gemini stream error:", e)
+                if not parts:
+                    parts.append("AI is temporarily unavailable. Please try again later.")
+                    await response.write(chat_core.sse_event({"delta": parts[0]}).encode())
+
+        if not parts:
+            parts.append("I could not generate a response.")
+            await response.write(chat_core.sse_event({"delta": parts[0]}).encode())
+        completed = True
+        await response.write(chat_core.sse_event({"done": True, "reply": "".join(parts).strip()}).encode())
+        await response.write_eof()
+    finally:
+        if parts:
+            reply = "".join(parts).strip()
+            chat_core.log_chat(user_message, reply if completed else reply + " [interrupted]")
+    return response
+
+
+# ---------------- Alerts API ----------------
+async def create_alert(request):
+    data = await json_body(request)
+    user = data.get("user_identifier")
+    channel = (data.get("channel") or "").lower()
+    frequency = data.get("frequency") or "immediate"   # alerts.frequency is NOT NULL
+
+    if not user or channel not in ("telegram", "whatsapp"):
+        return json_response({"error": "Missing or invalid (user_identifier/channel)"}, status=400)
+
+    await run_query_async(
+        "INSERT INTO alerts (user_identifier, channel, keyword, source, frequency) VALUES (%s, %s, %s, %s, %s)",
+        (user, channel, data.get("keyword"), data.get("source"), frequency)
+    )
+    return json_response({"message": "Alert created"}, status=201)
+
+
+async def get_alerts(request):
+    user = request.query.get("user")
+    if not user:
+        return json_response({"error": "Missing ?user="}, status=400)
+    rows = await run_query_async("SELECT * FROM alerts WHERE user_identifier=%s", (user,), fetch=True)
+    return json_response(rows or [])
+
+
+async def delete_alert(request):
+    alert_id = int(request.match_info["alert_id"])
+    await run_query_async("DELETE FROM alerts WHERE id=%s", (alert_id,))
+    return json_response({"message": "Deleted alert", "id": alert_id})
+
+
+async def get_outbox_metrics(request):
+    from modules.outbox import outbox_metrics
+    return json_response(await run_sync(outbox_metrics))
+
+
+async def get_metrics(request):
+    return web.Response(body=metrics.render().encode(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+async def get_command_metrics(request):
+    return json_response(command_router.metrics())
+
+
+# ---------------- WhatsApp Webhook (Twilio) ----------------
+def twiml(body):
+    return web.Response(text=body, content_type="application/xml")
+
+
+async def whatsapp_webhook(request):
+    form = await request.post()
+    incoming_raw = (form.get("Body") or "").strip()
+    from_number = form.get("From")
+    print(f"[Webhook] from={from_number} msg='{incoming_raw}'")
+
+    command_reply = await run_sync(chat_core.whatsapp_command_twiml, incoming_raw, from_number)
+    if command_reply is not None:
+        return twiml(command_reply)
+
+    with command_router.timed("whatsapp", "fallback"):
+        return twiml(await whatsapp_fallback(incoming_raw))
+
+
+async def whatsapp_fallback(incoming_raw):
+    resp = chat_core.new_twiml()
+    msg = resp.message()
+
+    faq = await run_sync(best_answer, incoming_raw)
+    if faq:
+        msg.body(f"❓ {faq['question']}\n\n✅ {faq['answer']}")
+        return str(resp)
+
+    try:
+        model = await ai_model()
+        if model:
+            ai_reply = await cached_answer_async(
+                "whatsapp", incoming_raw, partial(generate_async, model, chat_core.whatsapp_prompt(incoming_raw))
+            ) or "I'm not sure, please try again."
+        else:
+            ai_reply = "AI not configured. Please try again later."
+        msg.body(chat_core.clean_whatsapp_reply(ai_reply))
+    except Exception as e:
+        print("AI fallback error:", e)
+        msg.body("⚠️ Sorry, AI seems busy right now. Please try again later.")
+    return str(resp)
+
+
+# ---------------- Telegram Webhook ----------------
+async def telegram_webhook(request):
+    update = await json_body(request)
+    chat_id = telegram_chat_id(update)
+    if chat_id is None:
+        return web.Response(text="OK")
+
+    if not chat_core.telegram_updates.submit(chat_id, update, item_id=update.get("update_id")):
+        print("⚠️ Telegram update queue full, asking Telegram to retry")
+        return web.Response(text="Busy", status=503)
+    return web.Response(text="OK")
+
+
+# ---------------- App ----------------
+async def _on_startup(application):
+    # not awaited: the worker accepts requests while the model is being built;
+    # handlers resolve it through ai_model(), so they wait off the loop
+    asyncio.get_running_loop().run_in_executor(None, get_model)
+
+
+async def _on_cleanup(application):
+    await close_pool()
+
+
+@web.middleware
+async def record_request(request, handler):
+    start = time.perf_counter()
+    status = 500
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else "unmatched"
+    try:
+        with query_profiler.request_profile(f"{request.method} {route}"):
+            response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        metrics.http_latency.observe(time.perf_counter() - start, route, request.method, status)
+
+
+def create_app():
+    application = web.Application(middlewares=[record_request])
+    application.add_routes([
+        web.get("/", home),
+        web.get("/get_faqs", get_faqs),
+        web.get("/get_notices", get_notices),
+        web.post("/add_faq", add_faq),
+        web.post("/chat", chat),
+        web.post("/chat/stream", chat_stream),
+        web.post("/alerts", create_alert),
+        web.get("/alerts", get_alerts),
+        web.delete("/alerts/{alert_id:\\d+}", delete_alert),
+        web.get("/outbox/metrics", get_outbox_metrics),
+        web.get("/metrics", get_metrics),
+        web.get("/commands/metrics", get_command_metrics),
+        web.post("/webhook", whatsapp_webhook),
+        web.post("/telegram/webhook", telegram_webhook),
+    ])
+    application.on_startup.append(_on_startup)
+    application.on_cleanup.append(_on_cleanup)
+    return application
+
+
+async def make_app():
+    """Entry point for gunicorn's aiohttp worker."""
+    return create_app()
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
@@ -0,0 +1,70 @@
+# benchmarks/chat_stream.py
+"""
+Time to first token: /chat (full reply) vs /chat/stream (SSE), Flask app.
+
+Gemini is replaced by a fake streaming model that emits CHUNKS chunks,
+CHUNK_DELAY seconds apart; FAQ lookup and DB writes are disabled.
+
+    python -m benchmarks.chat_stream [requests]
+"""
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("AUTO_MIGRATE", "0")
+
+CHUNKS = int(os.getenv("CHUNKS", 10))
+CHUNK_DELAY = float(os.getenv("CHUNK_DELAY", 0.15))
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class FakeStreamingGemini:
+    def _chunks(self):
+        for i in range(CHUNKS):
+            time.sleep(CHUNK_DELAY)
+            yield _Chunk(f"word{i} ")
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._chunks()
+        return _Chunk("".join(c.text for c in self._chunks()))
+
+
+def main():
+    import app
+    from modules.gemini_ai import use_model
+    use_model(FakeStreamingGemini())
+    app.best_answer = lambda question: None
+    app.log_chat = lambda *args, **kwargs: None
+    client = app.app.test_client()
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    full, first, total = [], [], []
+    for i in range(n):
+        start = time.perf_counter()
+        client.post("/chat", json={"message": f"full question {i}"})
+        full.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = client.post("/chat/stream", json={"message": f"stream question {i}"}, buffered=False)
+        for j, _ in enumerate(response.response):
+            if j == 0:
+                first.append(time.perf_counter() - start)
+        response.close()
+        total.append(time.perf_counter() - start)
+
+    ms = lambda values: f"{statistics.median(values) * 1000:7.0f} ms"
+    print(f"fake Gemini: {CHUNKS} chunks x {CHUNK_DELAY:.2f}s, {n} requests (median)")
+    print(f"/chat         first byte = full reply: {ms(full)}")
+    print(f"/chat/stream  first token:             {ms(first)}")
+    print(f"/chat/stream  full reply:              {ms(total)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/dates.py
+"""
+Per-call cost of modules.dates.extract_date against the two parsers it
+replaced (copied below verbatim: scraper_ptu.try_parse_date and
+scraper_gndec.try_extract_date_from_text), on the inputs the scrapers feed
+them: date cells, title / serial-number cells and whole-page text.
+Columns: old PTU, old GNDEC, the new scan with the memo bypassed, and
+extract_date with a warm memo (what repeated cells cost after the first
+page); the speedups compare the scan without memo. Also lists inputs where
+old and new disagree.
+
+    python -m benchmarks.dates [repeat]
+"""
+import random
+import re
+import sys
+from datetime import datetime
+
+from benchmarks.scrapers import date_samples, timed
+from modules import dates
+
+# ---------------- Pre-change parsers ----------------
+date_regexes = [
+    re.compile(r"\b(\d{1,2})[/-](\d{1,2})[/-](\d{4})\b"),         # 28/11/2025 or 28-11-2025
+    re.compile(r"\b(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})\b"),         # 28 November 2025
+    re.compile(r"\b(\d{4})[/-](\d{1,2})[/-](\d{1,2})\b"),         # 2025-11-28 (ISO)
+]
+
+
+def ptu_try_parse_date(text):
+    if not text:
+        return None
+    t = text.strip()
+    m = date_regexes[0].search(t)
+    if m:
+        d = f"{m.group(1).zfill(2)}-{m.group(2).zfill(2)}-{m.group(3)}"
+        try:
+            return datetime.strptime(d, "%d-%m-%Y").date()
+        except:
+            pass
+    m = date_regexes[1].search(t)
+    if m:
+        try:
+            return datetime.strptime(m.group(0), "%d %B %Y").date()
+        except:
+            try:
+                return datetime.strptime(m.group(0), "%d %b %Y").date()
+            except:
+                pass
+    m = date_regexes[2].search(t)
+    if m:
+        try:
+            return datetime.strptime(m.group(0), "%Y-%m-%d").date()
+        except:
+            pass
+    for fmt in ("%d-%m-%Y", "%d/%m/%Y", "%d %b %Y", "%d %B %Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(t, fmt).date()
+        except:
+            pass
+    return None
+
+
+def gndec_try_extract_date_from_text(text):
+    if not text:
+        return None
+    patterns = [
+        r"(\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4})",    # 29 November 2025
+        r"(\d{1,2}-\d{1,2}-\d{4})",              # 29-11-2025
+        r"(\d{4}-\d{1,2}-\d{1,2})",              # 2025-11-29
+        r"(\d{1,2}/\d{1,2}/\d{4})",              # 29/11/2025
+        r"([A-Za-z]{3,9}\s+\d{1,2},\s*\d{4})",   # November 29, 2025
+    ]
+    for pat in patterns:
+        m = re.search(pat, text)
+        if m:
+            s = m.group(1)
+            for fmt in ("%d %B %Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y", "%B %d, %Y", "%b %d, %Y", "%d %b %Y"):
+                try:
+                    return datetime.strptime(s, fmt).date()
+                except Exception:
+                    continue
+    return None
+
+
+PARSERS = {
+    "old PTU": ptu_try_parse_date,
+    "old GNDEC": gndec_try_extract_date_from_text,
+    "new, no memo": dates._scan,
+    "new, memo": dates.extract_date,
+}
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    samples = date_samples(random.Random(11))
+    print(f"µs per call (best of {repeat})\n")
+    print(f"{'input':<24}" + "".join(f"{name:>14}" for name in PARSERS) + f"{'vs PTU':>9}{'vs GNDEC':>10}")
+    for kind, texts in samples.items():
+        for text in texts:
+            dates.extract_date(text)  # the memo column is timed warm
+        cost = {name: timed(lambda: [fn(t) for t in texts], repeat) / len(texts) * 1e6
+                for name, fn in PARSERS.items()}
+        new = cost["new, no memo"]
+        print(f"{kind:<24}" + "".join(f"{cost[name]:14.1f}" for name in PARSERS)
+              + f"{cost['old PTU'] / new:8.1f}x{cost['old GNDEC'] / new:9.1f}x")
+
+    print("\nDisagreements with the old parsers (old value -> new value):")
+    for name in ("old PTU", "old GNDEC"):
+        texts = dict.fromkeys(t for values in samples.values() for t in values)
+        diff = [(t, PARSERS[name](t), dates.extract_date(t)) for t in texts if PARSERS[name](t) != dates.extract_date(t)]
+        print(f"  {name}: {len(diff)}")
+        for text, before, after in diff[:5]:
+            print(f"    {text[:40]!r}: {before} -> {after}")
+
+
+if __name__ == "__main__":
+    main()
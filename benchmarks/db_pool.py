@@ -0,0 +1,62 @@
+# benchmarks/db_pool.py
+"""
+Per-query latency: fresh connection per query (old run_query) vs pooled run_query.
+
+Point MYSQL_HOST / MYSQL_USER / MYSQL_PASSWORD / MYSQL_DATABASE / MYSQL_PORT
+at a local MySQL, then:
+    python -m benchmarks.db_pool [iterations]
+"""
+import statistics
+import sys
+import time
+
+from modules.database import get_connection, run_query, close_pool
+
+QUERY = "SELECT 1 AS ok"
+
+
+def unpooled_query(query, params=None, fetch=False):
+    """The pre-pool run_query: connect, execute, close."""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        cursor.execute(query, params or ())
+        result = cursor.fetchall() if fetch else None
+        connection.commit()
+        cursor.close()
+        return result
+    finally:
+        connection.close()
+
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        if fn(QUERY, fetch=True) is None:
+            raise SystemExit("❌ Query failed — is MySQL reachable with the MYSQL_* settings?")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<10} n={len(timings):<5} mean={statistics.mean(timings):7.2f} ms  "
+          f"p50={statistics.median(timings):7.2f} ms  p95={p95:7.2f} ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    report("unpooled", measure(unpooled_query, iterations))
+
+    run_query(QUERY, fetch=True)  # warm the pool
+    report("pooled", measure(run_query, iterations))
+    close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for the external services, shared by the benchmarks.
+- SqliteConnection: a sqlite3 file behind the mysql-connector API that
+  modules.database uses, so the real pool / run_query / run_many (and their
+  metrics) run unchanged; use_sqlite(path) plugs it in
+- seed_db(path): schema + synthetic notices, FAQs and alerts
+- FakeGemini: GenerativeModel stand-in with a fixed latency (sync, stream, async)
+- fake API server: Telegram Bot API (/bot<token>/<method>) and Twilio
+  (/2010-04-01/Accounts/<sid>/Messages.json), fixed latency, call counters
+  at GET /stats; point TELEGRAM_API_BASE / TWILIO_API_BASE at it
+
+    python -m benchmarks.fakes api [port] [delay_seconds]
+"""
+import asyncio
+import json
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mysql.connector.errors import DatabaseError
+
+
+# ---------------- MySQL -> sqlite ----------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL UNIQUE,
+    date DATE NULL,
+    source TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_notices_source_date ON notices (source, date);
+CREATE TABLE IF NOT EXISTS faq_categories (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS faqs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    category_id INTEGER NULL
+);
+CREATE INDEX IF NOT EXISTS idx_faqs_category ON faqs (category_id);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_identifier TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    source TEXT NULL,
+    frequency TEXT NULL DEFAULT 'immediate',
+    active INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_user_channel ON alerts (user_identifier, channel);
+CREATE TABLE IF NOT EXISTS alerts_sent (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alert_id INTEGER NOT NULL,
+    notice_id INTEGER NOT NULL,
+    sent_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (alert_id, notice_id)
+);
+CREATE TABLE IF NOT EXISTS chat_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_identifier TEXT NULL,
+    source TEXT NULL,
+    user_message TEXT NULL,
+    bot_reply TEXT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+_REWRITES = [
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.I), "INSERT OR IGNORE"),
+    (re.compile(r"\bNOW\(\)", re.I), "CURRENT_TIMESTAMP"),
+]
+_translated = {}
+
+
+def to_sqlite(query):
+    sql = _translated.get(query)
+    if sql is None:
+        sql = query
+        for pattern, replacement in _REWRITES:
+            sql = pattern.sub(replacement, sql)
+        _translated[query] = sql
+    return sql
+
+
+class _Cursor:
+    def __init__(self, connection, dictionary):
+        self._cursor = connection.cursor()
+        self.dictionary = dictionary
+
+    def execute(self, query, params=()):
+        try:
+            self._cursor.execute(to_sqlite(query), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise DatabaseError(msg=f"sqlite: {e}") from e
+
+    def executemany(self, query, seq_params):
+        try:
+            self._cursor.executemany(to_sqlite(query), [tuple(p) for p in seq_params])
+        except sqlite3.Error as e:
+            raise DatabaseError(msg=f"sqlite: {e}") from e
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self.dictionary:
+            return rows
+        columns = [d[0] for d in self._cursor.description or ()]
+        return [dict(zip(columns, row)) for row in rows]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteConnection:
+    """The subset of mysql.connector's connection that modules.database uses."""
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+
+    def cursor(self, dictionary=False, buffered=False):
+        return _Cursor(self._connection, dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect=False):
+        self._connection.execute("SELECT 1")
+
+    def close(self):
+        self._connection.close()
+
+
+def use_sqlite(path):
+    """Make modules.database hand out sqlite connections to `path`."""
+    from modules import database
+    database.get_connection = lambda: SqliteConnection(path)
+
+
+def seed_db(path, notices=2000, faqs=200, alerts=500, seed=42):
+    rng = random.Random(seed)
+    words = ["exam", "result", "admit", "card", "fee", "hostel", "date", "sheet", "re-appear", "notice",
+             "semester", "scholarship", "form", "schedule", "practical", "revised", "ph.d", "admission"]
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    today = date.today()
+    connection.executemany(
+        "INSERT OR IGNORE INTO notices (title, link, date, source) VALUES (?, ?, ?, ?)",
+        [(" ".join(rng.sample(words, 5)).title() + f" {i}", f"https://example.edu/notice/{i}",
+          (today - timedelta(days=rng.randint(0, 365))).isoformat(), rng.choice(["PTU", "GNDEC"]))
+         for i in range(notices)],
+    )
+    categories = ["Exams", "Fees", "Hostel", "Admissions", "Results"]
+    connection.executemany("INSERT INTO faq_categories (name) VALUES (?)", [(c,) for c in categories])
+    connection.executemany(
+        "INSERT INTO faqs (question, answer, category_id) VALUES (?, ?, ?)",
+        [(f"{' '.join(rng.sample(words, 4))} question {i}?", " ".join(rng.choices(words, k=25)),
+          rng.randint(1, len(categories))) for i in range(faqs)],
+    )
+    connection.executemany(
+        "INSERT INTO alerts (user_identifier, channel, keyword, source) VALUES (?, ?, ?, ?)",
+        [(f"whatsapp:+9100000{i % 100:05d}" if i % 2 else str(100000 + i % 100),
+          "whatsapp" if i % 2 else "telegram", rng.choice(words), rng.choice([None, "PTU", "GNDEC"]))
+         for i in range(alerts)],
+    )
+    connection.commit()
+    connection.close()
+
+
+# ---------------- Gemini ----------------
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class FakeGemini:
+    """Stands in for GenerativeModel: `delay` seconds per answer, streamed in `chunks` pieces."""
+
+    def __init__(self, delay=1.0, chunks=5):
+        self.delay = delay
+        self.chunks = chunks
+
+    def _stream(self):
+        for i in range(self.chunks):
+            time.sleep(self.delay / self.chunks)
+            yield _FakeResponse(f"part{i} ")
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream()
+        time.sleep(self.delay)
+        return _FakeResponse("Fake answer.")
+
+    async def generate_content_async(self, prompt, stream=False):
+        await asyncio.sleep(self.delay)
+        return _FakeResponse("Fake answer.")
+
+
+# ---------------- Telegram / Twilio API ----------------
+_TWILIO_MESSAGES = re.compile(r"^/2010-04-01/Accounts/([^/]+)/Messages\.json$")
+_TELEGRAM_METHOD = re.compile(r"^/bot[^/]+/(\w+)$")
+
+
+def make_api_server(port, delay=0.05, host="127.0.0.1"):
+    calls = Counter()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like the real APIs
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with lock:
+                    self._reply(200, dict(calls))
+            else:
+                self._reply(404, {"ok": False})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay)
+            telegram, twilio = _TELEGRAM_METHOD.match(self.path), _TWILIO_MESSAGES.match(self.path)
+            if telegram:
+                with lock:
+                    calls[f"telegram.{telegram.group(1)}"] += 1
+                self._reply(200, {"ok": True, "result": {"message_id": random.randint(1, 1 << 30)}})
+            elif twilio:
+                with lock:
+                    calls["twilio.messages"] += 1
+                self._reply(201, {"sid": f"SM{random.getrandbits(128):032x}", "account_sid": twilio.group(1),
+                                  "status": "queued"})
+            else:
+                self._reply(404, {"ok": False, "description": "Not Found"})
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "api":
+        raise SystemExit(__doc__)
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 5199
+    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    server = make_api_server(port, delay)
+    print(f"fake Telegram/Twilio API on :{port} (delay {delay * 1000:.0f} ms)", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
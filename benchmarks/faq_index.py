@@ -0,0 +1,56 @@
+# benchmarks/faq_index.py
+"""
+BM25 FAQ index: build time and query latency on a synthetic corpus (no DB needed).
+    python -m benchmarks.faq_index [n_faqs]
+"""
+import random
+import statistics
+import sys
+import time
+
+from modules.faq_index import FaqIndex
+
+TOPICS = ["exam", "fee", "admit card", "hostel", "library", "result", "scholarship", "re-appear",
+          "date sheet", "transport", "canteen", "placement", "internship", "attendance", "migration"]
+WORDS = ["semester", "last", "date", "portal", "erp", "apply", "form", "office", "block", "timing",
+         "download", "submit", "notice", "department", "student", "payment", "online", "offline",
+         "document", "certificate", "deadline", "schedule", "branch", "session", "late", "fine"]
+
+
+def synthetic_faqs(n, rng):
+    for i in range(1, n + 1):
+        topic = rng.choice(TOPICS)
+        q = f"{topic} {' '.join(rng.sample(WORDS, 4))} {i}"
+        a = f"For {topic}: " + " ".join(rng.choice(WORDS) for _ in range(30))
+        yield i, q, a
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = random.Random(42)
+    faqs = list(synthetic_faqs(n, rng))
+
+    index = FaqIndex()
+    start = time.perf_counter()
+    for faq_id, q, a in faqs:
+        index.add(faq_id, q, a)
+    build = time.perf_counter() - start
+    print(f"build: {n} FAQs in {build * 1000:.1f} ms ({len(index.postings)} terms)")
+
+    queries = [f"{rng.choice(TOPICS)} {rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(1000)]
+    timings = []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(q, limit=1)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    print(f"query: n={len(timings)} p50={statistics.median(timings):.2f} ms "
+          f"p95={timings[int(len(timings) * 0.95)]:.2f} ms max={timings[-1]:.2f} ms")
+
+    t0 = time.perf_counter()
+    index.add(n + 1, "brand new question about convocation gowns", "Collect gowns from the admin block.")
+    print(f"incremental add: {(time.perf_counter() - t0) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
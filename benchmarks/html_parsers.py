@@ -0,0 +1,68 @@
+# benchmarks/html_parsers.py
+"""
+Parse time per page for each available BeautifulSoup backend, full vs targeted.
+Pages come from benchmarks/fixtures/*.html (no network, no DB).
+    python -m benchmarks.html_parsers [repeat]
+"""
+import sys
+import time
+from pathlib import Path
+
+from modules.html_parsing import _available, make_soup
+from modules.scraper_gndec import LISTING_PARSE_ONLY, SELECTOR_STRATEGIES
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BACKENDS = [b for b in ("html.parser", "lxml", "html5lib") if _available(b)]
+
+# fixture name prefix -> what the scraper actually builds for that page
+TARGETS = {
+    "ptu_noticeboard": "table",
+    "gndec_notice_list": LISTING_PARSE_ONLY,
+}
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def selector_strategies_old(soup):
+    # pre-change behaviour: one full-tree CSS query per strategy
+    for _, compiled in SELECTOR_STRATEGIES:
+        if compiled.select(soup):
+            return
+
+
+def selector_strategies_new(soup):
+    anchors = soup.find_all("a")
+    for _, compiled in SELECTOR_STRATEGIES:
+        if [a for a in anchors if compiled.match(a)]:
+            return
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"backends: {', '.join(BACKENDS)}  (best of {repeat}, ms per page)\n")
+    print(f"{'page':<24}{'backend':<13}{'full':>9}{'targeted':>10}")
+    for path in sorted(FIXTURES.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        only = TARGETS.get(path.stem)
+        for backend in BACKENDS:
+            full = timed(lambda: make_soup(html, parser=backend), repeat)
+            targeted = timed(lambda: make_soup(html, only=only, parser=backend), repeat) if only else None
+            tcol = f"{targeted:10.2f}" if targeted is not None else f"{'-':>10}"
+            print(f"{path.stem:<24}{backend:<13}{full:9.2f}{tcol}")
+
+    listing = (FIXTURES / "gndec_notice_list.html").read_text(encoding="utf-8")
+    soup = make_soup(listing, only=LISTING_PARSE_ONLY)
+    print("\nGNDEC selector strategies on one parse:")
+    print(f"  select() per strategy : {timed(lambda: selector_strategies_old(soup), repeat):.2f} ms")
+    print(f"  shared anchor list    : {timed(lambda: selector_strategies_new(soup), repeat):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# benchmarks/load_test.py
+"""
+Load test: app.py (or async_app.py) under a mixed traffic profile, fully offline.
+
+Everything external is a local stand-in (benchmarks/fakes.py):
+- MySQL  -> a seeded sqlite file behind the real pool / run_query
+- Gemini -> FakeGemini with --gemini-delay seconds per answer
+- Telegram Bot API + Twilio -> fake HTTP server with --api-delay per call
+The app runs under gunicorn exactly as in production; a seeded mix of
+/webhook (WhatsApp), /telegram/webhook and /chat requests is sent with
+--concurrency clients, and p50/p95/p99 latency and throughput are reported
+per endpoint. Telegram updates are answered asynchronously, so the run also
+waits until the fake Telegram API has received the replies (end-to-end
+drain time). --outbound N additionally times N alert deliveries per channel
+(modules.alerts.deliver_telegram / deliver_whatsapp) against the fake API.
+
+    python -m benchmarks.load_test [--mode flask|async] [--requests 2000] [--concurrency 50]
+                                   [--mix webhook=5,telegram=3,chat=2] [--gemini-delay 0.5]
+                                   [--api-delay 0.05] [--workers 4] [--outbound 0]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from benchmarks import fakes
+
+APP_PORT = 5197
+API_PORT = 5198
+FAKE_TELEGRAM_TOKEN = "123456:load-test"
+
+WHATSAPP_COMMANDS = ["hi", "help", "notices", "notices ptu", "notices gndec", "faq", "faq 2", "myalerts"]
+TELEGRAM_COMMANDS = ["/start", "faq", "notices", "notices ptu", "notices gndec", "myalerts"]
+TELEGRAM_CALLBACKS = ["cat_1", "cat_2", "cat_3", "faq_5", "faq_12", "faq_back"]
+NOVEL_QUESTIONS = ["what is the weather in the library", "can I bring a guest to the hostel",
+                   "how do I reset my erp password", "where is the placement cell", "is the canteen open late"]
+
+
+# ---------------- Server side (runs inside the gunicorn worker) ----------------
+def _install_fakes():
+    from modules.gemini_ai import use_model
+    fakes.use_sqlite(os.environ["LOAD_TEST_DB"])
+    use_model(fakes.FakeGemini(float(os.environ["LOAD_TEST_GEMINI_DELAY"])))
+
+
+def flask_app():
+    _install_fakes()
+    import app
+    return app.app
+
+
+async def aiohttp_app():
+    _install_fakes()
+    import async_app
+    return async_app.create_app()
+
+
+MODES = {
+    "flask": lambda workers: ["-w", str(workers), "benchmarks.load_test:flask_app()"],
+    "async": lambda workers: ["-w", "1", "--worker-class", "aiohttp.GunicornWebWorker",
+                              "benchmarks.load_test:aiohttp_app"],
+}
+
+
+# ---------------- Traffic ----------------
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"webhook", "telegram", "chat"}
+    if unknown:
+        raise SystemExit(f"unknown traffic kinds: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def faq_questions(db_path, limit=50):
+    connection = sqlite3.connect(db_path)
+    rows = connection.execute("SELECT question FROM faqs ORDER BY id LIMIT ?", (limit,)).fetchall()
+    connection.close()
+    return [r[0] for r in rows]
+
+
+def question(rng, known):
+    """A third each: FAQ hit, repeated novel question (answer cache), unique question (Gemini)."""
+    roll = rng.random()
+    if roll < 0.34:
+        return rng.choice(known)
+    if roll < 0.67:
+        return rng.choice(NOVEL_QUESTIONS)
+    return f"{rng.choice(NOVEL_QUESTIONS)} #{rng.getrandbits(32)}"
+
+
+def build_requests(total, mix, known, seed=7):
+    """[(kind, path, kwargs for session.post)] — deterministic for a given seed."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    requests = []
+    for i in range(total):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "webhook":
+            body = rng.choice(WHATSAPP_COMMANDS) if rng.random() < 0.6 else question(rng, known)
+            sender = f"whatsapp:+9100000{rng.randint(0, 99):05d}"
+            requests.append((kind, "/webhook", {"data": {"Body": body, "From": sender}}))
+        elif kind == "telegram":
+            chat_id = 100000 + rng.randint(0, 99)
+            if rng.random() < 0.2:
+                update = {"update_id": i, "callback_query": {
+                    "id": str(i), "data": rng.choice(TELEGRAM_CALLBACKS),
+                    "message": {"message_id": i, "chat": {"id": chat_id}}}}
+            else:
+                update = {"update_id": i, "message": {
+                    "message_id": i, "chat": {"id": chat_id}, "text": rng.choice(TELEGRAM_COMMANDS)}}
+            requests.append((kind, "/telegram/webhook", {"json": update}))
+        else:
+            requests.append((kind, "/chat", {"json": {"message": question(rng, known)}}))
+    return requests
+
+
+async def run_load(base, requests, concurrency):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    pending = iter(requests)
+    timeout = aiohttp.ClientTimeout(total=120)
+
+    async def client(session):
+        for kind, path, kwargs in pending:
+            start = time.perf_counter()
+            try:
+                async with session.post(base + path, **kwargs) as r:
+                    await r.read()
+                    ok = r.status == 200
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies[kind].append(time.perf_counter() - start)
+            else:
+                errors[kind] += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+# ---------------- Helpers ----------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def report_row(name, latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda p: f"{percentile(latencies, p) * 1000:8.1f}"
+    print(f"  {name:<10} ok={len(latencies):<6} err={errors:<5} {len(latencies) / elapsed:8.1f} req/s  "
+          f"p50={ms(0.50)} ms  p95={ms(0.95)} ms  p99={ms(0.99)} ms")
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"❌ {url} did not come up")
+
+
+def api_stats():
+    with urllib.request.urlopen(f"http://127.0.0.1:{API_PORT}/stats", timeout=5) as r:
+        return json.load(r)
+
+
+def wait_telegram_drain(expected, timeout=60):
+    """Seconds until the fake Telegram API has seen `expected` replies (or stopped growing)."""
+    start = time.perf_counter()
+    last, last_change = -1, time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        seen = api_stats().get("telegram.sendMessage", 0)
+        if seen >= expected:
+            return seen, time.perf_counter() - start
+        if seen != last:
+            last, last_change = seen, time.perf_counter()
+        elif time.perf_counter() - last_change > 3:
+            break
+        time.sleep(0.1)
+    return last, time.perf_counter() - start
+
+
+# ---------------- Outbound deliveries ----------------
+def run_outbound(n, concurrency=10):
+    os.environ.update(
+        TELEGRAM_TOKEN=FAKE_TELEGRAM_TOKEN, TELEGRAM_API_BASE=f"http://127.0.0.1:{API_PORT}",
+        TWILIO_ACCOUNT_SID="AC" + "0" * 32, TWILIO_AUTH_TOKEN="load-test",
+        TWILIO_WHATSAPP_NUMBER="whatsapp:+10000000000", TWILIO_API_BASE=f"http://127.0.0.1:{API_PORT}",
+    )
+    from modules import alerts
+
+    print(f"\nOutbound deliveries: {n} per channel, {concurrency} threads")
+    for name, deliver, recipient in (("telegram", alerts.deliver_telegram, "100001"),
+                                     ("twilio", alerts.deliver_whatsapp, "whatsapp:+910000000001")):
+        def one(i):
+            start = time.perf_counter()
+            ok = deliver(recipient, f"load test alert {i}")
+            return ok, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(one, range(n)))
+        elapsed = time.perf_counter() - start
+        report_row(name, [t for ok, t in results if ok], sum(1 for ok, _ in results if not ok), elapsed)
+
+
+# ---------------- Main ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against local fakes.")
+    parser.add_argument("--mode", choices=sorted(MODES), default="flask")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mix", default="webhook=5,telegram=3,chat=2")
+    parser.add_argument("--gemini-delay", type=float, default=0.5)
+    parser.add_argument("--api-delay", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn sync workers (flask mode)")
+    parser.add_argument("--outbound", type=int, default=0, help="alert deliveries per channel")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="campus-load-")
+    db_path = os.path.join(workdir, "campus.sqlite3")
+    fakes.seed_db(db_path)
+    requests = build_requests(args.requests, parse_mix(args.mix), faq_questions(db_path))
+
+    env = dict(
+        os.environ, AUTO_MIGRATE="0", PYTHONUNBUFFERED="1",
+        LOAD_TEST_DB=db_path, LOAD_TEST_GEMINI_DELAY=str(args.gemini_delay),
+        TELEGRAM_BOT_TOKEN=FAKE_TELEGRAM_TOKEN, TELEGRAM_API_BASE=f"http://127.0.0.1:{API_PORT}",
+    )
+    api = subprocess.Popen([sys.executable, "-m", "benchmarks.fakes", "api", str(API_PORT), str(args.api_delay)],
+                           env=env, stdout=subprocess.DEVNULL)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{APP_PORT}", "--log-level", "warning",
+         "--timeout", "120", *MODES[args.mode](args.workers)],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(f"http://127.0.0.1:{API_PORT}/stats")
+        wait_ready(f"http://127.0.0.1:{APP_PORT}/")
+        print(f"{args.mode}: {args.requests} requests, {args.concurrency} concurrent, mix {args.mix}, "
+              f"fake Gemini {args.gemini_delay:.2f}s, fake APIs {args.api_delay * 1000:.0f} ms")
+
+        latencies, errors, elapsed = asyncio.run(run_load(f"http://127.0.0.1:{APP_PORT}", requests,
+                                                          args.concurrency))
+        for kind in sorted(set(latencies) | set(errors)):
+            report_row(kind, latencies[kind], errors[kind], elapsed)
+        report_row("all", [t for values in latencies.values() for t in values], sum(errors.values()), elapsed)
+
+        accepted = len(latencies.get("telegram", []))
+        if accepted:
+            seen, drain = wait_telegram_drain(accepted)
+            print(f"  telegram replies delivered: {seen}/{accepted}, "
+                  f"queue drained {drain:.1f}s after the last request")
+
+        if args.outbound:
+            run_outbound(args.outbound)
+    finally:
+        for process in (server, api):
+            process.terminate()
+        for process in (server, api):
+            process.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/scrapers.py
+"""
+PTU / GNDEC extractor timings on large synthetic pages, fully offline.
+The pages are generated into a temporary recorded-pages corpus
+(modules/recorded_pages.py) under the scrapers' real URLs, so listing and
+detail pages go through the same offline fetch path as
+SCRAPER_OFFLINE_DIR=... python -m modules.scraper_ptu / scraper_gndec.
+Timed (best of --repeat):
+- PTU: whole-table scan with best_title_and_link_from_row (--rows rows)
+- GNDEC: extract_notices_from_soup on a --rows card listing
+- GNDEC: get_notice_date_from_page with the date in <time>, <meta>, a
+  .date element, or only in the page text (worst case)
+- modules.dates.extract_date per call (old vs new parsers: benchmarks/dates.py)
+
+    python -m benchmarks.scrapers [--rows 5000] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from modules import recorded_pages, scrape_state
+from modules.dates import extract_date
+from modules.html_parsing import PARSER, make_soup
+from modules.scraper_gndec import (
+    GNDEC_URL, LISTING_PARSE_ONLY, extract_notices_from_soup, get_notice_date_from_page,
+)
+from modules.scraper_ptu import PTU_NOTICE_PAGE, best_title_and_link_from_row
+
+TOPICS = ["Fee", "Date Sheet", "Scholarship", "Tender", "Examination", "Admit Card", "Holiday",
+          "Result", "Re-appear", "Workshop", "Convocation", "Admission"]
+PTU_DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%d %B %Y", "%Y-%m-%d", "%d %b %Y"]
+GNDEC_DATE_FORMATS = ["%d %B %Y", "%b %d, %Y", "%d-%m-%Y"]
+FILLER = ("The competent authority has approved the schedule given below. Students are advised "
+          "to contact the concerned department for any clarification. ")
+
+
+# ---------------- Synthetic pages ----------------
+def _day(i):
+    return date.today() - timedelta(days=i // 170)
+
+
+NAVBAR = "".join(f"<a href='/page-{i}/'>Menu {i}</a>" for i in range(40))
+
+
+def _page(title, body, head=""):
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title>{head}</head>"
+            f"<body><div class='navbar'>{NAVBAR}</div>{body}<div class='footer'>{FILLER * 5}</div></body></html>")
+
+
+def ptu_noticeboard(rows, rng):
+    out = ["<table class='table notice-table'><thead><tr><th>Sr.</th><th>Title</th><th>Date</th></tr></thead><tbody>"]
+    for i in range(rows):
+        topic = rng.choice(TOPICS)
+        posted = _day(i).strftime(rng.choice(PTU_DATE_FORMATS))
+        out.append(f"<tr><td>{i + 1}</td><td><a href='/wp-content/uploads/notice-{i}.pdf'>{topic} notice "
+                   f"regarding {topic.lower()} for session 2025-26 ({i})</a></td><td>{posted}</td></tr>")
+    out.append("</tbody></table>")
+    return _page("Noticeboard – PTU", "".join(out))
+
+
+def gndec_listing(cards, rng):
+    out = ["<div class='page'><h2>Notice Board</h2>"]
+    for i in range(cards):
+        topic = rng.choice(TOPICS)
+        posted = "" if i % 3 == 0 else \
+            f"<span class='date'>{_day(i).strftime(rng.choice(GNDEC_DATE_FORMATS))}</span>"
+        out.append(f"<div class='card'><div class='card-body'><a href='/notice/{cards - i}'>{topic}: "
+                   f"{topic} schedule for B.Tech students ({i})</a> {posted}</div></div>")
+    out.append("</div>")
+    return _page("GNDEC ERP | Notices", "".join(out))
+
+
+def gndec_detail(where, paragraphs=400):
+    posted = date.today().strftime("%d %B %Y")
+    head = f"<meta property='article:published_time' content='{date.today().isoformat()}'>" \
+        if where == "meta" else ""
+    top = {"time": f"<time datetime='{date.today().isoformat()}'>{posted}</time>",
+           "class": f"<div class='notice-meta'><span class='posted-on'>Posted on {posted}</span></div>"}.get(where, "")
+    body = "".join(f"<p class='c{i % 7}'>{FILLER}</p>" for i in range(paragraphs))
+    tail = f"<p>Issued on {posted}</p>" if where == "text" else ""
+    return _page("Notice", f"<div class='notice'><h3>Date Sheet</h3>{top}{body}{tail}</div>", head)
+
+
+# ---------------- Helpers ----------------
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def quiet(fn):
+    """fn with stdout swallowed (the extractors print progress lines)."""
+    def call():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return call
+
+
+def listing_soup(source, url, only):
+    page = scrape_state.fetch(source, url)
+    return make_soup(page.html, only=only)
+
+
+def ptu_scan():
+    rows = listing_soup("PTU", PTU_NOTICE_PAGE, "table").find("table").find_all("tr")[1:]
+    return [best_title_and_link_from_row(tr) for tr in rows]
+
+
+def date_samples(rng, n=200):
+    """{kind: [strings]} — what the parsers are fed by the scrapers."""
+    cells = [_day(i).strftime(rng.choice(PTU_DATE_FORMATS + GNDEC_DATE_FORMATS)) for i in range(n)]
+    titles = [f"{rng.choice(TOPICS)} notice regarding exams for session 2025-26 ({i})" for i in range(n)]
+    numbers = [str(i + 1) for i in range(n)]
+    page_text = make_soup(gndec_detail("text", paragraphs=100)).get_text(" ", strip=True)
+    return {"date cell": cells, "title cell": titles, "sr. no cell": numbers, "page text (date last)": [page_text]}
+
+
+# ---------------- Main ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Offline PTU / GNDEC extractor benchmarks.")
+    parser.add_argument("--rows", type=int, default=5000, help="noticeboard rows / listing cards")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    corpus = tempfile.mkdtemp(prefix="scraper-corpus-")
+    recorded_pages.use_directory(corpus)
+    recorded_pages.save(PTU_NOTICE_PAGE, ptu_noticeboard(args.rows, rng))
+    recorded_pages.save(GNDEC_URL, gndec_listing(args.rows, rng))
+    details = {where: f"{GNDEC_URL}/detail-{where}" for where in ("time", "meta", "class", "text")}
+    for where, url in details.items():
+        recorded_pages.save(url, gndec_detail(where))
+    print(f"parser: {PARSER}  corpus: {corpus}  (best of {args.repeat})\n")
+
+    rows = ptu_scan()
+    complete = sum(1 for title, link, day in rows if title and link and day)
+    total = timed(ptu_scan, args.repeat)
+    soup = listing_soup("PTU", PTU_NOTICE_PAGE, "table")
+    trs = soup.find("table").find_all("tr")[1:]
+    rows_only = timed(lambda: [best_title_and_link_from_row(tr) for tr in trs], args.repeat)
+    print(f"PTU noticeboard, {len(trs)} rows ({complete} with title+link+date)")
+    print(f"  fetch + parse + rows        : {total * 1000:9.1f} ms")
+    print(f"  best_title_and_link_from_row: {rows_only * 1000:9.1f} ms  ({rows_only / len(trs) * 1e6:.1f} µs/row)")
+
+    items = quiet(lambda: extract_notices_from_soup(listing_soup("GNDEC", GNDEC_URL, LISTING_PARSE_ONLY),
+                                                    GNDEC_URL))()
+    dated = sum(1 for _, _, day in items if day)
+    total = timed(quiet(lambda: extract_notices_from_soup(
+        listing_soup("GNDEC", GNDEC_URL, LISTING_PARSE_ONLY), GNDEC_URL)), args.repeat)
+    soup = listing_soup("GNDEC", GNDEC_URL, LISTING_PARSE_ONLY)
+    extract = timed(quiet(lambda: extract_notices_from_soup(soup, GNDEC_URL)), args.repeat)
+    print(f"\nGNDEC listing, {len(items)} notices ({dated} dated on the listing)")
+    print(f"  fetch + parse + extract     : {total * 1000:9.1f} ms")
+    print(f"  extract_notices_from_soup   : {extract * 1000:9.1f} ms  ({extract / len(items) * 1e6:.1f} µs/notice)")
+
+    print("\nGNDEC detail page, get_notice_date_from_page (date found in ...)")
+    for where, url in details.items():
+        found = get_notice_date_from_page(url)
+        seconds = timed(lambda: get_notice_date_from_page(url), args.repeat)
+        print(f"  {where:<8}{seconds * 1000:9.2f} ms  -> {found}")
+
+    print("\nextract_date, µs per call")
+    for kind, texts in date_samples(rng).items():
+        seconds = timed(lambda: [extract_date(t) for t in texts], args.repeat) / len(texts)
+        print(f"  {kind:<24}{seconds * 1e6:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
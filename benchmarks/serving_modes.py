@@ -0,0 +1,152 @@
+# benchmarks/serving_modes.py
+"""
+/chat under load: sync Flask (gunicorn sync workers) vs async_app.py (aiohttp worker).
+
+Gemini is replaced by a fake model that takes GEMINI_DELAY seconds, and the
+FAQ index / DB writes are disabled, so the numbers show how many slow AI calls
+each mode keeps in flight, not MySQL or Gemini speed. Every request asks a
+different question so the answer cache never hits.
+
+    python -m benchmarks.serving_modes [requests] [concurrency]
+
+Env: BENCH_WORKERS (gunicorn sync workers, default 4), GEMINI_DELAY (default 1.0).
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+GEMINI_DELAY = float(os.getenv("GEMINI_DELAY", 1.0))
+WORKERS = int(os.getenv("BENCH_WORKERS", 4))
+
+
+# ---------------- Fakes (loaded inside the server processes) ----------------
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGemini:
+    """Stands in for GenerativeModel: fixed latency, canned answer."""
+
+    def generate_content(self, prompt):
+        time.sleep(GEMINI_DELAY)
+        return _FakeResponse("Fake answer.")
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(GEMINI_DELAY)
+        return _FakeResponse("Fake answer.")
+
+
+def _no_db(*args, **kwargs):
+    return None
+
+
+def flask_app():
+    import app
+    from modules.gemini_ai import use_model
+    use_model(FakeGemini())
+    app.best_answer = _no_db
+    app.log_chat = _no_db
+    return app.app
+
+
+async def aiohttp_app():
+    import async_app
+    from modules import chat_core
+    from modules.gemini_ai import use_model
+    use_model(FakeGemini())
+    chat_core.log_chat = _no_db
+    async_app.best_answer = _no_db
+    return async_app.create_app()
+
+
+MODES = {
+    "flask": ["-w", str(WORKERS), "benchmarks.serving_modes:flask_app()"],
+    "async": ["-w", "1", "--worker-class", "aiohttp.GunicornWebWorker", "benchmarks.serving_modes:aiohttp_app"],
+}
+
+
+# ---------------- Load generator ----------------
+async def _wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as r:
+                    if r.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"❌ server at {url} did not start")
+
+
+async def _load(base, total, concurrency):
+    latencies, errors = [], 0
+    counter = iter(range(total))
+    timeout = aiohttp.ClientTimeout(total=300)
+
+    async def client(session):
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{base}/chat", json={"message": f"question number {i}"}) as r:
+                    await r.read()
+                    if r.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def _pct(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def run_mode(name, total, concurrency, port):
+    env = dict(os.environ, AUTO_MIGRATE="0", PYTHONUNBUFFERED="1")
+    cmd = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+           "--timeout", "120", *MODES[name]]
+    server = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(_wait_ready(base + "/"))
+        latencies, errors, elapsed = asyncio.run(_load(base, total, concurrency))
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    latencies.sort()
+    print(f"{name:<6} ok={len(latencies):<5} errors={errors:<4} "
+          f"throughput={len(latencies) / elapsed:7.1f} req/s  "
+          f"p50={_pct(latencies, 0.50) * 1000:7.0f} ms  p95={_pct(latencies, 0.95) * 1000:7.0f} ms  "
+          f"p99={_pct(latencies, 0.99) * 1000:7.0f} ms")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"/chat, {total} requests, {concurrency} concurrent, fake Gemini {GEMINI_DELAY:.1f}s, "
+          f"flask workers={WORKERS}")
+    run_mode("flask", total, concurrency, 5101)
+    run_mode("async", total, concurrency, 5102)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/startup_time.py
+"""
+Startup-time report: what a fresh worker pays before serving its first request.
+
+For each entry point it runs `python -X importtime -c "import <target>"` in a
+clean interpreter and prints
+- total import time
+- the heaviest imports (cumulative, grouped by top-level package)
+- the project's own modules (self / cumulative)
+then times the lazy inits separately (create_app(), first Gemini model,
+Twilio TwiML) so deferred costs stay visible.
+
+    python -m benchmarks.startup_time [target ...]      (default: app async_app scheduler)
+"""
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+TOP = 10
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+PROJECT_PREFIXES = ("app", "async_app", "scheduler", "modules")
+
+INIT_SNIPPET = r"""
+import time
+t = time.perf_counter(); import app; t_import = time.perf_counter() - t
+t = time.perf_counter(); app.create_app(); t_factory = time.perf_counter() - t
+t = time.perf_counter(); app.new_twiml(); t_twiml = time.perf_counter() - t
+t = time.perf_counter(); import google.generativeai; t_genai = time.perf_counter() - t
+from modules.gemini_ai import get_model
+t = time.perf_counter(); get_model(); t_model = time.perf_counter() - t
+print(f"{t_import:.4f} {t_factory:.4f} {t_twiml:.4f} {t_genai:.4f} {t_model:.4f}")
+"""
+
+
+def _env():
+    # no DB round trips at import: this measures code loading, not MySQL
+    return dict(os.environ, AUTO_MIGRATE="0", PYTHONWARNINGS="ignore")
+
+
+def importtime(target):
+    """[(self_us, cumulative_us, depth, module)] for `import target` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, env=_env(),
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            rows.append((int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2, m.group(4)))
+    if proc.returncode != 0:
+        print(f"⚠️  import {target} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return rows
+
+
+def report_imports(target):
+    rows = importtime(target)
+    if not rows:
+        return
+    total = sum(r[0] for r in rows)
+    print(f"\n=== import {target}: {total / 1000:.0f} ms, {len(rows)} modules ===")
+
+    by_package = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+    print("-- heaviest packages (self time summed) --")
+    for name, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:TOP]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    print("-- project modules (self / cumulative) --")
+    for self_us, cum_us, _, name in rows:
+        if name.split(".")[0] in PROJECT_PREFIXES:
+            print(f"  {self_us / 1000:8.1f} / {cum_us / 1000:8.1f} ms  {name}")
+
+
+def report_inits():
+    proc = subprocess.run([sys.executable, "-c", INIT_SNIPPET], capture_output=True, text=True, env=_env())
+    if proc.returncode != 0:
+        print("⚠️  init timing failed:", proc.stderr.strip().splitlines()[-1])
+        return
+    t_import, t_factory, t_twiml, t_genai, t_model = map(float, proc.stdout.split()[-5:])
+    print("\n=== deferred / lazy costs (wall clock, fresh process) ===")
+    print(f"  {t_import * 1000:8.1f} ms  import app (includes app = create_app())")
+    print(f"  {t_factory * 1000:8.1f} ms  another create_app()")
+    print(f"  {t_twiml * 1000:8.1f} ms  first WhatsApp reply: twilio.twiml import")
+    print(f"  {t_genai * 1000:8.1f} ms  first Gemini call: google.generativeai import")
+    print(f"  {t_model * 1000:8.1f} ms  first Gemini call: configure + GenerativeModel"
+          f"{'' if os.getenv('GEMINI_API_KEY') else ' (GEMINI_API_KEY unset, skipped)'}")
+
+
+def main():
+    targets = sys.argv[1:] or ["app", "async_app", "scheduler"]
+    for target in targets:
+        report_imports(target)
+    report_inits()
+
+
+if __name__ == "__main__":
+    main()
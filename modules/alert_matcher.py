@@ -0,0 +1,231 @@
+# modules/alert_matcher.py
+"""
+In-memory alert matcher.
+- Alerts are partitioned by source ('' = any source)
+- Inside a partition, all keywords go into one Aho-Corasick automaton, so a
+  notice title is scanned once no matter how many alerts exist
+- Alerts with the same (keyword, source) share one automaton entry
+- refresh() polls a cheap signature of the alerts table (count, max id,
+  max updated_at) and only fetches rows added or edited since the last
+  load; a row that left the active set (delete / deactivate / frequency
+  change) triggers a full reload
+"""
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+from modules.database import run_query
+
+
+class KeywordAutomaton:
+    """Multi-pattern substring matcher (Aho-Corasick) over lowercased keywords."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+        self._built = True
+
+    def add(self, keyword: str):
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            node = nxt
+        self._out[node].add(keyword)
+        self._built = False
+
+    def build(self):
+        """Compute failure links (BFS). Called lazily before the first search."""
+        queue = list(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        i = 0
+        while i < len(queue):
+            node = queue[i]
+            i += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] |= self._out[self._fail[child]]
+        self._built = True
+
+    def find(self, text: str) -> set:
+        """Return the set of keywords that occur anywhere in text."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+class _SourcePartition:
+    def __init__(self):
+        self.by_keyword: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self.automaton = None
+
+    def add(self, kw: str, alert: Dict[str, Any]):
+        group = self.by_keyword.setdefault(kw, {})
+        group[int(alert["id"])] = alert
+        if kw:
+            self.automaton = None  # rebuilt on next match
+
+    def remove(self, kw: str, alert_id: int):
+        group = self.by_keyword.get(kw)
+        if group is None:
+            return
+        group.pop(alert_id, None)
+        if not group:
+            del self.by_keyword[kw]
+            self.automaton = None
+
+    def match(self, title_lower: str) -> List[Dict[str, Any]]:
+        if self.automaton is None:
+            self.automaton = KeywordAutomaton()
+            for kw in self.by_keyword:
+                if kw:
+                    self.automaton.add(kw)
+        hits = list(self.by_keyword.get("", {}).values())  # alerts without keyword match everything
+        for kw in self.automaton.find(title_lower):
+            hits.extend(self.by_keyword[kw].values())
+        return hits
+
+
+def alert_key(alert: Dict[str, Any]) -> Tuple[str, str]:
+    """(keyword, source) in the normalized form used for matching."""
+    kw = (alert.get("keyword") or "").strip().lower()
+    src = (alert.get("source") or "").strip().upper()
+    return kw, src
+
+
+class AlertMatcher:
+    """Matches batches of notices against active alerts of one frequency."""
+
+    def __init__(self, frequency: str = "immediate"):
+        self.frequency = frequency
+        self._lock = threading.RLock()
+        self._partitions: Dict[str, _SourcePartition] = {}
+        self._alerts: Dict[int, Dict[str, Any]] = {}
+        self._signature = None
+
+    # ---------- maintenance ----------
+    def load(self, alerts: Iterable[Dict[str, Any]]):
+        """Replace the whole index with the given alert rows."""
+        with self._lock:
+            self._partitions = {}
+            self._alerts = {}
+            for a in alerts:
+                self.add_alert(a)
+
+    def add_alert(self, alert: Dict[str, Any]):
+        with self._lock:
+            aid = int(alert["id"])
+            if aid in self._alerts:
+                self.remove_alert(aid)
+            kw, src = alert_key(alert)
+            self._alerts[aid] = alert
+            self._partitions.setdefault(src, _SourcePartition()).add(kw, alert)
+
+    def remove_alert(self, alert_id: int):
+        with self._lock:
+            alert = self._alerts.pop(int(alert_id), None)
+            if not alert:
+                return
+            kw, src = alert_key(alert)
+            part = self._partitions.get(src)
+            if part:
+                part.remove(kw, int(alert_id))
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def refresh(self):
+        """
+        Bring the index in line with the alerts table.
+        alerts.updated_at moves on every INSERT / UPDATE (ON UPDATE
+        CURRENT_TIMESTAMP, see modules.migrations), so rows added or edited in
+        place (keyword, source, reactivated) since the last refresh are
+        re-fetched and upserted; if the index then holds more alerts than the
+        table's active set, something left it and the index is reloaded.
+        """
+        sig = run_query(
+            "SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id, MAX(updated_at) AS updated "
+            "FROM alerts WHERE active=1 AND frequency=%s",
+            (self.frequency,), fetch=True
+        )
+        if not sig:
+            return
+        signature = (int(sig[0]["n"]), int(sig[0]["max_id"]), sig[0]["updated"])
+
+        with self._lock:
+            if self._signature == signature:
+                return
+
+            if self._signature is not None and self._signature[2] is not None:
+                _, old_max, old_updated = self._signature
+                # >= : rows written in the same tick as the last refresh are re-read (upsert is idempotent)
+                changed = run_query(
+                    "SELECT * FROM alerts WHERE (id > %s OR updated_at >= %s) AND active=1 "
+                    "AND frequency=%s",
+                    (old_max, old_updated, self.frequency), fetch=True
+                )
+                if changed is not None:
+                    for a in changed:
+                        self.add_alert(a)
+                    if len(self._alerts) == signature[0]:
+                        self._signature = signature
+                        return
+
+            rows = run_query(
+                "SELECT * FROM alerts WHERE active=1 AND frequency=%s",
+                (self.frequency,), fetch=True
+            )
+            if rows is None:
+                return
+            self.load(rows)
+            self._signature = signature
+
+    # ---------- matching ----------
+    def match(self, notices: Iterable[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Return every (alert, notice) pair where the alert applies to the notice."""
+        pairs = []
+        with self._lock:
+            any_source = self._partitions.get("")
+            for n in notices:
+                title_lower = (n.get("title") or "").lower()
+                source = (n.get("source") or "").upper()
+                for part in (self._partitions.get(source) if source else None, any_source):
+                    if part is None:
+                        continue
+                    for a in part.match(title_lower):
+                        pairs.append((a, n))
+        return pairs
+
+
+_matchers: Dict[str, AlertMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_matcher(frequency: str = "immediate") -> AlertMatcher:
+    """Process-wide matcher for the given frequency, refreshed against the DB."""
+    with _matchers_lock:
+        matcher = _matchers.get(frequency)
+        if matcher is None:
+            matcher = _matchers[frequency] = AlertMatcher(frequency)
+    matcher.refresh()
+    return matcher
@@ -1,44 +1,13 @@
 # modules/alerts.py
-import os
-from dotenv import load_dotenv
 from modules.database import run_query
-from typing import Dict, Any
-
-load_dotenv()
-
-# Twilio
-TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER")
-
-# Telegram
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-
-# Lazy imports to avoid import-time errors if not configured
-_twilio_client = None
-_telegram_bot = None
-
-def _get_twilio_client():
-    global _twilio_client
-    if _twilio_client is None:
-        try:
-            if TWILIO_SID and TWILIO_TOKEN:
-                from twilio.rest import Client
-                _twilio_client = Client(TWILIO_SID, TWILIO_TOKEN)
-        except Exception as e:
-            print("Twilio init error:", e)
-    return _twilio_client
-
-def _get_telegram_bot():
-    global _telegram_bot
-    if _telegram_bot is None:
-        try:
-            if TELEGRAM_TOKEN:
-                from telegram import Bot
-                _telegram_bot = Bot(token=TELEGRAM_TOKEN)
-        except Exception as e:
-            print("Telegram init error:", e)
-    return _telegram_bot
+from modules.alert_matcher import get_matcher
+from modules import outbox
+# send primitives live in modules.delivery (shared with the outbox workers); re-exported here
+from modules.delivery import (
+    RATE_LIMIT_DEFAULT_WAIT, RetryLater, deliver_telegram, deliver_whatsapp,
+    mark_sent_many, retry_after_seconds, send_telegram, send_whatsapp,
+)
+from typing import Dict, Any, Iterable, List, Set, Tuple
 
 # ---------------- Helpers ----------------
 def normalize(s: str):
@@ -57,112 +26,90 @@ def already_sent(alert_id: int, notice_id: int) -> bool:
     )
     return bool(res)
 
-def mark_sent(alert_id: int, notice_id: int):
-    try:
-        run_query(
-            "INSERT INTO alerts_sent (alert_id, notice_id) VALUES (%s, %s)",
-            (alert_id, notice_id),
-        )
-    except Exception:
-        # ignore duplicate / race
-        pass
+SENT_PAIRS_CHUNK = 500  # (alert_id, notice_id) pairs per lookup query
 
-# ---------------- Delivery functions ----------------
-def send_whatsapp(to_number: str, text: str) -> bool:
+def sent_pairs(pairs: Iterable[Tuple[int, int]]) -> Set[Tuple[int, int]]:
     """
-    to_number must be in Twilio WhatsApp format: whatsapp:+91XXXXXXXXXX
+    Bulk version of already_sent: which (alert_id, notice_id) pairs are in alerts_sent.
+    The pairs go to MySQL as a row-constructor IN list, served by the
+    uq_alerts_sent_pair key, so only rows for the candidate pairs come back
+    (not every alert that was ever sent one of these notices).
     """
-    client = _get_twilio_client()
-    if not client or not TWILIO_WHATSAPP_NUMBER:
-        print("Twilio not configured properly.")
-        return False
-    try:
-        client.messages.create(
-            body=text,
-            from_=TWILIO_WHATSAPP_NUMBER,
-            to=to_number
-        )
-        return True
-    except Exception as e:
-        print("WhatsApp send failed:", e)
-        return False
+    pairs = sorted(set(pairs))
+    found = set()
+    for i in range(0, len(pairs), SENT_PAIRS_CHUNK):
+        chunk = pairs[i:i + SENT_PAIRS_CHUNK]
+        rows = run_query(
+            "SELECT alert_id, notice_id FROM alerts_sent "
+            f"WHERE (alert_id, notice_id) IN ({', '.join(['(%s, %s)'] * len(chunk))})",
+            tuple(v for pair in chunk for v in pair),
+            fetch=True,
+        ) or []
+        found.update((int(r["alert_id"]), int(r["notice_id"])) for r in rows)
+    return found
 
-def send_telegram(chat_id: str, text: str) -> bool:
-    bot = _get_telegram_bot()
-    if not bot:
-        print("Telegram bot not configured.")
-        return False
-    try:
-        bot.send_message(chat_id=chat_id, text=text, disable_web_page_preview=True)
-        return True
-    except Exception as e:
-        print("Telegram send failed:", e)
-        return False
+def mark_sent(alert_id: int, notice_id: int):
+    mark_sent_many([(alert_id, notice_id)])
 
 # ---------------- Core: matching and notify ----------------
-def notify_if_matches(notice_row: Dict[str, Any]):
-    """
-    Called after inserting a new notice.
-
-    notice_row must include keys: id, title, link, date, source
-    """
-    try:
-        notice_id = int(notice_row.get("id"))
-    except Exception:
-        print("notify_if_matches: invalid notice id")
-        return
-
+def notice_message(notice_row: Dict[str, Any]) -> str:
     title = notice_row.get("title", "") or ""
     link = notice_row.get("link", "") or ""
     source = (notice_row.get("source") or "").upper()
     date = notice_row.get("date", "")
+    return f"📢 New [{source}] Notice:\n{title}\n{link}\n🗓 {date}"
 
-    message = f"📢 New [{source}] Notice:\n{title}\n{link}\n🗓 {date}"
-
-    active_alerts = get_active_alerts()
-    t_title = title.lower()
+def notify_batch(notice_rows: List[Dict[str, Any]]):
+    """
+    Called once per scrape with every newly inserted notice.
 
-    for a in active_alerts:
+    Each row must include keys: id, title, link, date, source.
+    Matching happens in memory (modules.alert_matcher); alerts_sent is
+    checked with a single bulk query for the whole batch. Messages are
+    queued in the outbox, never sent inline.
+    """
+    notices = []
+    for row in notice_rows:
         try:
-            # a is a dict from DB, keys: id, user_identifier, channel, keyword, source, frequency, active
-            # Apply source filter (if set on alert)
-            alert_source = (a.get("source") or "").upper()
-            if alert_source:
-                if alert_source != source:
-                    continue
-
-            # Apply keyword filter (if set)
-            kw = (a.get("keyword") or "").strip()
-            if kw:
-                if kw.lower() not in t_title:
-                    continue
-
-            # frequency: only immediate alerts handled here
-            freq = (a.get("frequency") or "immediate")
-            if freq != "immediate":
-                # skip here; daily digest job will handle
-                continue
+            notices.append(dict(row, id=int(row.get("id"))))
+        except Exception:
+            print("notify_batch: invalid notice id", row.get("id"))
+    if not notices:
+        return
 
-            alert_id = int(a["id"])
-            if already_sent(alert_id, notice_id):
-                continue
+    matches = get_matcher("immediate").match(notices)
+    if not matches:
+        return
 
-            user_ident = a.get("user_identifier")
-            channel = a.get("channel")
+    done = sent_pairs((int(a["id"]), n["id"]) for a, n in matches)
 
-            sent = False
-            if channel == "whatsapp":
-                # Expecting user_ident like 'whatsapp:+91...'
-                sent = send_whatsapp(user_ident, message)
-            elif channel == "telegram":
-                # Telegram chat_id (string or int)
-                sent = send_telegram(user_ident, message)
-            else:
-                print("Unknown channel for alert:", channel)
+    items = []
+    for a, n in matches:
+        alert_id = int(a["id"])
+        if (alert_id, n["id"]) in done:
+            continue
+        channel = a.get("channel")
+        if channel not in ("whatsapp", "telegram"):
+            print("Unknown channel for alert:", channel)
+            continue
+        # whatsapp: user_identifier like 'whatsapp:+91...'; telegram: chat_id
+        items.append(outbox.OutboxItem(
+            channel=channel,
+            recipient=str(a.get("user_identifier")),
+            body=notice_message(n),
+            dedupe_key=f"alert:{alert_id}:notice:{n['id']}",
+            alert_id=alert_id,
+            notice_ids=(n["id"],),
+        ))
+        done.add((alert_id, n["id"]))
+
+    # delivery (and mark_sent) happens in the outbox workers
+    outbox.enqueue_many(items)
 
-            if sent:
-                mark_sent(alert_id, notice_id)
+def notify_if_matches(notice_row: Dict[str, Any]):
+    """
+    Called after inserting a new notice.
 
-        except Exception as inner_e:
-            print("Error processing alert:", inner_e)
-            continue
+    notice_row must include keys: id, title, link, date, source
+    """
+    notify_batch([notice_row])
@@ -0,0 +1,97 @@
+# modules/async_db.py
+"""
+asyncio MySQL access for the async app (async_app.py), via aiomysql.
+- one aiomysql pool per event loop, created on first use
+- run_query_async mirrors database.run_query: dict rows when fetch=True,
+  None on any failure (logged), so handlers port over unchanged
+Config: the same MYSQL_* env vars as modules/database.py;
+ASYNC_MYSQL_POOL_SIZE caps connections (default 20, the loop can wait on many at once).
+"""
+import asyncio
+import os
+import ssl
+import time
+
+from dotenv import load_dotenv
+
+from modules.database import POOL_MAX_LIFETIME, observe_query
+
+load_dotenv()
+
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_MYSQL_POOL_SIZE", 20))
+
+_pool = None
+_pool_loop = None
+_pool_lock = None
+
+
+def _ssl_context():
+    # same behaviour as get_connection(ssl_disabled=False): TLS on, server cert not verified
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+async def get_pool():
+    global _pool, _pool_loop, _pool_lock
+    loop = asyncio.get_running_loop()
+    if _pool is not None and _pool_loop is loop:
+        return _pool
+    if _pool_lock is None or _pool_loop is not loop:
+        _pool_lock, _pool_loop, _pool = asyncio.Lock(), loop, None
+    async with _pool_lock:
+        if _pool is None:
+            import aiomysql  # only the async app needs it
+            _pool = await aiomysql.create_pool(
+                host=os.getenv("MYSQL_HOST"),
+                user=os.getenv("MYSQL_USER"),
+                password=os.getenv("MYSQL_PASSWORD"),
+                db=os.getenv("MYSQL_DATABASE"),
+                port=int(os.getenv("MYSQL_PORT", 3306)),
+                ssl=_ssl_context(),
+                minsize=1,
+                maxsize=ASYNC_POOL_SIZE,
+                pool_recycle=int(POOL_MAX_LIFETIME),
+                autocommit=False,
+            )
+    return _pool
+
+
+async def run_query_async(query, params=None, fetch=False):
+    """Execute SQL query safely (async)."""
+    start = time.perf_counter()
+    ok = False
+    try:
+        pool = await get_pool()
+    except Exception as e:
+        print("❌ Error connecting to MySQL (async):", e)
+        observe_query(query, start, ok)
+        return None
+
+    import aiomysql
+    try:
+        async with pool.acquire() as connection:
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                try:
+                    await cursor.execute(query, params or ())
+                    result = await cursor.fetchall() if fetch else None
+                    await connection.commit()
+                    ok = True
+                    return list(result) if fetch else None
+                except Exception:
+                    await connection.rollback()
+                    raise
+    except Exception as e:
+        print("❌ Query execution failed (async):", e)
+        return None
+    finally:
+        observe_query(query, start, ok)
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
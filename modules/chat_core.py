@@ -0,0 +1,157 @@
+# modules/chat_core.py
+"""
+Reply logic shared by the two serving modes, app.py (Flask) and
+async_app.py (aiohttp), so neither has to import the other:
+- Gemini prompts and WhatsApp reply cleanup
+- WhatsApp command replies as TwiML (routed by modules.commands)
+- /chat logging (write-behind, modules.chat_log_buffer) and SSE framing
+- the Telegram update worker pool: the webhooks only enqueue, replies are
+  sent from modules.update_queue threads
+Importing this module builds no web app and touches no database; the pool
+threads start on the first submitted update.
+"""
+import json
+import os
+
+from dotenv import load_dotenv
+
+from modules import chat_log_buffer, query_profiler
+from modules.commands import Reply, router as command_router
+from modules.telegram_client import get_client
+from modules.update_queue import make_pool
+
+load_dotenv()
+TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+
+
+# ---------------- TwiML ----------------
+def new_twiml():
+    # twilio is imported on the first WhatsApp message, not at worker boot
+    from twilio.twiml.messaging_response import MessagingResponse
+    return MessagingResponse()
+
+
+# ---------------- WhatsApp commands ----------------
+def whatsapp_command_twiml(incoming_raw, from_number):
+    """
+    TwiML reply for a WhatsApp command (greeting, notices, faq, alerts), or
+    None when the message is free text for the FAQ index / Gemini fallback.
+    Commands are routed by modules.commands.
+    """
+    reply = command_router.dispatch("whatsapp", from_number, incoming_raw)
+    if reply is None:
+        return None
+    resp = new_twiml()
+    resp.message().body(reply.text)
+    return str(resp)
+
+
+# ---------------- Gemini prompts ----------------
+def chat_prompt(user_message):
+    return f"""
+            You are a helpful campus assistant for college students.
+            Answer clearly and politely.
+            Avoid markdown.
+            Keep it short.
+
+            Student question: "{user_message}"
+            """
+
+
+def whatsapp_prompt(incoming_raw):
+    return f"""
+            You are a smart and polite campus assistant for college students.
+            The student is messaging you over WhatsApp.
+
+            Guidelines:
+            - Reply in short, natural sentences (English preferred, Hindi allowed if needed).
+            - Do NOT use asterisks (*), hashtags (#), or markdown formatting.
+            - If the message is about academics, college rules, events, or campus life — answer factually.
+            - If unrelated, gently redirect to helpful topics.
+            - Keep replies under 5 lines for WhatsApp readability.
+
+            User message: "{incoming_raw}"
+            """
+
+
+def clean_whatsapp_reply(ai_reply):
+    # Clean formatting artifacts
+    clean_reply = ai_reply.replace("*", "").replace("_", "").replace("#", "").strip()
+
+    # Trim if message too long
+    if len(clean_reply) > 1500:
+        clean_reply = clean_reply[:1500] + "..."
+    return clean_reply
+
+
+# ---------------- /chat helpers ----------------
+def log_chat(user_message, reply):
+    # buffered: written to chat_logs in batches by modules.chat_log_buffer
+    chat_log_buffer.log_chat("mobile_app", "flutter", user_message, reply)
+
+
+def sse_event(payload):
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+# ---------------- Telegram helper ----------------
+def send_telegram_message(chat_id, text):
+    if not TELEGRAM_TOKEN:
+        print("TELEGRAM_BOT_TOKEN missing")
+        return
+
+    try:
+        get_client(TELEGRAM_TOKEN).send_message(chat_id, text)
+    except Exception as e:
+        print("Telegram send error:", e)
+
+
+def send_telegram_buttons(chat_id, text, buttons):
+    try:
+        get_client(TELEGRAM_TOKEN).send_message(
+            chat_id, text,
+            reply_markup={"inline_keyboard": buttons},
+            disable_web_page_preview=False,
+        )
+    except Exception as e:
+        print("Telegram send error:", e)
+
+
+# ---------------- Telegram updates ----------------
+def send_telegram_reply(chat_id, reply):
+    if reply.buttons:
+        buttons = [[{"text": label, "callback_data": data} for label, data in row] for row in reply.buttons]
+        send_telegram_buttons(chat_id, reply.text, buttons)
+    else:
+        send_telegram_message(chat_id, reply.text)
+
+
+# The webhook only queues the update and answers 200 immediately; this runs on
+# the modules.update_queue workers (one chat -> one worker, in arrival order).
+@query_profiler.profiled("telegram update")
+def handle_telegram_update(update):
+    try:
+        # inline buttons (FAQ categories/questions, alert delete)
+        if "callback_query" in update:
+            cq = update["callback_query"]
+            chat_id = cq["message"]["chat"]["id"]
+            reply = command_router.dispatch_callback("telegram", str(chat_id), cq["data"])
+            if reply:
+                send_telegram_reply(chat_id, reply)
+            return
+
+        message = update.get("message", {})
+        chat_id = message.get("chat", {}).get("id")
+        if not chat_id:
+            return
+
+        reply = command_router.dispatch("telegram", str(chat_id), message.get("text") or "")
+        if reply is None:
+            reply = Reply("Please type: faq / notices")
+        send_telegram_reply(chat_id, reply)
+
+    except Exception as e:
+        print("Telegram webhook error:", e)
+
+
+telegram_updates = make_pool(handle_telegram_update, name="telegram")
@@ -0,0 +1,153 @@
+# modules/chat_log_buffer.py
+"""
+Write-behind buffer for chat_logs.
+- request handlers call log_chat(), which only appends to memory
+- a background thread flushes with one multi-row INSERT when CHAT_LOG_BATCH
+  rows are waiting or CHAT_LOG_FLUSH_INTERVAL seconds have passed
+- memory is bounded by CHAT_LOG_MAX_PENDING rows; past that the oldest (or,
+  with CHAT_LOG_DROP=newest, the incoming) rows are dropped and counted, so a
+  DB outage never slows requests down or grows the process without limit
+- failed flushes are retried with the rows kept in order; remaining rows are
+  flushed at interpreter exit
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+from modules.database import run_many
+
+CHAT_LOG_BATCH = int(os.getenv("CHAT_LOG_BATCH", 100))
+CHAT_LOG_FLUSH_INTERVAL = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL", 2))      # seconds
+CHAT_LOG_MAX_PENDING = int(os.getenv("CHAT_LOG_MAX_PENDING", 10000))
+CHAT_LOG_DROP = os.getenv("CHAT_LOG_DROP", "oldest")                          # oldest | newest
+RETRY_BACKOFF_MAX = 30                                                        # seconds between failed flushes
+
+INSERT_SQL = (
+    "INSERT INTO chat_logs (user_identifier, source, user_message, bot_reply) "
+    "VALUES (%s, %s, %s, %s)"
+)
+
+
+class ChatLogBuffer:
+    def __init__(self, batch=CHAT_LOG_BATCH, interval=CHAT_LOG_FLUSH_INTERVAL,
+                 max_pending=CHAT_LOG_MAX_PENDING, drop=CHAT_LOG_DROP, writer=None):
+        self.batch = max(1, batch)
+        self.interval = interval
+        self.max_pending = max(self.batch, max_pending)
+        self.drop_oldest = drop != "newest"
+        self.writer = writer or (lambda rows: run_many(INSERT_SQL, rows))
+        self._rows = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "flushes": 0, "failed_flushes": 0}
+
+    # ---------- producer side ----------
+    def add(self, row):
+        """Queue one (user_identifier, source, user_message, bot_reply) row. Never blocks on the DB."""
+        if self._pid != os.getpid():
+            self._start()
+        with self._cond:
+            if len(self._rows) >= self.max_pending:
+                self.stats["dropped"] += 1
+                if not self.drop_oldest:
+                    return False
+                self._rows.popleft()
+            self._rows.append(row)
+            self.stats["queued"] += 1
+            if len(self._rows) >= self.batch:
+                self._cond.notify()
+        return True
+
+    def pending(self):
+        return len(self._rows)
+
+    # ---------- flusher ----------
+    def _start(self):
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            # after a fork the parent's rows belong to the parent
+            self._rows.clear()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="chat-log-flusher", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _take(self):
+        n = min(self.batch, len(self._rows))
+        return [self._rows.popleft() for _ in range(n)]
+
+    def _put_back(self, rows):
+        # failed rows go back to the front, oldest first, within the memory bound
+        room = self.max_pending - len(self._rows)
+        if room < len(rows):
+            self.stats["dropped"] += len(rows) - max(room, 0)
+            rows = rows[len(rows) - max(room, 0):]
+        self._rows.extendleft(reversed(rows))
+
+    def flush_once(self):
+        """Write one batch. Returns rows written, 0 if empty, None on DB failure (rows kept)."""
+        with self._cond:
+            rows = self._take()
+        if not rows:
+            return 0
+        if self.writer(rows) is None:
+            with self._cond:
+                self._put_back(rows)
+            self.stats["failed_flushes"] += 1
+            return None
+        self.stats["written"] += len(rows)
+        self.stats["flushes"] += 1
+        return len(rows)
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + max(self.interval, backoff)
+                while not self._stopping and len(self._rows) < self.batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            while True:
+                written = self.flush_once()
+                if written is None:
+                    backoff = min(RETRY_BACKOFF_MAX, max(1.0, backoff * 2))
+                    print(f"⚠️ chat_logs flush failed, {self.pending()} rows pending, retry in {backoff:.0f}s")
+                    break
+                backoff = 0.0
+                if len(self._rows) < self.batch:
+                    break
+
+    def close(self, timeout=5):
+        """Stop the flusher and write what is left (one attempt per batch)."""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while self._rows and time.monotonic() < deadline:
+            if self.flush_once() is None:
+                break
+        if self._rows:
+            print(f"⚠️ {len(self._rows)} chat_logs rows lost at shutdown")
+        self._pid = None
+
+
+chat_logs = ChatLogBuffer()
+atexit.register(chat_logs.close)
+
+
+def log_chat(user_identifier, source, user_message, bot_reply):
+    """Record one chat exchange; written to chat_logs in the background."""
+    return chat_logs.add((user_identifier, source, user_message, bot_reply))
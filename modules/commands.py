@@ -0,0 +1,538 @@
+# modules/commands.py
+"""
+Channel-agnostic command router for the WhatsApp webhook, the Telegram
+webhook (app.py) and the polling Telegram bot (modules/telegram_bot.py).
+- a message is tokenized once with a precompiled pattern; the command is
+  looked up in a dict ("alert add" tries the two-word key first), so routing
+  cost doesn't grow with the number of commands
+- handlers are registered per channel, or for all channels, and return a
+  Reply (text + optional buttons) that each transport renders itself;
+  returning None means "not a command", and the caller uses its fallback
+  (FAQ index / Gemini)
+- inline-button callbacks ("cat_3", "faq_back", ...) are routed the same way
+- every dispatch is timed into metrics.command_latency, one series per
+  (channel, command); callers time their fallback with timed() so it shows
+  up next to the commands (Prometheus at /metrics, a JSON summary of the
+  same series at /commands/metrics)
+Channels: "whatsapp", "telegram" (webhook), "telegram_bot" (PTB polling bot).
+"""
+import re
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional
+
+from modules import metrics
+from modules.database import run_query
+from modules.notices import render_notices
+
+_TOKENS = re.compile(r"\S+")
+_BOT_SUFFIX = re.compile(r"@\w+$")          # "/notices@CampusBot" -> "/notices"
+TELEGRAM_CHANNELS = ("telegram", "telegram_bot")   # "/cmd" and "/cmd@Bot" are commands only here
+
+WHATSAPP_GREETINGS = ("hi", "hello", "hey", "hii", "hello!")
+TELEGRAM_GREETINGS = ("start", "hi", "hello")
+
+
+class Reply(NamedTuple):
+    text: str
+    buttons: Optional[list] = None          # [[(label, callback_data)], ...]
+    parse_mode: Optional[str] = None        # "HTML" / "Markdown" (telegram_bot only)
+    disable_preview: bool = False
+
+
+class Command(NamedTuple):
+    channel: str
+    user: str
+    text: str               # whitespace-normalized raw text
+    name: str               # registry key that matched, e.g. "alert add"
+    parts: List[str]        # all raw tokens
+    parts_lower: List[str]  # all lowercased tokens
+    args: List[str]         # raw tokens after the command name
+
+
+# ---------------- Latency summary ----------------
+def latency_summary(bounds, counts, total, count):
+    """
+    JSON view (ms) of one metrics.command_latency series; quantiles are the
+    upper bound of the bucket holding them (None if beyond the last bucket).
+    """
+    def quantile(q):
+        rank, seen = q * count, 0
+        for bound, n in zip(bounds, counts):
+            seen += n
+            if seen >= rank:
+                return round(bound * 1000, 3)
+        return None
+
+    return {
+        "count": count,
+        "total_ms": round(total * 1000, 3),
+        "mean_ms": round(total * 1000 / count, 3) if count else None,
+        "p50_ms": quantile(0.50),
+        "p95_ms": quantile(0.95),
+        "buckets": dict(zip([*(f"{b * 1000:g}" for b in bounds), "+Inf"], counts)),
+    }
+
+
+# ---------------- Router ----------------
+class CommandRouter:
+    def __init__(self):
+        self._commands = {}     # (channel or None, name) -> handler
+        self._callbacks = {}    # (channel or None, prefix) -> handler
+
+    # ---------- registration ----------
+    @staticmethod
+    def _register(table, names, channels, fn):
+        for channel in channels or (None,):
+            for name in names:
+                table[(channel, name)] = fn
+        return fn
+
+    def command(self, *names, channels=None):
+        """Decorator: handler(cmd) -> Reply | None for the given command names."""
+        return lambda fn: self._register(self._commands, names, channels, fn)
+
+    def callback(self, *prefixes, channels=None):
+        """Decorator: handler(cmd) -> Reply | None for button data "<prefix>_<arg>" (or exactly <prefix>)."""
+        return lambda fn: self._register(self._callbacks, prefixes, channels, fn)
+
+    def _lookup(self, table, channel, name):
+        return table.get((channel, name)) or table.get((None, name))
+
+    # ---------- timing ----------
+    @contextmanager
+    def timed(self, channel, name):
+        with metrics.command_latency.time(channel, name):
+            yield
+
+    def metrics(self):
+        """{"channel:command": latency summary} of metrics.command_latency, busiest (total time) first."""
+        hist = metrics.command_latency
+        snaps = {f"{c}:{n}": latency_summary(hist.buckets, *state) for (c, n), state in hist.snapshot().items()}
+        return dict(sorted(snaps.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+    # ---------- dispatch ----------
+    def _run(self, handler, cmd):
+        with self.timed(cmd.channel, cmd.name):
+            try:
+                return handler(cmd)
+            except Exception as e:
+                print(f"❌ Command '{cmd.name}' failed on {cmd.channel}:", e)
+                return Reply("⚠️ Something went wrong. Please try again later.")
+
+    def dispatch(self, channel, user, text) -> Optional[Reply]:
+        """Route a text message. None = not a command (caller falls back to FAQ / AI)."""
+        parts = _TOKENS.findall(text or "")
+        if not parts:
+            return None
+        parts_lower = [p.lower() for p in parts]
+        first = parts_lower[0]
+        if channel in TELEGRAM_CHANNELS:
+            first = _BOT_SUFFIX.sub("", first).lstrip("/")
+
+        candidates = []
+        if len(parts_lower) > 1:
+            candidates.append((f"{first} {parts_lower[1]}", 2))
+        candidates.append((first, 1))
+        for name, used in candidates:
+            handler = self._lookup(self._commands, channel, name)
+            if handler:
+                cmd = Command(channel, user, " ".join(parts), name, parts, parts_lower, parts[used:])
+                return self._run(handler, cmd)
+        return None
+
+    def dispatch_callback(self, channel, user, data) -> Optional[Reply]:
+        """Route inline-button data such as "cat_3" or "faq_back"."""
+        data = data or ""
+        name, _, arg = data.partition("_")
+        handler = self._lookup(self._callbacks, channel, data)   # exact ("faq_back") wins
+        if handler:
+            name, arg = data, ""
+        else:
+            handler = self._lookup(self._callbacks, channel, name)
+        if not handler:
+            return None
+        cmd = Command(channel, user, data, f"callback:{name}", [data], [data.lower()], [arg] if arg else [])
+        return self._run(handler, cmd)
+
+
+router = CommandRouter()
+command = router.command
+callback = router.callback
+
+
+# ---------------- Shared queries ----------------
+def faq_categories():
+    return run_query("SELECT id, name FROM faq_categories ORDER BY id", fetch=True) or []
+
+
+def faq_questions(cat_id):
+    return run_query("SELECT id, question FROM faqs WHERE category_id=%s", (cat_id,), fetch=True) or []
+
+
+def faq_by_id(faq_id):
+    rows = run_query("SELECT question, answer, category_id FROM faqs WHERE id=%s", (faq_id,), fetch=True)
+    return rows[0] if rows else None
+
+
+def top_faqs():
+    return run_query("SELECT question, answer FROM faqs LIMIT 5", fetch=True)
+
+
+def category_buttons(cats):
+    return [[(c["name"], f"cat_{c['id']}")] for c in cats]
+
+
+# ---------------- Greetings / help ----------------
+@command(*WHATSAPP_GREETINGS, channels=("whatsapp",))
+def whatsapp_greeting(cmd):
+    if cmd.args:
+        return None  # "hi, when are exams?" is a question, not a greeting
+    return Reply(
+        "Hello! I’m your Campus Info Chatbot.\n\n"
+        "Commands you can use:\n"
+        "• notices [source] — show latest university updates (e.g. 'notices', 'notices ptu')\n"
+        "• faq — list top FAQs\n"
+        "• faq <n> — show FAQ answer (e.g. 'faq 1')\n"
+        "• alert add <keyword> [whatsapp] [source] — create an alert (example: alert add admit_card whatsapp GNDEC)\n"
+        "• myalerts — list your alerts\n"
+        "• delalert <id> — delete an alert by id\n"
+        "• help — show this message"
+    )
+
+
+@command("help", channels=("whatsapp",))
+def whatsapp_help(cmd):
+    if cmd.args:
+        return None
+    return Reply(
+        "Help — commands:\n"
+        "notices [source]\nfaq\nfaq <n>\nalert add <keyword> [whatsapp] [source]\nmyalerts\ndelalert <id>\n"
+    )
+
+
+@command(*TELEGRAM_GREETINGS, channels=("telegram",))
+def telegram_greeting(cmd):
+    if cmd.args:
+        return None
+    return Reply(
+        "👋 Hello! I am the Campus Info Chatbot.\n\n"
+        "Commands:\n"
+        "• faq\n"
+        "• notices\n"
+        "• notices ptu\n"
+        "• notices gndec\n"
+        "• alert add <keyword> [source]\n"
+        "• myalerts\n"
+        "• delalert <id>\n"
+    )
+
+
+@command("start", channels=("telegram_bot",))
+def telegram_bot_start(cmd):
+    return Reply(
+        "👋 Hello! I'm the Campus Info Chatbot.\n"
+        "Commands:\n"
+        "/notices - latest notices\n"
+        "/notices ptu | gndec - filter\n"
+        "/faq - browse FAQs\n\n"
+        "Alert commands:\n"
+        "/alert_add <keyword> <channel> <source?>\n"
+        "/myalerts\n"
+        "/delalert <id>"
+    )
+
+
+# ---------------- Notices ----------------
+# notices        -> 2 per source (grouped)
+# notices ptu    -> 5 PTU
+# notices gndec  -> 5 GNDEC
+@command("notices")
+def notices(cmd):
+    if cmd.channel == "whatsapp":
+        source = cmd.args[0].upper() if cmd.args else None
+        try:
+            return Reply(render_notices("whatsapp", source))
+        except Exception as e:
+            print("❌ NOTICES ERROR:", e)
+            return Reply("⚠️ Error fetching notices. Please try again later.")
+
+    if cmd.channel == "telegram":
+        source = cmd.args[0].upper() if len(cmd.args) == 1 else None
+        try:
+            return Reply(render_notices("telegram", source))
+        except Exception as e:
+            print("Telegram notices error:", e)
+            return Reply("⚠️ Error fetching notices. Please try again later.")
+
+    try:
+        source = cmd.args[0].strip().upper() if cmd.args else None
+        msg = render_notices("telegram_html", source)
+        if msg.startswith("No notices found"):
+            return Reply(msg)
+        return Reply(msg, parse_mode="HTML", disable_preview=True)
+    except Exception as e:
+        return Reply(f"Error: {e}")
+
+
+# ---------------- FAQ ----------------
+@command("faq", channels=("whatsapp",))
+def whatsapp_faq(cmd):
+    if not cmd.args:
+        data = top_faqs()
+        if not data:
+            return Reply("No FAQs available yet.")
+        reply = "💬 Top FAQs:\n\n"
+        for i, row in enumerate(data, 1):
+            reply += f"{i}. {row['question']}\n"
+        reply += "\nType 'faq 1' or 'faq 2' to see the answer."
+        return Reply(reply)
+
+    try:
+        if len(cmd.args) == 1 and cmd.args[0].isdigit():
+            num = int(cmd.args[0])
+            data = top_faqs()
+            if data and 1 <= num <= len(data):
+                q = data[num - 1]["question"]
+                a = data[num - 1]["answer"]
+                return Reply(f"❓ {q}\n\n✅ {a}")
+            return Reply("⚠️ Invalid FAQ number. Type 'faq' to see the list again.")
+        return Reply("⚠️ Please type like 'faq 1' or 'faq 2'.")
+    except Exception as e:
+        print("Error in faq specific handler:", e)
+        return Reply("⚠️ Error fetching FAQ. Try again later.")
+
+
+@command("faq", channels=("telegram", "telegram_bot"))
+def telegram_faq(cmd):
+    if cmd.args and cmd.channel == "telegram":
+        return None
+    cats = faq_categories()
+    if not cats:
+        return Reply("No FAQ categories available." if cmd.channel == "telegram" else "No FAQ categories.")
+    return Reply("📚 Choose a category:", buttons=category_buttons(cats))
+
+
+@callback("cat", channels=("telegram", "telegram_bot"))
+def faq_category(cmd):
+    qs = faq_questions(int(cmd.args[0]))
+    if not qs:
+        return Reply("No questions in this category." if cmd.channel == "telegram" else "No questions.")
+    buttons = [[(q["question"][:40], f"faq_{q['id']}")] for q in qs]
+    buttons.append([("🔙 Back", "faq_back")])
+    return Reply("📝 Select a question:", buttons=buttons)
+
+
+@callback("faq", channels=("telegram", "telegram_bot"))
+def faq_answer(cmd):
+    q = faq_by_id(int(cmd.args[0]))
+    if not q:
+        return Reply("Answer not found.")
+    buttons = [[("🔙 Back", f"cat_{q['category_id']}")]]
+    if cmd.channel == "telegram_bot":
+        return Reply(f"*{q['question']}*\n\n{q['answer']}", buttons=buttons, parse_mode="Markdown")
+    return Reply(f"❓ {q['question']}\n\n✅ {q['answer']}", buttons=buttons)
+
+
+@callback("faq_back", channels=("telegram", "telegram_bot"))
+def faq_back(cmd):
+    return Reply("📚 Choose a category:", buttons=category_buttons(faq_categories()))
+
+
+# ---------------- Alerts ----------------
+# Examples:
+#   alert add admit_card whatsapp
+#   alert add admit card whatsapp GNDEC
+#   alert add admit_card (default channel=whatsapp)
+@command("alert add", channels=("whatsapp",))
+def whatsapp_alert_add(cmd):
+    try:
+        # parts preserves the original tokens, parts_lower is for parsing control words
+        partsR = cmd.parts
+        partsL = cmd.parts_lower
+
+        # Need at least 3 tokens: ['alert', 'add', '<keyword>']
+        if len(partsL) < 3:
+            return Reply("Usage: alert add <keyword> [whatsapp] [source]\nExample: alert add admit_card whatsapp GNDEC")
+
+        # keyword may be multiple tokens until we hit the channel token (whatsapp) or the end;
+        # a token after 'whatsapp' is the source
+        source = None
+        if 'whatsapp' in partsL:
+            idx = partsL.index('whatsapp')
+            keyword_tokens = partsR[2:idx]
+            if len(partsR) > idx + 1:
+                source = partsR[idx + 1].strip()
+        else:
+            keyword_tokens = partsR[2:]
+
+        keyword = " ".join(keyword_tokens).strip()
+        if not keyword:
+            return Reply("Invalid keyword. Usage: alert add <keyword> [whatsapp] [source]")
+
+        run_query(
+            "INSERT INTO alerts (user_identifier, channel, keyword, source) VALUES (%s,%s,%s,%s)",
+            (cmd.user, "whatsapp", keyword, source)
+        )
+        return Reply("✅ Alert saved. I'll notify you on this WhatsApp when relevant notices appear.")
+    except Exception as e:
+        print("Error inserting alert via WhatsApp:", e)
+        return Reply(f"⚠️ Error saving alert: {e}")
+
+
+@command("alert add", channels=("telegram",))
+def telegram_alert_add(cmd):
+    parts = cmd.parts_lower
+    if len(parts) < 3:
+        return Reply("Usage:\nalert add <keyword> [source]\nExample:\nalert add admit_card GNDEC")
+
+    keyword = parts[2]
+    source = parts[3].upper() if len(parts) >= 4 else None
+    try:
+        run_query(
+            """
+            INSERT INTO alerts (user_identifier, channel, keyword, source, frequency)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (cmd.user, "telegram", keyword, source, "immediate")
+        )
+        return Reply(f"✅ Alert created!\nKeyword: {keyword}\nSource: {source or 'ANY'}")
+    except Exception as e:
+        print("Telegram alert add error:", e)
+        return Reply("⚠️ Failed to create alert.")
+
+
+@command("alert_add", channels=("telegram_bot",))
+def telegram_bot_alert_add(cmd):
+    args = cmd.args
+    if len(args) < 2:
+        return Reply("Usage: /alert_add <keyword> <channel> <source?>")
+
+    keyword = args[0]
+    channel = args[1].lower()
+    source = args[2].upper() if len(args) >= 3 else None
+
+    if channel not in ("telegram", "whatsapp"):
+        return Reply("Channel must be telegram OR whatsapp.")
+
+    try:
+        run_query(
+            "INSERT INTO alerts (user_identifier, channel, keyword, source) VALUES (%s,%s,%s,%s)",
+            (cmd.user, channel, keyword, source)
+        )
+        return Reply("✅ Alert created!")
+    except Exception as e:
+        return Reply(f"Error: {e}")
+
+
+@command("myalerts")
+def myalerts(cmd):
+    if cmd.channel == "telegram":
+        if cmd.args:
+            return None
+        rows = run_query(
+            """
+            SELECT id, keyword, source
+            FROM alerts
+            WHERE user_identifier=%s AND channel='telegram'
+            """,
+            (cmd.user,), fetch=True
+        ) or []
+        if not rows:
+            return Reply("You have no alerts.")
+        reply = "🔔 Your Alerts:\n\n"
+        buttons = []
+        for r in rows:
+            reply += f"ID {r['id']} — '{r['keyword']}' ({r['source'] or 'ANY'})\n"
+            buttons.append([(f"❌ Delete {r['id']}", f"delalert_{r['id']}")])
+        return Reply(reply, buttons=buttons)
+
+    try:
+        rows = run_query(
+            "SELECT id, keyword, channel, source, frequency, active FROM alerts WHERE user_identifier=%s",
+            (cmd.user,), fetch=True
+        ) or []
+    except Exception as e:
+        print("Error fetching myalerts:", e)
+        return Reply("⚠️ Error fetching your alerts. Try again later.")
+
+    if cmd.channel == "whatsapp":
+        if not rows:
+            return Reply("You have no alerts set up. Use 'alert add <keyword> whatsapp' to create one.")
+        reply = "🔔 Your Alerts:\n\n"
+        for r in rows:
+            reply += (f"ID {r.get('id')} — [{r.get('channel') or '—'}] '{r.get('keyword') or '—'}' "
+                      f"from {r.get('source') or 'ANY'} ({r.get('frequency') or 'immediate'})\n")
+        reply += "\nTo delete an alert, send: delalert <id>\nExample: delalert 3"
+        return Reply(reply)
+
+    # telegram_bot: plain text (no markdown or html) to avoid "Can't parse entities"
+    if not rows:
+        return Reply("No alerts yet.")
+    lines = ["🔔 Your Alerts:\n"]
+    buttons = []
+    for r in rows:
+        rid = r["id"]
+        lines.append(f"ID {rid} — [{r.get('channel') or '—'}] '{r.get('keyword') or '—'}' "
+                     f"from {r.get('source') or 'ANY'} ({r.get('frequency') or 'immediate'})")
+        buttons.append([(f"Delete {rid}", f"del_{rid}")])
+    return Reply("\n".join(lines), buttons=buttons)
+
+
+@command("delalert", channels=("whatsapp",))
+def whatsapp_delalert(cmd):
+    if not cmd.args:
+        return Reply("Usage: delalert <id>\nExample: delalert 3")
+    try:
+        aid = int(cmd.args[0])
+    except Exception:
+        return Reply("Invalid id. It must be a number. Example: delalert 3")
+
+    try:
+        # verify ownership
+        owner = run_query("SELECT id FROM alerts WHERE id=%s AND user_identifier=%s", (aid, cmd.user), fetch=True)
+        if not owner:
+            return Reply("Alert not found or you don't have permission to delete it.")
+        run_query("DELETE FROM alerts WHERE id=%s", (aid,))
+        return Reply(f"✅ Deleted alert {aid}.")
+    except Exception as e:
+        print("Error deleting alert via WhatsApp:", e)
+        return Reply("⚠️ Error deleting alert. Try again later.")
+
+
+@command("delalert", channels=("telegram_bot",))
+def telegram_bot_delalert(cmd):
+    if not cmd.args:
+        return Reply("Usage: /delalert <id>")
+    try:
+        aid = int(cmd.args[0])
+    except ValueError:
+        return Reply("Invalid ID.")
+    run_query("DELETE FROM alerts WHERE id=%s AND user_identifier=%s", (aid, cmd.user))
+    return Reply(f"Deleted alert {aid}.")
+
+
+@callback("delalert", channels=("telegram",))
+def telegram_delalert_button(cmd):
+    alert_id = int(cmd.args[0])
+    try:
+        run_query(
+            """
+            DELETE FROM alerts
+            WHERE id=%s AND user_identifier=%s AND channel='telegram'
+            """,
+            (alert_id, cmd.user)
+        )
+        return Reply(f"✅ Alert {alert_id} deleted.")
+    except Exception as e:
+        print("Telegram alert delete error:", e)
+        return Reply("⚠️ Failed to delete alert.")
+
+
+@callback("del", channels=("telegram_bot",))
+def telegram_bot_delalert_button(cmd):
+    try:
+        aid = int(cmd.args[0])
+    except (IndexError, ValueError):
+        return Reply("Error.")
+    run_query("DELETE FROM alerts WHERE id=%s AND user_identifier=%s", (aid, cmd.user))
+    return Reply(f"Deleted alert {aid}.")
@@ -1,11 +1,27 @@
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, InterfaceError, OperationalError
 from dotenv import load_dotenv
+from contextlib import contextmanager
+import hashlib
 import os
+import queue
+import threading
+import time
+
+from modules import metrics, query_profiler
 
 # Load environment variables
 load_dotenv()
 
+# ---------------- Pool config ----------------
+# Every run_query used to open a fresh TCP + TLS + auth handshake to Aiven.
+# Connections are now kept in a small process-wide pool and reused.
+POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", 5))                        # max open connections per process
+POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", 10))               # seconds to wait for a free connection
+POOL_MAX_LIFETIME = float(os.getenv("MYSQL_POOL_MAX_LIFETIME", 1800))   # recycle connections older than this
+POOL_PING_AFTER = float(os.getenv("MYSQL_POOL_PING_AFTER", 30))         # ping connections idle longer than this
+
+
 def get_connection():
     """Connect to MySQL database (Aiven / Cloud compatible)"""
     try:
@@ -23,12 +39,189 @@ def get_connection():
         return None
 
 
+class _PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool around get_connection().
+    - borrows the most recently used connection first (LIFO keeps few sockets warm)
+    - pings connections that sat idle for POOL_PING_AFTER seconds before handing them out
+    - closes and replaces connections older than POOL_MAX_LIFETIME
+    - remembers the pid it was created in, so a forked gunicorn worker never
+      shares sockets with its parent
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 max_lifetime=POOL_MAX_LIFETIME, ping_after=POOL_PING_AFTER):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self.pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _expired(self, pooled):
+        return self.max_lifetime and time.monotonic() - pooled.created_at > self.max_lifetime
+
+    def _healthy(self, pooled):
+        if time.monotonic() - pooled.last_used < self.ping_after:
+            return True
+        try:
+            pooled.connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(pooled):
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Return a _PooledConnection, or None if MySQL is unreachable / pool is exhausted."""
+        if not self._slots.acquire(timeout=self.timeout):
+            print("❌ MySQL pool exhausted (size=%d)" % self.size)
+            return None
+
+        try:
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._expired(pooled) or not self._healthy(pooled):
+                    self._close(pooled)
+                    continue
+                return pooled
+
+            connection = get_connection()
+            if connection:
+                return _PooledConnection(connection)
+        except Exception as e:
+            print("❌ MySQL pool acquire error:", e)
+
+        self._slots.release()
+        return None
+
+    def release(self, pooled, broken=False):
+        """Give a connection back. Broken or expired connections are closed instead."""
+        try:
+            if os.getpid() != self.pid:
+                # borrowed before a fork; the socket belongs to the parent
+                return
+            if broken or self._expired(pooled):
+                self._close(pooled)
+                return
+            pooled.last_used = time.monotonic()
+            self._idle.put(pooled)
+        finally:
+            if os.getpid() == self.pid:
+                self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, created lazily and re-created after a fork."""
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            # after fork: drop the parent's pool without closing its sockets
+            _pool = ConnectionPool()
+        return _pool
+
+
+def close_pool():
+    """Close idle pooled connections (e.g. on shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close_all()
+        _pool = None
+
+
+def _reset_pool_after_fork():
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a connection from the pool:
+        with pooled_connection() as connection:
+            ...
+    Yields None when MySQL is unreachable.
+    """
+    pool = get_pool()
+    pooled = pool.acquire()
+    if not pooled:
+        yield None
+        return
+
+    broken = False
+    try:
+        yield pooled.connection
+    except (InterfaceError, OperationalError):
+        broken = True
+        raise
+    finally:
+        pool.release(pooled, broken=broken)
+
+
+def observe_query(query, start, ok):
+    """
+    Latency (and failure) per statement fingerprint, see modules/metrics.py;
+    also the hook for the opt-in per-request profiler (modules/query_profiler.py).
+    """
+    seconds = time.perf_counter() - start
+    statement = metrics.sql_fingerprint(query)
+    metrics.db_query_latency.observe(seconds, statement)
+    if not ok:
+        metrics.db_query_errors.inc(statement)
+    query_profiler.record(statement, seconds, ok)
+
+
 def run_query(query, params=None, fetch=False):
     """Execute SQL query safely."""
-    connection = get_connection()
-    if not connection:
+    start = time.perf_counter()
+    pool = get_pool()
+    pooled = pool.acquire()
+    if not pooled:
+        observe_query(query, start, False)
         return None
 
+    connection = pooled.connection
+    cursor = None
+    broken = False
+    ok = False
     try:
         cursor = connection.cursor(dictionary=True, buffered=True)
         cursor.execute(query, params or ())
@@ -38,17 +231,175 @@ def run_query(query, params=None, fetch=False):
             result = cursor.fetchall()
 
         connection.commit()
+        ok = True
         return result
 
     except Error as e:
         print("❌ Query execution failed:", e)
+        # connection-level failures must not go back into the pool
+        broken = isinstance(e, (InterfaceError, OperationalError))
+        if not broken:
+            try:
+                connection.rollback()
+            except Exception:
+                broken = True
+        return None
+
+    finally:
+        try:
+            if cursor:
+                cursor.close()
+        except:
+            pass
+        pool.release(pooled, broken=broken)
+        observe_query(query, start, ok)
+
+
+def run_many(query, seq_params):
+    """
+    Execute one statement for many parameter tuples (cursor.executemany).
+    For INSERT ... VALUES statements the connector sends a single multi-row INSERT.
+    Returns affected row count, or None on failure.
+    """
+    seq_params = list(seq_params)
+    if not seq_params:
+        return 0
+
+    start = time.perf_counter()
+    pool = get_pool()
+    pooled = pool.acquire()
+    if not pooled:
+        observe_query(query, start, False)
+        return None
+
+    connection = pooled.connection
+    cursor = None
+    broken = False
+    ok = False
+    try:
+        cursor = connection.cursor()
+        cursor.executemany(query, seq_params)
+        connection.commit()
+        ok = True
+        return cursor.rowcount
+
+    except Error as e:
+        print("❌ Bulk query failed:", e)
+        broken = isinstance(e, (InterfaceError, OperationalError))
+        if not broken:
+            try:
+                connection.rollback()
+            except Exception:
+                broken = True
         return None
 
     finally:
         try:
             if cursor:
                 cursor.close()
-            if connection.is_connected():
-                connection.close()
         except:
             pass
+        pool.release(pooled, broken=broken)
+        observe_query(query, start, ok)
+
+
+# ---------------- Notices bulk ingest ----------------
+def _in_list(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def link_hash(link):
+    """notices.link_hash: hex SHA-256 of the link, same as MySQL SHA2(link, 256) on a utf8mb4 column."""
+    return hashlib.sha256(link.encode("utf-8")).hexdigest()
+
+
+def existing_notice_keys(links, titles):
+    """One query: which of these links / titles are already in notices. Returns a set of both."""
+    links, titles = list(dict.fromkeys(links)), list(dict.fromkeys(titles))
+    if not links and not titles:
+        return set()
+    clauses, params = [], []
+    if links:
+        clauses.append(f"link_hash IN ({_in_list(links)})")
+        params.extend(link_hash(link) for link in links)
+    if titles:
+        clauses.append(f"title IN ({_in_list(titles)})")
+        params.extend(titles)
+    rows = run_query(
+        f"SELECT link, title FROM notices WHERE {' OR '.join(clauses)}",
+        tuple(params), fetch=True
+    )
+    if rows is None:
+        raise RuntimeError("notices lookup failed")
+    found = set()
+    for r in rows:
+        found.add(r.get("link"))
+        found.add(r.get("title"))
+    return found
+
+
+def filter_new_notices(rows):
+    """
+    Drop rows whose link or title already exists (in the DB or earlier in `rows`).
+    rows: dicts with at least title, link.
+    """
+    existing = existing_notice_keys([r["link"] for r in rows], [r["title"] for r in rows])
+    fresh = []
+    for r in rows:
+        if r["link"] in existing or r["title"] in existing:
+            continue
+        existing.update((r["link"], r["title"]))
+        fresh.append(r)
+    return fresh
+
+
+def insert_notices(rows):
+    """
+    Insert rows (dicts with title, link, date, source) and return the ones
+    this call inserted, with their generated ids.
+    The unique key on notices.link_hash (see modules.migrations) makes concurrent
+    scraper runs safe: a link inserted by another run is ignored here. Each row
+    is its own INSERT IGNORE (one connection, one transaction), so rowcount and
+    lastrowid say exactly which rows were ours: a notice another run inserted
+    first is never reported (and alerted) twice, whatever the auto-increment
+    lock mode. rows have already been through filter_new_notices, so this is a
+    handful of statements per scrape.
+    Raises when nothing could be written (no connection, or any MySQL error),
+    so scrapers return before committing scrape_state and retry next run.
+    """
+    if not rows:
+        return []
+    insert_sql = ("INSERT IGNORE INTO notices (title, link, link_hash, date, source) "
+                  "VALUES (%s, %s, %s, %s, %s)")
+    start = time.perf_counter()
+    inserted = []
+    with pooled_connection() as connection:
+        if not connection:
+            observe_query(insert_sql, start, False)
+            raise RuntimeError("notices insert failed: no database connection")
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        try:
+            for r in rows:
+                start = time.perf_counter()
+                cursor.execute(insert_sql, (r["title"], r["link"], link_hash(r["link"]), r["date"], r["source"]))
+                observe_query(insert_sql, start, True)
+                if cursor.rowcount == 1:
+                    inserted.append(dict(r, id=cursor.lastrowid))
+            connection.commit()
+        except Error as e:
+            print("❌ Bulk notice insert failed:", e)
+            observe_query(insert_sql, start, False)
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            cursor.close()
+
+    return inserted
+
+
+def ingest_notices(rows):
+    """Bulk dedupe + insert. Returns the newly inserted rows (with ids), ready for alerts.notify_batch."""
+    return insert_notices(filter_new_notices(rows))
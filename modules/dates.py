@@ -0,0 +1,96 @@
+# modules/dates.py
+"""
+Date extraction shared by the PTU and GNDEC scrapers.
+- one precompiled alternation finds, left to right, the first of:
+    28/11/2025, 28-11-2025       (day first, numeric)
+    2025-11-28, 2025/11/28       (ISO; also the start of 2025-11-28T10:00:00)
+    28 November 2025, 28 Nov 2025
+    November 28, 2025, Nov 28 2025
+- every branch starts at the same leading digit, so the regex engine only
+  does real work where the text has digits (page text is mostly words)
+- month names resolve through a lookup table and days are range-checked with
+  calendar.monthrange: no strptime, no exception-driven control flow
+- a candidate that is not a real date (31-02-2025, 12 Sessions 2025) is
+  skipped and the scan resumes one character later
+- results for short strings (table cells, attributes) are memoized; long
+  strings (whole-page text) are scanned without being cached
+"""
+import os
+import re
+from calendar import monthrange
+from datetime import date
+from functools import lru_cache
+
+MEMO_SIZE = int(os.getenv("DATE_MEMO_SIZE", 8192))
+MEMO_MAX_LEN = 256   # longer inputs are page text: scanned, never cached
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+DIGITS = "0123456789"
+
+# `lead` is the first digit of the day (or year); the branch groups hold the rest
+DATE_PATTERN = re.compile(
+    r"""
+    (?P<lead>[0-9])(?:
+        (?P<dmy_d>[0-9]?)[/-](?P<dmy_m>[0-9]{1,2})[/-](?P<dmy_y>[0-9]{4})
+      | (?P<ymd_y>[0-9]{3})[/-](?P<ymd_m>[0-9]{1,2})[/-](?P<ymd_d>[0-9]{1,2})
+      | (?P<dny_d>[0-9]?)\s+(?P<dny_n>[A-Za-z]{3,9})\.?\s+(?P<dny_y>[0-9]{4})
+      | (?P<nd_d>[0-9]?)(?:,\s*|\s+)(?P<nd_y>[0-9]{4})
+    )(?![0-9])
+    """,
+    re.VERBOSE,
+)
+# month name in front of a "28, 2025" match (the "November 28, 2025" form)
+MONTH_BEFORE = re.compile(r"(?<![A-Za-z])([A-Za-z]{3,9})\.?\s+$")
+
+
+def _valid(year, month, day):
+    if month and 1 <= month <= 12 and year >= 1 and 1 <= day <= monthrange(year, month)[1]:
+        return date(year, month, day)
+    return None
+
+
+def _to_date(m, text):
+    """Date for one regex match, or None when it is not a real date."""
+    start = m.start()
+    if start and text[start - 1] in DIGITS:
+        return None  # tail of a longer number (129-11-2025)
+    lead, branch = m.group("lead"), m.lastgroup
+    if branch == "dmy_y":
+        return _valid(int(m["dmy_y"]), int(m["dmy_m"]), int(lead + m["dmy_d"]))
+    if branch == "ymd_d":
+        return _valid(int(lead + m["ymd_y"]), int(m["ymd_m"]), int(m["ymd_d"]))
+    if branch == "dny_y":
+        return _valid(int(m["dny_y"]), MONTHS.get(m["dny_n"].lower()), int(lead + m["dny_d"]))
+    name = MONTH_BEFORE.search(text, max(0, start - 16), start)
+    if name:
+        return _valid(int(m["nd_y"]), MONTHS.get(name.group(1).lower()), int(lead + m["nd_d"]))
+    return None
+
+
+def _scan(text):
+    pos = 0
+    while True:
+        m = DATE_PATTERN.search(text, pos)
+        if m is None:
+            return None
+        found = _to_date(m, text)
+        if found:
+            return found
+        pos = m.start() + 1
+
+
+_memo = lru_cache(maxsize=MEMO_SIZE)(_scan)
+
+
+def extract_date(text):
+    """First real date in text as a datetime.date, or None."""
+    if not text:
+        return None
+    if len(text) > MEMO_MAX_LEN:
+        return _scan(text)
+    return _memo(text)
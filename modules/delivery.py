@@ -0,0 +1,161 @@
+# modules/delivery.py
+"""
+Send primitives for alert delivery, used by the outbox workers
+(modules/outbox.py) and re-exported by modules/alerts.py.
+- deliver_whatsapp / deliver_telegram return True/False and raise RetryLater
+  when the provider rate-limits (HTTP 429 + Retry-After)
+- send_whatsapp / send_telegram are the fire-and-forget variants
+- mark_sent_many records delivered (alert_id, notice_id) pairs in alerts_sent
+Depends only on the database and HTTP client layers, never on alerts.py or
+outbox.py, so those two can import it without importing each other.
+"""
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Tuple
+
+from dotenv import load_dotenv
+
+from modules import metrics
+from modules.database import run_many
+from modules.telegram_client import get_client, TelegramRetryAfter
+
+load_dotenv()
+
+# Twilio
+TWILIO_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER")
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE")  # override https://api.twilio.com (benchmarks/fakes.py)
+
+# Telegram
+TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+
+# Lazy imports to avoid import-time errors if not configured
+_twilio_client = None
+
+def _get_twilio_client():
+    global _twilio_client
+    if _twilio_client is None:
+        try:
+            if TWILIO_SID and TWILIO_TOKEN:
+                from twilio.rest import Client
+                client = Client(TWILIO_SID, TWILIO_TOKEN)
+                if TWILIO_API_BASE:
+                    client.api.base_url = TWILIO_API_BASE
+                _twilio_client = client
+        except Exception as e:
+            print("Twilio init error:", e)
+    return _twilio_client
+
+def _get_telegram_client():
+    # keep-alive Bot API session; 429s are not slept through here, the outbox reschedules them
+    if not TELEGRAM_TOKEN:
+        return None
+    return get_client(TELEGRAM_TOKEN, max_inline_wait=0)
+
+# ---------------- alerts_sent ----------------
+def mark_sent_many(pairs: Iterable[Tuple[int, int]]):
+    """Record many (alert_id, notice_id) pairs with one multi-row INSERT (duplicates ignored)."""
+    try:
+        run_many(
+            "INSERT IGNORE INTO alerts_sent (alert_id, notice_id) VALUES (%s, %s)",
+            [(int(a), int(n)) for a, n in pairs],
+        )
+    except Exception as e:
+        print("mark_sent_many error:", e)
+
+
+# ---------------- Delivery functions ----------------
+RATE_LIMIT_DEFAULT_WAIT = 30  # seconds, when a 429 carries no Retry-After
+
+class RetryLater(Exception):
+    """Provider asked us to slow down; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: float, message: str = ""):
+        super().__init__(message or f"retry after {retry_after}s")
+        self.retry_after = float(retry_after)
+
+def retry_after_seconds(headers, default: float = RATE_LIMIT_DEFAULT_WAIT) -> float:
+    """Retry-After header (delta-seconds or HTTP-date) in seconds; `default` when absent or unparsable."""
+    value = (headers or {}).get("Retry-After") or (headers or {}).get("retry-after")
+    if not value:
+        return default
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def _twilio_retry_after(error, client) -> float:
+    """Retry-After of a Twilio 429: from the exception's response when it carries one, else the client's last response."""
+    for source in (error, getattr(error, "response", None),
+                   getattr(getattr(client, "http_client", None), "last_response", None)):
+        headers = getattr(source, "headers", None)
+        if headers:
+            return retry_after_seconds(headers)
+    return RATE_LIMIT_DEFAULT_WAIT
+
+def deliver_whatsapp(to_number: str, text: str) -> bool:
+    """
+    to_number must be in Twilio WhatsApp format: whatsapp:+91XXXXXXXXXX
+    Returns True/False; raises RetryLater when Twilio rate-limits us (HTTP 429).
+    """
+    client = _get_twilio_client()
+    if not client or not TWILIO_WHATSAPP_NUMBER:
+        print("Twilio not configured properly.")
+        return False
+    start = time.perf_counter()
+    try:
+        client.messages.create(
+            body=text,
+            from_=TWILIO_WHATSAPP_NUMBER,
+            to=to_number
+        )
+        return True
+    except Exception as e:
+        metrics.outbound_errors.inc("twilio", "messages.create")
+        if getattr(e, "status", None) == 429:
+            raise RetryLater(_twilio_retry_after(e, client), str(e))
+        print("WhatsApp send failed:", e)
+        return False
+    finally:
+        metrics.outbound_latency.observe(time.perf_counter() - start, "twilio", "messages.create")
+
+def deliver_telegram(chat_id: str, text: str) -> bool:
+    """Returns True/False; raises RetryLater when Telegram answers 429 (retry_after)."""
+    client = _get_telegram_client()
+    if not client:
+        print("Telegram bot not configured.")
+        return False
+    try:
+        client.send_message(chat_id, text)
+        return True
+    except TelegramRetryAfter as e:
+        raise RetryLater(e.retry_after, str(e))
+    except Exception as e:
+        print("Telegram send failed:", e)
+        return False
+
+def send_whatsapp(to_number: str, text: str) -> bool:
+    """
+    to_number must be in Twilio WhatsApp format: whatsapp:+91XXXXXXXXXX
+    """
+    try:
+        return deliver_whatsapp(to_number, text)
+    except RetryLater as e:
+        print("WhatsApp send failed:", e)
+        return False
+
+def send_telegram(chat_id: str, text: str) -> bool:
+    try:
+        return deliver_telegram(chat_id, text)
+    except RetryLater as e:
+        print("Telegram send failed:", e)
+        return False
@@ -0,0 +1,205 @@
+# modules/faq_index.py
+"""
+In-process BM25 index over faqs.question / faqs.answer.
+- Chat entry points call best_answer() before falling back to Gemini
+- Question text counts QUESTION_WEIGHT times, answer text once
+- A hit must clear both FAQ_MIN_SCORE and FAQ_MIN_COVERAGE (share of the
+  query's terms found in the FAQ question), otherwise we fall through to AI
+- refresh() compares a (COUNT, MAX(id), content checksum) signature with the
+  table: rows that were only appended are added incrementally, edits and
+  deletes trigger a full reload; /add_faq calls it right after inserting,
+  other processes poll every FAQ_INDEX_REFRESH seconds (a failed load is
+  retried on the next call, not after the full interval)
+"""
+import heapq
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from modules.database import run_query
+from modules.response_cache import normalize_question
+
+FAQ_MIN_SCORE = float(os.getenv("FAQ_MIN_SCORE", 3.0))
+FAQ_MIN_COVERAGE = float(os.getenv("FAQ_MIN_COVERAGE", 0.6))
+FAQ_INDEX_REFRESH = float(os.getenv("FAQ_INDEX_REFRESH", 300))  # seconds
+
+# per-row content checksum: an edited question / answer changes the table's SUM
+ROW_CHECKSUM = "CRC32(CONCAT_WS(CHAR(31), question, answer))"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+QUESTION_WEIGHT = 2
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "for",
+    "and", "or", "at", "by", "with", "from", "as", "it", "this", "that", "do", "does",
+    "did", "i", "me", "my", "we", "our", "you", "your", "can", "could", "will", "would",
+    "what", "when", "where", "which", "who", "how", "please", "tell", "about", "there",
+    "any", "hai", "kya", "ka", "ki", "ke", "se",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for t in normalize_question(text).split():
+        if t in STOPWORDS:
+            continue
+        if len(t) > 3 and t.endswith("s") and not t.endswith("ss"):
+            t = t[:-1]  # crude plural folding: dates -> date, fees -> fee
+        tokens.append(t)
+    return tokens
+
+
+class FaqIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {faq_id: weighted tf}
+        self.doc_len: Dict[int, int] = {}
+        self.doc_terms: Dict[int, set] = {}
+        self.question_terms: Dict[int, set] = {}
+        self.docs: Dict[int, Dict] = {}
+        self.total_len = 0
+        self._norms = None  # per-doc BM25 length normalisation, recomputed after changes
+        self.max_id = 0
+        self.last_refresh = 0.0
+        self._signature = None  # (count, max_id, checksum) of the rows indexed
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, faq_id: int, question: str, answer: str):
+        faq_id = int(faq_id)
+        q_terms = tokenize(question)
+        terms = q_terms * QUESTION_WEIGHT + tokenize(answer)
+        with self._lock:
+            if faq_id in self.docs:
+                self.remove(faq_id)
+            tf: Dict[str, int] = {}
+            for t in terms:
+                tf[t] = tf.get(t, 0) + 1
+            for t, n in tf.items():
+                self.postings.setdefault(t, {})[faq_id] = n
+            self.doc_len[faq_id] = len(terms)
+            self.doc_terms[faq_id] = set(tf)
+            self.question_terms[faq_id] = set(q_terms)
+            self.docs[faq_id] = {"id": faq_id, "question": question, "answer": answer}
+            self.total_len += len(terms)
+            self._norms = None
+            self.max_id = max(self.max_id, faq_id)
+
+    def remove(self, faq_id: int):
+        with self._lock:
+            if faq_id not in self.docs:
+                return
+            for t in self.doc_terms.pop(faq_id, ()):
+                plist = self.postings.get(t)
+                if plist is not None:
+                    plist.pop(faq_id, None)
+                    if not plist:
+                        del self.postings[t]
+            self.total_len -= self.doc_len.pop(faq_id, 0)
+            self.question_terms.pop(faq_id, None)
+            self.docs.pop(faq_id, None)
+            self._norms = None
+
+    def search(self, query: str, limit: int = 3) -> List[Dict]:
+        """Top BM25 matches: dicts with id, question, answer, score, coverage."""
+        q_terms = list(dict.fromkeys(tokenize(query)))
+        if not q_terms:
+            return []
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            norms = self._norms
+            if norms is None:
+                avgdl = self.total_len / n_docs
+                norms = self._norms = {
+                    d: BM25_K1 * (1 - BM25_B + BM25_B * n / avgdl) for d, n in self.doc_len.items()
+                }
+            scores: Dict[int, float] = {}
+            for t in q_terms:
+                plist = self.postings.get(t)
+                if not plist:
+                    continue
+                idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5)) * (BM25_K1 + 1)
+                for doc_id, tf in plist.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf / (tf + norms[doc_id])
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+            results = []
+            for doc_id, score in best:
+                covered = sum(1 for t in q_terms if t in self.question_terms[doc_id])
+                results.append(dict(self.docs[doc_id], score=score, coverage=covered / len(q_terms)))
+            return results
+
+    def load(self, rows):
+        """Replace the whole index with rows (id, question, answer)."""
+        with self._lock:
+            self.postings, self.doc_len, self.doc_terms = {}, {}, {}
+            self.question_terms, self.docs = {}, {}
+            self.total_len, self.max_id, self._norms = 0, 0, None
+            for r in rows:
+                self.add(r["id"], r.get("question") or "", r.get("answer") or "")
+
+    def refresh(self, force: bool = False):
+        """Bring the index in line with the faqs table (throttled unless force=True)."""
+        now = time.monotonic()
+        if not force and self.last_refresh and now - self.last_refresh < FAQ_INDEX_REFRESH:
+            return
+        sig = run_query(
+            f"SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id, COALESCE(SUM({ROW_CHECKSUM}), 0) AS checksum "
+            "FROM faqs",
+            fetch=True
+        )
+        if not sig:
+            return  # DB error: try again on the next call
+        signature = (int(sig[0]["n"]), int(sig[0]["max_id"]), int(sig[0]["checksum"]))
+
+        with self._lock:
+            if self._signature == signature:
+                self.last_refresh = now
+                return
+
+            if self._signature is not None:
+                old_count, old_max, old_checksum = self._signature
+                new_rows = run_query(
+                    f"SELECT id, question, answer, {ROW_CHECKSUM} AS checksum FROM faqs WHERE id > %s ORDER BY id",
+                    (old_max,), fetch=True
+                )
+                # only appended rows if the old rows still add up to the old checksum
+                if (new_rows is not None and old_count + len(new_rows) == signature[0]
+                        and old_checksum + sum(int(r["checksum"]) for r in new_rows) == signature[2]):
+                    for r in new_rows:
+                        self.add(r["id"], r.get("question") or "", r.get("answer") or "")
+                    self._signature = signature
+                    self.last_refresh = now
+                    return
+
+            rows = run_query("SELECT id, question, answer FROM faqs ORDER BY id", fetch=True)
+            if rows is None:
+                return
+            self.load(rows)
+            self._signature = signature
+            self.last_refresh = now
+
+
+faq_index = FaqIndex()
+
+
+def best_answer(question: str) -> Optional[Dict]:
+    """Return the best FAQ row if we are confident it answers the question, else None."""
+    try:
+        faq_index.refresh()
+        hits = faq_index.search(question, limit=1)
+    except Exception as e:
+        print("FAQ index error:", e)
+        return None
+    if not hits:
+        return None
+    top = hits[0]
+    if top["score"] < FAQ_MIN_SCORE or top["coverage"] < FAQ_MIN_COVERAGE:
+        return None
+    return top
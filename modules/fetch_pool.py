@@ -0,0 +1,77 @@
+# modules/fetch_pool.py
+"""
+Bounded, host-polite thread pool for scraper page fetches.
+- at most PER_HOST_CONCURRENCY requests in flight per host
+- request starts to the same host are spaced by PER_HOST_MIN_INTERVAL seconds
+- replaces the old fixed time.sleep() after every detail-page fetch
+- offline (SCRAPER_OFFLINE_DIR, recorded pages) the per-host limits are skipped
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from modules import recorded_pages
+
+MAX_WORKERS = int(os.getenv("SCRAPER_FETCH_WORKERS", 8))
+PER_HOST_CONCURRENCY = int(os.getenv("SCRAPER_PER_HOST_CONCURRENCY", 3))
+PER_HOST_MIN_INTERVAL = float(os.getenv("SCRAPER_PER_HOST_MIN_INTERVAL", 0.25))  # seconds
+
+
+class HostLimiter:
+    """Per-host concurrency cap + minimum spacing between request starts."""
+
+    def __init__(self, concurrency=PER_HOST_CONCURRENCY, min_interval=PER_HOST_MIN_INTERVAL):
+        self.concurrency = max(1, concurrency)
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = self._semaphores[host] = threading.Semaphore(self.concurrency)
+            return sem
+
+    def _wait_turn(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def call(self, url, fn, *args, **kwargs):
+        host = urlparse(url).netloc.lower()
+        with self._semaphore(host):
+            self._wait_turn(host)
+            return fn(url, *args, **kwargs)
+
+
+# one limiter per process, shared by all scrapers so concurrent runs stay polite together
+limiter = HostLimiter()
+
+
+def polite_map(fn, urls, max_workers=MAX_WORKERS):
+    """
+    Call fn(url) for every url on a bounded pool, respecting per-host limits.
+    Returns {url: result}; a url whose call raised maps to None.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+
+    offline = bool(recorded_pages.OFFLINE_DIR)
+
+    def task(url):
+        try:
+            return fn(url) if offline else limiter.call(url, fn)
+        except Exception as e:
+            print(f"❌ Fetch task failed for {url}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as pool:
+        return dict(zip(urls, pool.map(task, urls)))
@@ -1,18 +1,116 @@
+# modules/gemini_ai.py
+"""
+Shared, lazily created Gemini model for every entry point (app.py,
+async_app.py, telegram_bot.py).
+- google.generativeai costs ~0.7s to import; it is only imported on the first
+  get_model() call, so worker boot / cold starts don't pay for it
+- genai.configure() runs once per process, however many modules ask
+- the model is wrapped so every generate_content call is timed
+  (gemini_request_duration_seconds, see modules/metrics.py)
+Config (env): GEMINI_API_KEY, GEMINI_MODEL (default models/gemini-2.5-flash)
+"""
 import os
-import google.generativeai as genai
+import threading
+import time
+
 from dotenv import load_dotenv
 
+from modules import metrics
+
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini with API key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash")
+GEMINI_FALLBACK_MODEL = "gemini-pro"
+
+
+class TimedModel:
+    """Forwards to the real model; records latency / errors of generate_content(_async)."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def generate_content(self, *args, stream=False, **kwargs):
+        if stream:
+            # timed until the last chunk is consumed
+            return self._timed_stream(args, kwargs)
+        start = time.perf_counter()
+        try:
+            return self.model.generate_content(*args, **kwargs)
+        except Exception:
+            metrics.gemini_errors.inc("generate")
+            raise
+        finally:
+            metrics.gemini_latency.observe(time.perf_counter() - start, "generate")
+
+    def _timed_stream(self, args, kwargs):
+        start = time.perf_counter()
+        try:
+            yield from self.model.generate_content(*args, stream=True, **kwargs)
+        except Exception:
+            metrics.gemini_errors.inc("stream")
+            raise
+        finally:
+            metrics.gemini_latency.observe(time.perf_counter() - start, "stream")
+
+    async def generate_content_async(self, *args, **kwargs):
+        # stream=True: timed until the response starts, chunks are iterated by the caller
+        call = "async_stream" if kwargs.get("stream") else "async"
+        start = time.perf_counter()
+        try:
+            return await self.model.generate_content_async(*args, **kwargs)
+        except Exception:
+            metrics.gemini_errors.inc(call)
+            raise
+        finally:
+            metrics.gemini_latency.observe(time.perf_counter() - start, call)
+
+
+_model = None
+_initialized = False
+_lock = threading.Lock()
+
+
+def get_model():
+    """The shared GenerativeModel, or None if Gemini is not configured / not installed."""
+    global _model, _initialized
+    if _initialized:
+        return _model
+    with _lock:
+        if _initialized:
+            return _model
+        key = os.getenv("GEMINI_API_KEY")
+        if key:
+            try:
+                import google.generativeai as genai
+                genai.configure(api_key=key)
+                try:
+                    _model = TimedModel(genai.GenerativeModel(GEMINI_MODEL))
+                except Exception:
+                    # fallback to generic model name if needed
+                    _model = TimedModel(genai.GenerativeModel(GEMINI_FALLBACK_MODEL))
+            except Exception as e:
+                print("Gemini init error:", e)
+                _model = None
+        _initialized = True
+    return _model
+
+
+def use_model(model):
+    """Replace the shared model (local stand-ins for benchmarks)."""
+    global _model, _initialized
+    with _lock:
+        _model, _initialized = (TimedModel(model) if model else None), True
+
 
 def get_ai_response(user_message: str) -> str:
     try:
-        # Latest model (compatible with v1 API)
-        # model = genai.GenerativeModel(model_name="gemini-1.5-flash")
-        model = genai.GenerativeModel(model_name="gemini-pro")
+        model = get_model()
+        if not model:
+            return "⚠️ AI Error: Gemini is not configured"
 
         # Generate AI content
         response = model.generate_content(user_message)
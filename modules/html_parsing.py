@@ -0,0 +1,41 @@
+# modules/html_parsing.py
+"""
+HTML parser backend for the scrapers.
+- Uses lxml (C parser, several times faster) when installed, html.parser otherwise
+- HTML_PARSER=html.parser|lxml|html5lib forces a backend
+- make_soup(..., only=...) builds just the subtree we need (e.g. only <table>s)
+"""
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+def _available(name):
+    if name == "html.parser":
+        return True
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def pick_parser(preferred=None):
+    """Requested backend if available, else lxml, else the stdlib html.parser."""
+    for name in (preferred, os.getenv("HTML_PARSER"), "lxml", "html.parser"):
+        if name and _available(name):
+            return name
+    return "html.parser"
+
+
+PARSER = pick_parser()
+
+
+def make_soup(html, only=None, parser=None):
+    """
+    Parse html with the configured backend.
+    only: tag name / list of names passed to SoupStrainer, so the tree contains
+    just those elements (and their subtrees) instead of the whole page.
+    """
+    parse_only = SoupStrainer(only) if only else None
+    return BeautifulSoup(html, parser or PARSER, parse_only=parse_only)
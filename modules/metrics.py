@@ -0,0 +1,248 @@
+# modules/metrics.py
+"""
+In-process metrics registry, rendered in the Prometheus text format.
+- Counter / Histogram with labels, no client library needed
+- GET /metrics on app.py and async_app.py; the scheduler (scrapers + outbox
+  delivery) runs in its own process and serves them on SCHEDULER_METRICS_PORT
+- every process (each gunicorn worker too) keeps its own numbers: scrape each
+  worker / process as its own target, or run a single worker
+What is measured (see the metric definitions at the bottom):
+- http_request_duration_seconds        per route / method / status
+- db_query_duration_seconds            per statement fingerprint (+ errors)
+- gemini_request_duration_seconds      per call kind (+ errors)
+- outbound_request_duration_seconds    Telegram / Twilio API calls (+ errors)
+- scraper_run_duration_seconds         per source (+ rows inserted, failures)
+- bot_command_duration_seconds         per channel / command (modules/commands.py)
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(v) for v in labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(items))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self, items):
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def snapshot(self):
+        """{label values: (per-bucket counts, sum, count)}, copied under the lock; last count is +Inf."""
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+
+    def _samples(self, items):
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+# ---------------- Registry ----------------
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(cls, name, documentation, labelnames, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"metric {name} already registered with a different type / labels")
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    return _get_or_create(Counter, name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------- SQL fingerprints ----------------
+_SQL_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SQL_SPACE = re.compile(r"\s+")
+FINGERPRINT_MAX = 120
+
+
+@lru_cache(maxsize=2048)
+def sql_fingerprint(query):
+    """
+    Statement shape used as a label: literals -> ?, placeholder lists -> (...),
+    whitespace collapsed. "SELECT ... WHERE id IN (%s, %s)" and the same query
+    with 50 ids share one fingerprint.
+    """
+    fp = _SQL_SPACE.sub(" ", query).strip()
+    fp = _SQL_STRING.sub("?", fp)
+    fp = _SQL_NUMBER.sub("?", fp)
+    fp = _SQL_IN_LIST.sub("(...)", fp)
+    if len(fp) > FINGERPRINT_MAX:
+        fp = fp[:FINGERPRINT_MAX - 3] + "..."
+    return fp
+
+
+# ---------------- Standalone server (scheduler) ----------------
+def serve(port, host="0.0.0.0"):
+    """Serve GET /metrics from a daemon thread (for processes without a web app)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
+
+
+# ---------------- Metrics ----------------
+http_latency = histogram(
+    "http_request_duration_seconds", "HTTP request latency (time to response headers)",
+    ("route", "method", "status"))
+
+db_query_latency = histogram(
+    "db_query_duration_seconds", "run_query / run_many latency per statement fingerprint",
+    ("statement",))
+db_query_errors = counter(
+    "db_query_errors_total", "Failed run_query / run_many calls (incl. no connection)", ("statement",))
+n_plus_one = counter(
+    "db_n_plus_one_total", "Statements issued in N+1 patterns (modules/query_profiler.py, QUERY_PROFILE=1)",
+    ("profile", "statement"))
+
+gemini_latency = histogram(
+    "gemini_request_duration_seconds", "Gemini generate_content latency",
+    ("call",))
+gemini_errors = counter("gemini_request_errors_total", "Gemini calls that raised", ("call",))
+
+outbound_latency = histogram(
+    "outbound_request_duration_seconds", "Telegram / Twilio API call latency (incl. retries)",
+    ("service", "operation"))
+outbound_errors = counter("outbound_request_errors_total", "Telegram / Twilio API calls that failed",
+                          ("service", "operation"))
+
+scraper_duration = histogram(
+    "scraper_run_duration_seconds", "Scraper run time per source", ("source",),
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+scraper_rows = counter("scraper_rows_inserted_total", "Notices inserted by the scrapers", ("source",))
+scraper_failures = counter("scraper_failures_total", "Scraper runs that raised", ("source",))
+
+command_latency = histogram(
+    "bot_command_duration_seconds", "Bot command handling time (fallback = FAQ index / Gemini)",
+    ("channel", "command"),
+    # most commands are served from the notices / FAQ caches in well under 5 ms
+    buckets=(0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
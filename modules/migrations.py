@@ -0,0 +1,450 @@
+# modules/migrations.py
+"""
+Versioned schema migrations for the bot's MySQL database.
+- applied versions are recorded in schema_migrations; each version runs once
+- every step is idempotent (CREATE TABLE IF NOT EXISTS, "add index if
+  missing", "add column if missing"), so an existing production database
+  whose tables were created by hand is brought up to date, not recreated,
+  and a migration interrupted half way (MySQL DDL auto-commits) can simply
+  be run again
+- a MySQL named lock keeps two migrators (deploy step, `python app.py`,
+  scheduler.py) from running at once
+- `check` runs EXPLAIN on every registered hot query and flags full scans
+
+Use:
+    python -m modules.migrations            # migrate (default); run once per deploy,
+                                            # before starting the gunicorn workers
+    python -m modules.migrations status
+    python -m modules.migrations check
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+from modules.database import link_hash, pooled_connection
+
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1") == "1"   # run pending migrations on `python app.py` / scheduler start
+LOCK_NAME = "campus_bot_schema_migrations"
+LOCK_TIMEOUT = 60  # seconds
+
+
+# ---------------- Step helpers ----------------
+def _exists(cursor, query, params):
+    cursor.execute(query, params)
+    return bool(cursor.fetchall())
+
+
+def index_exists(cursor, table, index_name):
+    return _exists(
+        cursor,
+        "SELECT 1 FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+        (table, index_name),
+    )
+
+
+def column_exists(cursor, table, column):
+    return _exists(
+        cursor,
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1",
+        (table, column),
+    )
+
+
+def sql(statement):
+    """Step: run a statement as is (must be idempotent, e.g. CREATE TABLE IF NOT EXISTS)."""
+    def step(cursor):
+        cursor.execute(statement)
+    step.describe = statement.strip().splitlines()[0]
+    return step
+
+
+def add_index(table, index_name, ddl, dedupe=None):
+    """
+    Step: run `ddl` unless table already has index_name.
+    dedupe: statement run first, for unique keys on tables that may hold duplicates.
+    """
+    def step(cursor):
+        if index_exists(cursor, table, index_name):
+            return
+        if dedupe:
+            cursor.execute(dedupe)
+            if cursor.rowcount:
+                print(f"🧹 Removed {cursor.rowcount} duplicate row(s) from {table} before {index_name}")
+        cursor.execute(ddl)
+    step.describe = f"index {table}.{index_name}"
+    return step
+
+
+def drop_index(table, index_name):
+    """Step: drop index_name if table still has it."""
+    def step(cursor):
+        if index_exists(cursor, table, index_name):
+            cursor.execute(f"ALTER TABLE {table} DROP INDEX {index_name}")
+    step.describe = f"drop index {table}.{index_name}"
+    return step
+
+
+def add_column(table, column, ddl):
+    """Step: run `ddl` unless table already has column."""
+    def step(cursor):
+        if not column_exists(cursor, table, column):
+            cursor.execute(ddl)
+    step.describe = f"column {table}.{column}"
+    return step
+
+
+# ---------------- Migrations ----------------
+# Append new versions at the end; never edit one that has shipped.
+MIGRATIONS = [
+    (1, "base tables", [
+        sql("""
+        CREATE TABLE IF NOT EXISTS notices (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(1000) NOT NULL,
+            link VARCHAR(1000) NOT NULL,
+            date DATE NULL,
+            source VARCHAR(32) NOT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """),
+        sql("""
+        CREATE TABLE IF NOT EXISTS faq_categories (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(191) NOT NULL
+        )
+        """),
+        sql("""
+        CREATE TABLE IF NOT EXISTS faqs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            category_id INT NULL
+        )
+        """),
+        sql("""
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_identifier VARCHAR(191) NOT NULL,
+            channel VARCHAR(20) NOT NULL,
+            keyword VARCHAR(191) NOT NULL,
+            source VARCHAR(32) NULL,
+            frequency VARCHAR(12) NULL DEFAULT 'immediate',
+            active TINYINT(1) NOT NULL DEFAULT 1,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """),
+        sql("""
+        CREATE TABLE IF NOT EXISTS alerts_sent (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            alert_id INT NOT NULL,
+            notice_id INT NOT NULL,
+            sent_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """),
+        sql("""
+        CREATE TABLE IF NOT EXISTS chat_logs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            user_identifier VARCHAR(191) NULL,
+            source VARCHAR(32) NULL,
+            user_message TEXT NULL,
+            bot_reply TEXT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """),
+        # older hand-made alerts tables predate daily digests
+        add_column("alerts", "frequency",
+                   "ALTER TABLE alerts ADD COLUMN frequency VARCHAR(12) NULL DEFAULT 'immediate'"),
+    ]),
+
+    (2, "indexes for hot queries", [
+        # dedupe on scrape + INSERT IGNORE in database.insert_notices
+        add_index("notices", "uq_notices_link",
+                  "ALTER TABLE notices ADD UNIQUE KEY uq_notices_link (link(255))",
+                  dedupe="DELETE n FROM notices n JOIN notices keep "
+                         "ON keep.link = n.link AND keep.id < n.id"),
+        # "... WHERE link IN (...) OR title IN (...)" needs both sides indexed (index merge)
+        add_index("notices", "idx_notices_title",
+                  "ALTER TABLE notices ADD INDEX idx_notices_title (title(255))"),
+        # per-source top-N (modules.notices) and recent notices for the daily digest
+        add_index("notices", "idx_notices_source_date",
+                  "ALTER TABLE notices ADD INDEX idx_notices_source_date (source, date)"),
+        add_index("notices", "idx_notices_date",
+                  "ALTER TABLE notices ADD INDEX idx_notices_date (date)"),
+        add_index("faqs", "idx_faqs_category",
+                  "ALTER TABLE faqs ADD INDEX idx_faqs_category (category_id)"),
+        add_index("alerts", "idx_alerts_user_channel",
+                  "ALTER TABLE alerts ADD INDEX idx_alerts_user_channel (user_identifier, channel)"),
+        add_index("alerts", "idx_alerts_active_frequency",
+                  "ALTER TABLE alerts ADD INDEX idx_alerts_active_frequency (active, frequency)"),
+        # INSERT IGNORE in delivery.mark_sent_many relies on this key
+        add_index("alerts_sent", "uq_alerts_sent_pair",
+                  "ALTER TABLE alerts_sent ADD UNIQUE KEY uq_alerts_sent_pair (alert_id, notice_id)",
+                  dedupe="DELETE s FROM alerts_sent s JOIN alerts_sent keep "
+                         "ON keep.alert_id = s.alert_id AND keep.notice_id = s.notice_id AND keep.id < s.id"),
+        # alerts_sent lookups by notice_id only
+        add_index("alerts_sent", "idx_alerts_sent_notice",
+                  "ALTER TABLE alerts_sent ADD INDEX idx_alerts_sent_notice (notice_id)"),
+        add_index("chat_logs", "idx_chat_logs_user_created",
+                  "ALTER TABLE chat_logs ADD INDEX idx_chat_logs_user_created (user_identifier, created_at)"),
+    ]),
+
+    (3, "alert outbox", [
+        sql("""
+        CREATE TABLE IF NOT EXISTS alert_outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            dedupe_key VARCHAR(191) NOT NULL,
+            channel VARCHAR(20) NOT NULL,
+            recipient VARCHAR(191) NOT NULL,
+            body TEXT NOT NULL,
+            alert_id INT NULL,
+            notice_ids VARCHAR(2000) NULL,
+            status VARCHAR(12) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            claim_token VARCHAR(40) NULL,
+            claimed_at DATETIME NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME NULL,
+            last_error VARCHAR(255) NULL,
+            UNIQUE KEY uq_outbox_dedupe (dedupe_key),
+            KEY idx_outbox_claim (status, channel, next_attempt_at),
+            KEY idx_outbox_token (claim_token)
+        )
+        """),
+    ]),
+
+    (4, "scrape state", [
+        sql("""
+        CREATE TABLE IF NOT EXISTS scrape_state (
+            source VARCHAR(32) PRIMARY KEY,
+            url VARCHAR(512) NOT NULL,
+            etag VARCHAR(255) NULL,
+            last_modified VARCHAR(64) NULL,
+            content_hash CHAR(64) NULL,
+            table_hash CHAR(64) NULL,
+            checked_at DATETIME NULL,
+            changed_at DATETIME NULL
+        )
+        """),
+    ]),
+
+    (5, "notices link_hash key, nullable alert keyword", [
+        # uq_notices_link only covered link(255): long links sharing a prefix
+        # collided, and link IN (...) lookups could not use it to confirm a match
+        add_column("notices", "link_hash",
+                   "ALTER TABLE notices ADD COLUMN link_hash CHAR(64) NULL AFTER link"),
+        sql("UPDATE notices SET link_hash = SHA2(link, 256) WHERE link_hash IS NULL"),
+        add_index("notices", "uq_notices_link_hash",
+                  "ALTER TABLE notices ADD UNIQUE KEY uq_notices_link_hash (link_hash)",
+                  dedupe="DELETE n FROM notices n JOIN notices keep "
+                         "ON keep.link_hash = n.link_hash AND keep.id < n.id"),
+        sql("ALTER TABLE notices MODIFY link_hash CHAR(64) NOT NULL"),
+        drop_index("notices", "uq_notices_link"),
+        # POST /alerts stores keyword=None; alert_matcher treats an empty keyword as match-all
+        sql("ALTER TABLE alerts MODIFY keyword VARCHAR(191) NULL"),
+    ]),
+
+    (6, "alerts updated_at", [
+        # part of alert_matcher's refresh signature: in-place edits (keyword,
+        # source, active) move MAX(updated_at) even when COUNT / MAX(id) don't
+        add_column("alerts", "updated_at",
+                   "ALTER TABLE alerts ADD COLUMN updated_at DATETIME(6) NOT NULL "
+                   "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"),
+    ]),
+
+    (7, "alerts frequency not null", [
+        # "frequency=%s" can use both columns of idx_alerts_active_frequency;
+        # COALESCE(frequency, 'immediate') could only use `active`
+        sql("UPDATE alerts SET frequency='immediate' WHERE frequency IS NULL"),
+        sql("ALTER TABLE alerts MODIFY frequency VARCHAR(12) NOT NULL DEFAULT 'immediate'"),
+    ]),
+]
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(191) NOT NULL,
+    applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+# ---------------- Runner ----------------
+def _applied_versions(cursor):
+    cursor.execute(SCHEMA_MIGRATIONS_DDL)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {int(r["version"]) for r in cursor.fetchall()}
+
+
+def pending(cursor):
+    applied = _applied_versions(cursor)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def migrate():
+    """Apply pending migrations in order. Returns the versions applied; raises on failure."""
+    done = []
+    with pooled_connection() as connection:
+        if not connection:
+            raise RuntimeError("no database connection")
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, %s) AS got", (LOCK_NAME, LOCK_TIMEOUT))
+            if not cursor.fetchall()[0]["got"]:
+                raise RuntimeError("timed out waiting for the migrations lock")
+            try:
+                for version, name, steps in pending(cursor):
+                    print(f"🛠 Migration {version}: {name}")
+                    for step in steps:
+                        step(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (version, name),
+                    )
+                    connection.commit()
+                    done.append(version)
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+    if done:
+        print(f"✅ Applied migrations: {done}")
+    return done
+
+
+def migrate_on_startup():
+    """
+    Called by the single-process entry points (`python app.py`, scheduler.py),
+    never on import; never stops the process from starting.
+    """
+    if not AUTO_MIGRATE:
+        return
+    try:
+        migrate()
+    except Exception as e:
+        print("❌ Schema migration failed:", e)
+
+
+def status():
+    with pooled_connection() as connection:
+        if not connection:
+            raise RuntimeError("no database connection")
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        try:
+            applied = _applied_versions(cursor)
+        finally:
+            cursor.close()
+    for version, name, _ in MIGRATIONS:
+        print(f"{'✅' if version in applied else '⏳'} {version:>3}  {name}")
+
+
+# ---------------- Index advisor ----------------
+# name -> (query, sample params). Keep these in sync with the queries the bot
+# runs on every message / scrape; `check` EXPLAINs each of them.
+_today = date.today()
+HOT_QUERIES = {
+    "notices dedupe (link/title)": (
+        "SELECT link, title FROM notices WHERE link_hash IN (%s) OR title IN (%s)",
+        (link_hash("https://example.com/n/1"), "Sample notice"),
+    ),
+    "notices top-N per source": (
+        "(SELECT title, link, date, source FROM notices"
+        " WHERE source=%s ORDER BY date DESC, id DESC LIMIT %s)"
+        " UNION ALL "
+        "(SELECT title, link, date, source FROM notices"
+        " WHERE source=%s ORDER BY date DESC, id DESC LIMIT %s)",
+        ("PTU", 5, "GNDEC", 5),
+    ),
+    "notices since date (digest)": (
+        "SELECT id, title, link, date, source FROM notices WHERE date >= %s ORDER BY date DESC",
+        (_today - timedelta(days=1),),
+    ),
+    "alerts by user": (
+        "SELECT id, keyword, channel, source, frequency FROM alerts WHERE user_identifier=%s",
+        ("sample-user",),
+    ),
+    "alerts by user + channel": (
+        "SELECT id, keyword, source FROM alerts WHERE user_identifier=%s AND channel='telegram'",
+        ("sample-user",),
+    ),
+    "alerts active by frequency": (
+        "SELECT * FROM alerts WHERE active=1 AND frequency=%s",
+        ("daily",),
+    ),
+    "alerts_sent pair": (
+        "SELECT id FROM alerts_sent WHERE alert_id=%s AND notice_id=%s",
+        (1, 1),
+    ),
+    "alerts_sent candidate pairs": (
+        "SELECT alert_id, notice_id FROM alerts_sent WHERE (alert_id, notice_id) IN ((%s, %s), (%s, %s))",
+        (1, 1, 2, 2),
+    ),
+    "faqs by category": (
+        "SELECT id, question FROM faqs WHERE category_id=%s",
+        (1,),
+    ),
+    "outbox claim": (
+        "SELECT id FROM alert_outbox WHERE status='pending' AND channel=%s AND next_attempt_at <= NOW()",
+        ("telegram",),
+    ),
+}
+
+
+def explain(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    return cursor.fetchall()
+
+
+def full_scans(plan):
+    """Plan rows that scan a whole base table (type=ALL); derived tables are ignored."""
+    return [
+        r for r in plan
+        if (r.get("type") or "").upper() == "ALL" and not str(r.get("table") or "").startswith("<")
+    ]
+
+
+def check():
+    """EXPLAIN every hot query; prints a report and returns the names that full-scan."""
+    flagged = []
+    with pooled_connection() as connection:
+        if not connection:
+            raise RuntimeError("no database connection")
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        try:
+            for name, (query, params) in HOT_QUERIES.items():
+                try:
+                    plan = explain(cursor, query, params)
+                except Exception as e:
+                    print(f"⚠️  {name}: EXPLAIN failed: {e}")
+                    flagged.append(name)
+                    continue
+                scans = full_scans(plan)
+                if scans:
+                    flagged.append(name)
+                    for r in scans:
+                        print(f"❌ {name}: full scan of {r.get('table')} "
+                              f"(~{r.get('rows')} rows, possible_keys={r.get('possible_keys')})")
+                else:
+                    keys = ", ".join(str(r.get("key")) for r in plan if r.get("key"))
+                    print(f"✅ {name}: {keys or 'no table access'}")
+        finally:
+            cursor.close()
+    if flagged:
+        print("Note: on near-empty tables MySQL may prefer a scan even when an index exists.")
+    return flagged
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    if command == "migrate":
+        migrate()
+    elif command == "status":
+        status()
+    elif command == "check":
+        sys.exit(1 if check() else 0)
+    else:
+        print("usage: python -m modules.migrations [migrate|status|check]")
+        sys.exit(2)
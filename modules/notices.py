@@ -0,0 +1,195 @@
+# modules/notices.py
+"""
+Pre-rendered replies for the "notices" commands (WhatsApp, Telegram webhook, Telegram bot).
+- replies are cached per (format, source)
+- the cache is tied to a notices version (MAX(id) of notices), polled at most
+  every NOTICES_VERSION_POLL seconds; a scraper insert bumps it, so hot
+  commands don't touch the DB between scrapes
+Formats:
+    "whatsapp"       -> WhatsApp webhook text
+    "telegram"       -> Telegram webhook (app.py) plain text
+    "telegram_html"  -> modules/telegram_bot.py HTML
+"""
+import os
+import threading
+import time
+
+from modules.database import run_query
+
+NOTICES_VERSION_POLL = float(os.getenv("NOTICES_VERSION_POLL", 15))  # seconds
+
+DEFAULT_SOURCES = ("PTU", "GNDEC")
+SOURCE_ICONS = {"PTU": "📘", "GNDEC": "📗"}
+
+
+# ---------------- Queries ----------------
+def _checked(rows):
+    # run_query returns None on DB errors; never cache an error as "no notices"
+    if rows is None:
+        raise RuntimeError("notices query failed")
+    return rows
+
+
+def latest_per_source(sources=None, limit=5):
+    """
+    Top `limit` notices (newest first) for each source.
+    One UNION ALL of per-source (... WHERE source=%s ORDER BY date DESC LIMIT %s)
+    branches: each walks idx_notices_source_date (see modules.migrations)
+    backwards and stops after `limit` rows, however many notices a source has.
+    sources=None means every source (one extra DISTINCT read of the same index).
+    Returns {SOURCE_UPPER: [rows]}; sources without notices map to [].
+    """
+    if sources is None:
+        rows = _checked(run_query("SELECT DISTINCT source FROM notices", fetch=True))
+        sources = sorted({(r["source"] or "").upper() for r in rows if r["source"]})
+    else:
+        sources = list(dict.fromkeys(s.upper() for s in sources))
+    if not sources:
+        return {}
+
+    branch = (
+        "(SELECT title, link, date, source FROM notices"
+        " WHERE source=%s ORDER BY date DESC, id DESC LIMIT %s)"
+    )
+    params = []
+    for s in sources:
+        params.extend((s, limit))
+    rows = _checked(run_query(
+        " UNION ALL ".join([branch] * len(sources)), tuple(params), fetch=True
+    ))
+
+    grouped = {s: [] for s in sources}
+    for r in rows:
+        grouped.setdefault((r["source"] or "").upper(), []).append(r)
+    return grouped
+
+
+# ---------------- Renderers ----------------
+def _render_whatsapp(source):
+    if source:
+        rows = latest_per_source([source], 5)[source.upper()]
+        if not rows:
+            return f"No notices found for {source}."
+        reply = f"📢 Latest {source} Notices\n\n"
+        for r in rows:
+            reply += (
+                f"🔹 {r.get('title','Untitled')}\n"
+                f"🔗 {r.get('link','')}\n"
+                f"🗓 {r.get('date','')}\n\n"
+            )
+        return reply
+
+    latest = latest_per_source(DEFAULT_SOURCES, 2)
+    grouped = [(src, latest[src]) for src in DEFAULT_SOURCES]
+    if not any(rows for _, rows in grouped):
+        return "No recent notices found."
+
+    reply = "📢 Latest Notices (2 per source)\n\n"
+    for src, rows in grouped:
+        if not rows:
+            continue
+        reply += f"{SOURCE_ICONS.get(src, '📙')} {src}\n\n"
+        for r in rows:
+            reply += (
+                f"🔹 {r.get('title','Untitled')}\n"
+                f"🔗 {r.get('link','')}\n"
+                f"🗓 {r.get('date','')}\n\n"
+            )
+    return reply
+
+
+def _render_telegram(source):
+    if source:
+        rows = latest_per_source([source], 5)[source.upper()]
+        if not rows:
+            return f"No notices found for {source}."
+        reply = f"📢 Latest {source} Notices:\n\n"
+        for r in rows:
+            reply += f"- {r['title']}\n{r['link']}\n{r['date']}\n\n"
+        return reply
+
+    latest = latest_per_source(DEFAULT_SOURCES, 2)
+    reply = "📢 Latest Notices\n\n"
+    for src in DEFAULT_SOURCES:
+        rows = latest[src]
+        if rows:
+            reply += f"{SOURCE_ICONS.get(src, '📙')} {src}\n"
+            for r in rows:
+                reply += f"- {r['title']}\n{r['link']}\n{r['date']}\n\n"
+    return reply
+
+
+def _render_telegram_html(source):
+    if source:
+        rows = latest_per_source([source], 5)[source.upper()]
+        if not rows:
+            return f"No notices found for {source}."
+        msg = f"<b>📢 Latest {source} Notices:</b>\n\n"
+        for row in rows:
+            msg += f"🔹 <a href='{row['link']}'>{row['title']}</a>\n{row['date']}\n\n"
+        return msg
+
+    latest = latest_per_source(None, 5)
+    if not latest:
+        return "No notices found."
+
+    msg = "<b>📢 Latest Notices (5 per source)</b>\n\n"
+    for src, rows in latest.items():
+        msg += f"<b>[{src}]</b>\n"
+        for r in rows:
+            msg += f"• <a href='{r['link']}'>{r['title']}</a>\n  {r['date']}\n"
+        msg += "\n"
+    return msg
+
+
+RENDERERS = {
+    "whatsapp": _render_whatsapp,
+    "telegram": _render_telegram,
+    "telegram_html": _render_telegram_html,
+}
+
+
+# ---------------- Cache ----------------
+_lock = threading.Lock()
+_cache = {}            # (fmt, source) -> rendered text
+_version = None        # MAX(id) of notices when _cache was filled
+_checked_at = None     # monotonic time of the last poll (even a failed one)
+
+
+def _current_version():
+    rows = run_query("SELECT COALESCE(MAX(id), 0) AS v FROM notices", fetch=True)
+    return rows[0]["v"] if rows else None
+
+
+def _sync_version():
+    """Poll the notices version (throttled) and drop the cache if it moved."""
+    global _version, _checked_at
+    now = time.monotonic()
+    # throttled even while the DB is down, so commands don't each poll MySQL
+    if _checked_at is not None and now - _checked_at < NOTICES_VERSION_POLL:
+        return
+    version = _current_version()
+    with _lock:
+        _checked_at = now
+        if version is None:
+            # DB unreachable: keep serving what we have, retry on next poll
+            return
+        if version != _version:
+            _cache.clear()
+            _version = version
+
+
+def render_notices(fmt, source=None):
+    """Reply text for a notices command; served from cache between scrapes."""
+    key = (fmt, source.upper() if source else None)
+    _sync_version()
+    seen = _version
+    text = _cache.get(key)
+    if text is None:
+        text = RENDERERS[fmt](source)
+        with _lock:
+            # another thread saw a newer version while we rendered: this text
+            # may predate it, so serve it once but don't cache it
+            if _version == seen:
+                _cache[key] = text
+    return text
@@ -0,0 +1,401 @@
+# modules/outbox.py
+"""
+Durable outbox for alert delivery.
+- Scrapers (alerts.notify_batch) and the daily digest only INSERT rows here
+- A pool of delivery workers drains the table per channel with:
+    * token-bucket rate limits (OUTBOX_RATE_TELEGRAM / OUTBOX_RATE_WHATSAPP msgs/sec)
+    * Retry-After handling (delivery.RetryLater) + exponential backoff on failures
+    * batched claiming, and coalescing of messages to the same recipient
+    * bodies longer than the channel limit are split into numbered parts at
+      enqueue time (one outbox row each, delivered in order)
+    * idempotent completion: rows flip 'sending' -> 'sent' once, and
+      alerts_sent is written with INSERT IGNORE
+- outbox_metrics() reports queue depth and delivery latency (enqueue -> sent)
+How to run the workers on their own:
+    python -m modules.outbox
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, NamedTuple, Sequence
+
+from modules.database import run_query, run_many
+from modules import delivery
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))         # rows claimed per worker round
+WORKERS_PER_CHANNEL = int(os.getenv("OUTBOX_WORKERS", 2))
+POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 2))    # seconds between empty polls
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+STALE_CLAIM_SECONDS = 300                                      # 'sending' rows older than this are re-queued
+
+CHANNEL_RATES = {
+    # (messages per second, burst)
+    "telegram": (float(os.getenv("OUTBOX_RATE_TELEGRAM", 25)), 30),
+    "whatsapp": (float(os.getenv("OUTBOX_RATE_WHATSAPP", 5)), 10),
+}
+MAX_MESSAGE_CHARS = {"telegram": 4000, "whatsapp": 1500}
+
+# channel -> callable(recipient, text) -> bool (may raise delivery.RetryLater).
+# Swap entries for local stand-ins when testing or benchmarking.
+SENDERS = {
+    "telegram": lambda recipient, text: delivery.deliver_telegram(recipient, text),
+    "whatsapp": lambda recipient, text: delivery.deliver_whatsapp(recipient, text),
+}
+
+class OutboxItem(NamedTuple):
+    channel: str
+    recipient: str
+    body: str
+    dedupe_key: str
+    alert_id: int = None
+    notice_ids: Sequence[int] = ()
+
+
+def digest_key(alert_id, notice_ids):
+    """Stable dedupe key for a digest covering exactly these notices."""
+    ids = ",".join(str(i) for i in sorted(notice_ids))
+    return f"digest:{alert_id}:{hashlib.sha1(ids.encode()).hexdigest()}"
+
+
+# ---------------- Enqueue ----------------
+PART_HEADER_CHARS = 12   # room for the "(12/34)\n" prefix of a split message
+TRUNCATED_NOTE = "\n… (message truncated)"
+
+
+def split_body(text, limit):
+    """Cut text into pieces of at most `limit` chars, at line breaks where possible."""
+    parts, current = [], ""
+    for line in text.split("\n"):
+        while len(line) > limit:                 # a single line longer than a message
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + 1 + len(line) > limit:
+            parts.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _split_item(item: OutboxItem):
+    """An item whose body exceeds the channel limit -> numbered parts; the last one marks alerts_sent."""
+    limit = MAX_MESSAGE_CHARS.get(item.channel, 1500)
+    if len(item.body) <= limit:
+        return [item]
+    pieces = split_body(item.body, limit - PART_HEADER_CHARS)
+    n = len(pieces)
+    return [
+        item._replace(body=f"({i}/{n})\n{piece}", dedupe_key=f"{item.dedupe_key}#{i}",
+                      notice_ids=item.notice_ids if i == n else ())
+        for i, piece in enumerate(pieces, start=1)
+    ]
+
+
+def enqueue_many(items: List[OutboxItem]):
+    """Insert messages into the outbox (one multi-row INSERT). Re-enqueueing a dedupe_key is a no-op."""
+    items = [part for item in items for part in _split_item(item)]
+    if not items:
+        return 0
+    return run_many(
+        "INSERT IGNORE INTO alert_outbox (dedupe_key, channel, recipient, body, alert_id, notice_ids) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        [
+            (i.dedupe_key, i.channel, i.recipient, i.body, i.alert_id,
+             ",".join(str(n) for n in i.notice_ids) or None)
+            for i in items
+        ],
+    )
+
+
+def enqueue(channel, recipient, body, dedupe_key, alert_id=None, notice_ids=()):
+    return enqueue_many([OutboxItem(channel, recipient, body, dedupe_key, alert_id, tuple(notice_ids))])
+
+
+# ---------------- Rate limiting ----------------
+class TokenBucket:
+    """Classic token bucket; pause() honours a provider's Retry-After for the whole channel."""
+
+    def __init__(self, rate, capacity):
+        self.rate = max(rate, 0.01)
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_buckets = {ch: TokenBucket(*cfg) for ch, cfg in CHANNEL_RATES.items()}
+
+
+# ---------------- In-process counters ----------------
+_stats_lock = threading.Lock()
+_stats = {}  # channel -> {"sent", "failed", "retried", "latency_sum", "latency_max"}
+
+
+def _record(channel, key, latency=None):
+    with _stats_lock:
+        s = _stats.setdefault(channel, {"sent": 0, "failed": 0, "retried": 0,
+                                        "latency_sum": 0.0, "latency_max": 0.0})
+        s[key] += 1
+        if latency is not None:
+            s["latency_sum"] += latency
+            s["latency_max"] = max(s["latency_max"], latency)
+
+
+# ---------------- Worker ----------------
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def claim_batch(channel, limit=BATCH_SIZE):
+    """Atomically claim up to `limit` due rows for this channel; returns the claimed rows."""
+    token = uuid.uuid4().hex
+    run_query(
+        "UPDATE alert_outbox SET status='sending', claim_token=%s, claimed_at=NOW(), attempts=attempts+1 "
+        "WHERE status='pending' AND channel=%s AND next_attempt_at <= NOW() "
+        "ORDER BY id LIMIT %s",
+        (token, channel, limit)
+    )
+    rows = run_query(
+        "SELECT id, channel, recipient, body, alert_id, notice_ids, attempts, "
+        "TIMESTAMPDIFF(SECOND, created_at, NOW()) AS age FROM alert_outbox "
+        "WHERE claim_token=%s ORDER BY id",
+        (token,), fetch=True
+    ) or []
+    # age is the queue time up to the claim; delivery latency adds the time from here to the send
+    claimed = time.monotonic()
+    for r in rows:
+        r["claimed"] = claimed
+    return rows
+
+
+def requeue_stale_claims():
+    """Rows left in 'sending' by a crashed worker go back to 'pending'."""
+    run_query(
+        "UPDATE alert_outbox SET status='pending', claim_token=NULL "
+        "WHERE status='sending' AND claimed_at < NOW() - INTERVAL %s SECOND",
+        (STALE_CLAIM_SECONDS,)
+    )
+
+
+def _coalesce(channel, rows):
+    """
+    Group rows per recipient into as few messages as fit the channel's size limit.
+    Bodies are split at enqueue time; a row that is still too long (queued before
+    that) is truncated with a note rather than rejected by the provider.
+    """
+    limit = MAX_MESSAGE_CHARS.get(channel, 1500)
+    groups = []
+    open_groups: Dict[str, dict] = {}
+    for r in rows:
+        body = r["body"]
+        if len(body) > limit:
+            body = body[:limit - len(TRUNCATED_NOTE)] + TRUNCATED_NOTE
+        g = open_groups.get(r["recipient"])
+        if g and len(g["text"]) + 2 + len(body) <= limit:
+            g["text"] += "\n\n" + body
+            g["rows"].append(r)
+            continue
+        g = {"recipient": r["recipient"], "text": body, "rows": [r]}
+        open_groups[r["recipient"]] = g
+        groups.append(g)
+    return groups
+
+
+def mark_delivered(rows):
+    """Idempotent: only rows still 'sending' flip to 'sent'; alerts_sent uses INSERT IGNORE."""
+    if not rows:
+        return
+    ids = [r["id"] for r in rows]
+    run_query(
+        f"UPDATE alert_outbox SET status='sent', sent_at=NOW(), claim_token=NULL "
+        f"WHERE status='sending' AND id IN ({_placeholders(ids)})",
+        tuple(ids)
+    )
+    pairs = []
+    for r in rows:
+        if r.get("alert_id") and r.get("notice_ids"):
+            pairs.extend((r["alert_id"], int(n)) for n in str(r["notice_ids"]).split(",") if n)
+    delivery.mark_sent_many(pairs)
+
+
+def _reschedule(rows, delay, error, give_up=False, refund_attempt=False):
+    if not rows:
+        return
+    ids = [r["id"] for r in rows]
+    # a rate-limit pushback is not the message's fault: don't count it as an attempt
+    attempts_sql = "attempts = attempts - 1, " if refund_attempt else ""
+    run_query(
+        f"UPDATE alert_outbox SET status=%s, claim_token=NULL, last_error=%s, {attempts_sql}"
+        f"next_attempt_at = NOW() + INTERVAL %s SECOND "
+        f"WHERE status='sending' AND id IN ({_placeholders(ids)})",
+        ("failed" if give_up else "pending", (error or "")[:255], int(delay)) + tuple(ids)
+    )
+
+
+def delivery_latency(row, sent):
+    """Seconds from enqueue (created_at) to `sent` (time.monotonic() after the send returned)."""
+    queued = float(row.get("age") or 0)
+    claimed = row.get("claimed")
+    return queued + (sent - claimed if claimed is not None else 0.0)
+
+
+def process_batch(channel, rows):
+    """Deliver claimed rows. Returns number of rows delivered."""
+    sender = SENDERS[channel]
+    bucket = _buckets[channel]
+    delivered = []
+
+    groups = _coalesce(channel, rows)
+    for idx, g in enumerate(groups):
+        bucket.acquire()
+        try:
+            ok = sender(g["recipient"], g["text"])
+            error = None if ok else "send failed"
+        except delivery.RetryLater as e:
+            # provider is throttling the whole channel: pause it and put this + remaining groups back
+            bucket.pause(e.retry_after)
+            for rest in groups[idx:]:
+                _reschedule(rest["rows"], e.retry_after, str(e), refund_attempt=True)
+                for _ in rest["rows"]:
+                    _record(channel, "retried")
+            break
+        except Exception as e:
+            ok, error = False, str(e)
+
+        if ok:
+            delivered.extend(g["rows"])
+            sent = time.monotonic()
+            for r in g["rows"]:
+                _record(channel, "sent", latency=delivery_latency(r, sent))
+        else:
+            for r in g["rows"]:
+                attempts = int(r.get("attempts") or 1)
+                give_up = attempts >= MAX_ATTEMPTS
+                _reschedule([r], min(2 ** attempts * 10, 3600), error, give_up=give_up)
+                _record(channel, "failed" if give_up else "retried")
+
+    mark_delivered(delivered)
+    return len(delivered)
+
+
+class DeliveryWorker(threading.Thread):
+    def __init__(self, channel, stop_event):
+        super().__init__(name=f"outbox-{channel}", daemon=True)
+        self.channel = channel
+        self.stop_event = stop_event
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                rows = claim_batch(self.channel)
+                if rows:
+                    process_batch(self.channel, rows)
+                    continue
+            except Exception as e:
+                print(f"Outbox worker ({self.channel}) error:", e)
+            self.stop_event.wait(POLL_INTERVAL)
+
+
+_workers: List[DeliveryWorker] = []
+_stop = threading.Event()
+
+
+def start_workers(per_channel=WORKERS_PER_CHANNEL):
+    """Start the delivery pool in background threads (idempotent)."""
+    if _workers:
+        return _workers
+    requeue_stale_claims()
+    _stop.clear()
+    for channel in SENDERS:
+        for _ in range(per_channel):
+            w = DeliveryWorker(channel, _stop)
+            w.start()
+            _workers.append(w)
+    print(f"📮 Outbox workers started ({per_channel} per channel).")
+    return _workers
+
+
+def stop_workers(timeout=10):
+    _stop.set()
+    for w in _workers:
+        w.join(timeout)
+    _workers.clear()
+
+
+# ---------------- Metrics ----------------
+def outbox_metrics():
+    """Queue depth per channel/status, oldest pending age, and delivery latency (last hour)."""
+    depth = run_query(
+        "SELECT channel, status, COUNT(*) AS n, "
+        "MAX(TIMESTAMPDIFF(SECOND, created_at, NOW())) AS oldest_age_s "
+        "FROM alert_outbox WHERE status IN ('pending', 'sending', 'failed') "
+        "GROUP BY channel, status",
+        fetch=True
+    ) or []
+    latency = run_query(
+        "SELECT channel, COUNT(*) AS sent, "
+        "AVG(TIMESTAMPDIFF(SECOND, created_at, sent_at)) AS avg_latency_s, "
+        "MAX(TIMESTAMPDIFF(SECOND, created_at, sent_at)) AS max_latency_s "
+        "FROM alert_outbox WHERE status='sent' AND sent_at >= NOW() - INTERVAL 1 HOUR "
+        "GROUP BY channel",
+        fetch=True
+    ) or []
+
+    with _stats_lock:
+        process = {
+            ch: dict(s, latency_avg=(s["latency_sum"] / s["sent"]) if s["sent"] else 0.0)
+            for ch, s in _stats.items()
+        }
+
+    return {
+        "queue": [
+            {"channel": r["channel"], "status": r["status"], "count": int(r["n"]),
+             "oldest_age_s": int(r["oldest_age_s"] or 0)}
+            for r in depth
+        ],
+        "delivery_last_hour": [
+            {"channel": r["channel"], "sent": int(r["sent"]),
+             "avg_latency_s": float(r["avg_latency_s"] or 0), "max_latency_s": int(r["max_latency_s"] or 0)}
+            for r in latency
+        ],
+        "workers": len(_workers),
+        "process": process,
+    }
+
+
+if __name__ == "__main__":
+    start_workers()
+    try:
+        while True:
+            time.sleep(STALE_CLAIM_SECONDS)
+            requeue_stale_claims()
+    except (KeyboardInterrupt, SystemExit):
+        print("Outbox workers stopped by user.")
+        stop_workers()
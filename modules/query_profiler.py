@@ -0,0 +1,159 @@
+# modules/query_profiler.py
+"""
+Opt-in query profiler for run_query / run_many / run_query_async.
+- profile(name) collects every statement issued inside it (same thread, or
+  same asyncio task) with its fingerprint, timing and call site
+- when a profile ends, statement shapes repeated QUERY_PROFILE_N1 times or
+  more are reported as N+1 patterns (console + db_n_plus_one_total metric)
+- statements slower than SLOW_QUERY_MS are appended to SLOW_QUERY_LOG
+- with QUERY_PROFILE=1, Flask / aiohttp requests, Telegram updates, bot
+  handlers and scheduler jobs are profiled automatically (profiled(),
+  request_profile()); off by default, when nothing is profiled the hook in
+  modules.database costs one ContextVar lookup
+Config (env): QUERY_PROFILE (0), QUERY_PROFILE_N1 (5), SLOW_QUERY_MS (200),
+SLOW_QUERY_LOG (slow_queries.log; empty = console only)
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+
+from modules import metrics
+
+PROFILE_QUERIES = os.getenv("QUERY_PROFILE", "0") == "1"
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_PROFILE_N1", 5))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_FILES = tuple(
+    os.path.join(ROOT, "modules", name) for name in ("database.py", "async_db.py", "query_profiler.py")
+)
+
+_current = ContextVar("query_profile", default=None)
+_log_lock = threading.Lock()
+
+
+def call_site(depth=2):
+    """'modules/notices.py:88 in latest_per_source': first frame outside the DB layer."""
+    frame = sys._getframe(depth)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_SKIP_FILES) and "contextlib" not in filename:
+            return f"{os.path.relpath(filename, ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryProfile:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.queries = []    # (fingerprint, seconds, ok, call_site)
+        self._lock = threading.Lock()
+
+    def add(self, fingerprint, seconds, ok, site):
+        with self._lock:
+            self.queries.append((fingerprint, seconds, ok, site))
+
+    @property
+    def total_seconds(self):
+        return sum(q[1] for q in self.queries)
+
+    def repeated(self, threshold=None):
+        """[(fingerprint, count, seconds, Counter(call_site))] for shapes issued >= threshold times."""
+        threshold = threshold or N_PLUS_ONE_THRESHOLD
+        groups = defaultdict(list)
+        for fingerprint, seconds, _, site in self.queries:
+            groups[fingerprint].append((seconds, site))
+        found = []
+        for fingerprint, runs in groups.items():
+            if len(runs) >= threshold:
+                found.append((fingerprint, len(runs), sum(s for s, _ in runs), Counter(site for _, site in runs)))
+        return sorted(found, key=lambda r: -r[1])
+
+    def report(self):
+        lines = [f"🔎 {self.name}: {len(self.queries)} queries, {self.total_seconds * 1000:.1f} ms in MySQL, "
+                 f"{(time.perf_counter() - self.started) * 1000:.1f} ms total"]
+        for fingerprint, count, seconds, sites in self.repeated():
+            site, _ = sites.most_common(1)[0]
+            lines.append(f"  ⚠️ N+1: {count}x ({seconds * 1000:.1f} ms) {fingerprint}\n      from {site}")
+        return "\n".join(lines)
+
+
+def record(fingerprint, seconds, ok):
+    """Hook called by modules.database for every statement."""
+    current = _current.get()
+    if current is None:
+        return
+    site = call_site()
+    current.add(fingerprint, seconds, ok, site)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        log_slow_query(current.name, fingerprint, seconds, site)
+
+
+def log_slow_query(profile_name, fingerprint, seconds, site):
+    line = f"{datetime.now().isoformat(timespec='seconds')} {seconds * 1000:.1f}ms [{profile_name}] {fingerprint} @ {site}"
+    if not SLOW_QUERY_LOG:
+        print("🐢 slow query:", line)
+        return
+    try:
+        with _log_lock, open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print("Slow query log error:", e, "|", line)
+
+
+def finish(current):
+    flagged = current.repeated()
+    for fingerprint, count, _, _ in flagged:
+        metrics.n_plus_one.inc(current.name, fingerprint, amount=count)
+    if flagged:
+        print(current.report())
+
+
+def start(name):
+    """Begin profiling in the current context; pass the result to stop()."""
+    current = QueryProfile(name)
+    return current, _current.set(current)
+
+
+def stop(started):
+    current, token = started
+    _current.reset(token)
+    finish(current)
+    return current
+
+
+@contextmanager
+def profile(name):
+    """Profile the queries issued inside the block; yields the QueryProfile."""
+    started = start(name)
+    try:
+        yield started[0]
+    finally:
+        stop(started)
+
+
+def request_profile(name):
+    """profile(name) when QUERY_PROFILE=1, otherwise a no-op context."""
+    return profile(name) if PROFILE_QUERIES else nullcontext()
+
+
+def profiled(name):
+    """Decorator: run the function inside request_profile(name)."""
+    def decorate(fn):
+        if not PROFILE_QUERIES:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
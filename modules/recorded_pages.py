@@ -0,0 +1,104 @@
+# modules/recorded_pages.py
+"""
+Offline mode for the scrapers: listing and detail pages come from a directory
+of recorded HTML instead of the network.
+- SCRAPER_OFFLINE_DIR=<dir> switches scrape_state.fetch() (listing pages) and
+  scraper_gndec.fetch_page() (detail pages) to load()
+- a URL is looked up in <dir>/index.json ({url or fnmatch pattern: file}),
+  then as its slug file name (https://ptu.ac.in/noticeboard-main/ ->
+  ptu.ac.in_noticeboard-main.html)
+- offline runs send no conditional requests and write no scrape_state, so
+  every run parses the recorded pages (DB writes still go to the configured DB)
+- polite per-host spacing is skipped, nothing is fetched from the host
+Record pages for a corpus:
+    python -m modules.recorded_pages <dir> <url> [url ...]
+Replay:
+    SCRAPER_OFFLINE_DIR=benchmarks/fixtures python -m modules.scraper_gndec
+"""
+import json
+import os
+import re
+import sys
+from fnmatch import fnmatchcase
+from functools import lru_cache
+
+import requests
+
+OFFLINE_DIR = os.getenv("SCRAPER_OFFLINE_DIR", "")
+INDEX_FILE = "index.json"
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+_SLUG_UNSAFE = re.compile(r"[^A-Za-z0-9.-]+")
+
+
+def use_directory(directory):
+    """Switch offline mode on for `directory` (None / "" switches it off)."""
+    global OFFLINE_DIR
+    OFFLINE_DIR = directory or ""
+
+
+def slug(url):
+    """File name for a URL: scheme dropped, anything but [A-Za-z0-9.-] -> '_'."""
+    name = _SLUG_UNSAFE.sub("_", url.split("://", 1)[-1]).strip("_")
+    return f"{name or 'index'}.html"
+
+
+@lru_cache(maxsize=16)
+def _index(directory):
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}, []
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    patterns = [(key, name) for key, name in entries.items() if any(c in key for c in "*?[")]
+    return entries, patterns
+
+
+def path_for(url, directory=None):
+    directory = directory or OFFLINE_DIR
+    exact, patterns = _index(directory)
+    name = exact.get(url)
+    if name is None:
+        name = next((n for pattern, n in patterns if fnmatchcase(url, pattern)), None)
+    return os.path.join(directory, name or slug(url))
+
+
+def load(url, directory=None):
+    """Recorded HTML for url, or None (like a failed fetch) when it was not recorded."""
+    path = path_for(url, directory)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        print(f"❌ Not recorded: {url} ({path})")
+        return None
+
+
+def save(url, html, directory=None):
+    directory = directory or OFFLINE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, slug(url))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    return path
+
+
+def record(directory, urls, timeout=12):
+    """Fetch each url once and store it under its slug name. Returns the number saved."""
+    saved = 0
+    for url in urls:
+        try:
+            r = requests.get(url, headers=HEADERS, timeout=timeout)
+            r.raise_for_status()
+        except Exception as e:
+            print(f"❌ Error fetching {url}: {e}")
+            continue
+        print(f"📼 {url} -> {save(url, r.text, directory)}")
+        saved += 1
+    return saved
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        raise SystemExit(__doc__)
+    record(sys.argv[1], sys.argv[2:])
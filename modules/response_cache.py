@@ -0,0 +1,129 @@
+# modules/response_cache.py
+"""
+Shared answer cache for Gemini fallbacks (/chat, WhatsApp webhook, Telegram bot).
+- key = prompt variant + normalized question ("When is the exam??" == "when is the exam")
+- messages that normalize to nothing ("👍", "??") have no key: never looked up, never stored
+- TTL expiry + LRU eviction, bounded by total size in bytes
+- hit/miss counters via stats()
+Config (env): AI_CACHE_TTL (seconds), AI_CACHE_MAX_BYTES
+"""
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", 6 * 3600))
+AI_CACHE_MAX_BYTES = int(os.getenv("AI_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation/symbols (keeps Hindi vowel signs), collapse whitespace."""
+    if not text:
+        return ""
+    out = []
+    for ch in unicodedata.normalize("NFKC", text).lower():
+        cat = unicodedata.category(ch)
+        out.append(" " if cat[0] in ("P", "S") else ch)
+    return " ".join("".join(out).split())
+
+
+class ResponseCache:
+    def __init__(self, ttl=AI_CACHE_TTL, max_bytes=AI_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(variant: str, question: str):
+        """Cache key, or None when the question is empty after normalizing (emoji / punctuation only)."""
+        normalized = normalize_question(question)
+        return f"{variant}\x00{normalized}" if normalized else None
+
+    def _drop(self, key):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value: str):
+        if key is None:
+            return
+        size = len(key.encode("utf-8")) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+
+gemini_cache = ResponseCache()
+
+
+def cached_answer(variant: str, question: str, generate):
+    """
+    Return the cached answer for (variant, question), or call generate() and
+    cache its result. generate() returning None/"" (or raising) is not cached.
+    """
+    key = ResponseCache.make_key(variant, question)
+    answer = gemini_cache.get(key)
+    if answer is not None:
+        return answer
+    answer = generate()
+    if answer:
+        gemini_cache.set(key, answer)
+    return answer
+
+
+async def cached_answer_async(variant: str, question: str, generate):
+    """cached_answer for the async app: generate is a coroutine function."""
+    key = ResponseCache.make_key(variant, question)
+    answer = gemini_cache.get(key)
+    if answer is not None:
+        return answer
+    answer = await generate()
+    if answer:
+        gemini_cache.set(key, answer)
+    return answer
@@ -0,0 +1,110 @@
+# modules/scrape_state.py
+"""
+Per-source change detection for noticeboard listing pages.
+- remembers ETag / Last-Modified, a hash of the whole page and a hash of the
+  notice table (or extracted notice list) in the scrape_state table
+- fetch() sends If-None-Match / If-Modified-Since; a 304, or a 200 whose body
+  hashes the same as last time, comes back with unchanged=True
+- commit() is called only after a run finished, so a crash mid-run never
+  makes the next run skip work it still has to do
+- with SCRAPER_OFFLINE_DIR set, pages come from modules.recorded_pages and
+  are always treated as changed; nothing is read from or written to scrape_state
+"""
+import hashlib
+from typing import NamedTuple, Optional
+
+import requests
+
+from modules import recorded_pages
+from modules.database import run_query
+
+class FetchResult(NamedTuple):
+    source: str
+    url: str
+    status: int
+    html: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+    unchanged: bool
+    previous_table_hash: Optional[str] = None
+
+
+def digest(text) -> str:
+    if isinstance(text, str):
+        text = text.encode("utf-8", "ignore")
+    return hashlib.sha256(text or b"").hexdigest()
+
+
+def load(source):
+    rows = run_query("SELECT * FROM scrape_state WHERE source=%s", (source,), fetch=True)
+    return rows[0] if rows else {}
+
+
+def fetch(source, url, headers=None, timeout=12, session=None):
+    """
+    Conditional GET for a listing page. Returns FetchResult, or None on network error.
+    result.unchanged is True for a 304 or an identical body.
+    """
+    if recorded_pages.OFFLINE_DIR:
+        return fetch_recorded(source, url)
+
+    state = load(source)
+    same_url = state.get("url") == url
+    req_headers = dict(headers or {})
+    if same_url and state.get("etag"):
+        req_headers["If-None-Match"] = state["etag"]
+    if same_url and state.get("last_modified"):
+        req_headers["If-Modified-Since"] = state["last_modified"]
+
+    try:
+        r = (session or requests).get(url, headers=req_headers, timeout=timeout)
+        if r.status_code == 304:
+            return FetchResult(source, url, 304, None, state.get("etag"), state.get("last_modified"),
+                               state.get("content_hash"), True, state.get("table_hash"))
+        r.raise_for_status()
+    except Exception as e:
+        print(f"❌ Error fetching {url}: {e}")
+        return None
+
+    content_hash = digest(r.content)
+    return FetchResult(
+        source, url, r.status_code, r.text,
+        r.headers.get("ETag"), r.headers.get("Last-Modified"), content_hash,
+        unchanged=same_url and content_hash == state.get("content_hash"),
+        previous_table_hash=state.get("table_hash") if same_url else None,
+    )
+
+
+def fetch_recorded(source, url):
+    """Offline fetch(): the recorded page as a fresh 200, or None if it was not recorded."""
+    html = recorded_pages.load(url)
+    if html is None:
+        return None
+    return FetchResult(source, url, 200, html, None, None, digest(html), unchanged=False)
+
+
+def fragment_unchanged(result: FetchResult, fragment_hash):
+    """True if the notice table / notice list hashes the same as on the last committed run."""
+    return bool(fragment_hash) and result.previous_table_hash == fragment_hash
+
+
+def commit(result: FetchResult, table_hash=None):
+    """Persist validators + hashes after a successful run."""
+    if not result or recorded_pages.OFFLINE_DIR:
+        return
+    run_query(
+        """
+        INSERT INTO scrape_state (source, url, etag, last_modified, content_hash, table_hash, checked_at, changed_at)
+        VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW())
+        ON DUPLICATE KEY UPDATE
+            changed_at = IF(content_hash <=> VALUES(content_hash), changed_at, NOW()),
+            url = VALUES(url),
+            etag = VALUES(etag),
+            last_modified = VALUES(last_modified),
+            content_hash = VALUES(content_hash),
+            table_hash = COALESCE(VALUES(table_hash), table_hash),
+            checked_at = NOW()
+        """,
+        (result.source, result.url, result.etag, result.last_modified, result.content_hash, table_hash)
+    )
@@ -1,20 +1,24 @@
 # modules/scraper_gndec.py
 """
 GNDEC notices scraper (drop-in replacement).
-Saves notices into `notices` table using modules.database.run_query.
+Saves notices into `notices` table using the modules.database bulk ingest helpers.
 
 How to run:
     venv\Scripts\activate
     python -m modules.scraper_gndec
+Offline, from recorded pages (modules/recorded_pages.py):
+    SCRAPER_OFFLINE_DIR=benchmarks/fixtures python -m modules.scraper_gndec
 """
 from datetime import datetime
 from urllib.parse import urljoin
 import requests
-from bs4 import BeautifulSoup
-from modules.database import run_query
-import re
-import time
-from modules.alerts import notify_if_matches  # notify after insert
+import soupsieve
+from modules.database import filter_new_notices, insert_notices
+from modules.alerts import notify_batch  # notify after insert
+from modules.fetch_pool import polite_map
+from modules import recorded_pages, scrape_state
+from modules.html_parsing import make_soup
+from modules.dates import extract_date
 
 # --- CONFIG ---
 GNDEC_URL = "https://erp.gndec.ac.in/notice"
@@ -25,10 +29,11 @@ HEADERS = {
                   "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0 Safari/537.36"
 }
 
-# optional small delay between per-page fetches to be polite
-PER_PAGE_DELAY = 0.4  # seconds
+# per-page fetches are spaced per host by modules.fetch_pool (SCRAPER_PER_HOST_MIN_INTERVAL)
 
 def fetch_page(url, timeout=12):
+    if recorded_pages.OFFLINE_DIR:
+        return recorded_pages.load(url)
     try:
         r = requests.get(url, headers=HEADERS, timeout=timeout)
         r.raise_for_status()
@@ -37,29 +42,6 @@ def fetch_page(url, timeout=12):
         print(f"❌ Error fetching {url}: {e}")
         return None
 
-def try_extract_date_from_text(text):
-    """Try to find a date-like pattern in a text string and return a date object or None."""
-    if not text:
-        return None
-    # Common formats to match: 29 Nov 2025, 29-11-2025, 2025-11-29, 29/11/2025, Nov 29, 2025
-    patterns = [
-        r"(\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4})",    # 29 November 2025
-        r"(\d{1,2}-\d{1,2}-\d{4})",              # 29-11-2025
-        r"(\d{4}-\d{1,2}-\d{1,2})",              # 2025-11-29
-        r"(\d{1,2}/\d{1,2}/\d{4})",              # 29/11/2025
-        r"([A-Za-z]{3,9}\s+\d{1,2},\s*\d{4})",   # November 29, 2025
-    ]
-    for pat in patterns:
-        m = re.search(pat, text)
-        if m:
-            s = m.group(1)
-            for fmt in ("%d %B %Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y", "%B %d, %Y", "%b %d, %Y", "%d %b %Y"):
-                try:
-                    return datetime.strptime(s, fmt).date()
-                except Exception:
-                    continue
-    return None
-
 def get_notice_date_from_page(url):
     """
     Fetch individual notice page and try to extract date from:
@@ -73,14 +55,14 @@ def get_notice_date_from_page(url):
     if not html:
         return None
 
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
 
     # 1) <time datetime="..."> or <time> text
     t = soup.find("time")
     if t:
         # try datetime attr first
         dt = t.get("datetime") or t.get_text(" ", strip=True)
-        d = try_extract_date_from_text(dt)
+        d = extract_date(dt)
         if d:
             return d
 
@@ -96,27 +78,47 @@ def get_notice_date_from_page(url):
         tag = soup.find(tag_name, attrs=attrs)
         if tag:
             val = tag.get("content") or tag.get("value") or tag.get_text(" ", strip=True)
-            d = try_extract_date_from_text(val)
+            d = extract_date(val)
             if d:
                 return d
 
     # 3) look for common date-like classes/spans near title
-    candidates = soup.find_all(lambda el: el.name in ["span", "div", "p"] and el.get_text(strip=True))
-    for el in candidates:
-        cl = " ".join(el.get("class") or [])
-        if any(k in cl.lower() for k in ["date", "posted", "publish", "time", "meta"]):
-            d = try_extract_date_from_text(el.get_text(" ", strip=True))
+    #    (check the cheap class attribute first; only then pull the element's text)
+    for el in soup.find_all(["span", "div", "p"], class_=True):
+        cl = " ".join(el.get("class") or []).lower()
+        if any(k in cl for k in DATE_CLASS_HINTS):
+            d = extract_date(el.get_text(" ", strip=True))
             if d:
                 return d
 
     # 4) fallback: search entire page text for first date-like pattern
     text = soup.get_text(" ", strip=True)
-    d = try_extract_date_from_text(text)
+    d = extract_date(text)
     if d:
         return d
 
     return None
 
+# notice-link strategies, tried in order; precompiled once instead of per run
+SELECTORS = [
+    "table tbody tr td a",
+    "div.noticeboard_list a",
+    "div.notice a",
+    "ul.notice-list a",
+    "div.card a",
+    "div.page a[href*='/notice/']",
+    "a[href*='notice']",
+    "a[href*='/notice/']",
+    ".post .entry-title a",
+    ".widget_recent_entries a",
+]
+SELECTOR_STRATEGIES = [(sel, soupsieve.compile(sel)) for sel in SELECTORS]
+
+DATE_CLASS_HINTS = ("date", "posted", "publish", "time", "meta")
+
+# listing pages: build only <title> and <body>, skip <head> scripts/styles
+LISTING_PARSE_ONLY = ["title", "body"]
+
 def extract_notices_from_soup(soup, base_url):
     """
     Extract candidate notices from a BeautifulSoup object.
@@ -124,21 +126,11 @@ def extract_notices_from_soup(soup, base_url):
     """
     notices = []
 
-    selectors = [
-        "table tbody tr td a",
-        "div.noticeboard_list a",
-        "div.notice a",
-        "ul.notice-list a",
-        "div.card a",
-        "div.page a[href*='/notice/']",
-        "a[href*='notice']",
-        "a[href*='/notice/']",
-        ".post .entry-title a",
-        ".widget_recent_entries a",
-    ]
+    # one walk of the parsed tree; every strategy is then matched against this short list
+    anchors = soup.find_all("a")
 
-    for sel in selectors:
-        found = soup.select(sel)
+    for sel, compiled in SELECTOR_STRATEGIES:
+        found = [a for a in anchors if compiled.match(a)]
         if found:
             for a in found:
                 title = a.get_text(" ", strip=True)
@@ -157,7 +149,7 @@ def extract_notices_from_soup(soup, base_url):
                         # search within parent for date-like text
                         elems = parent.find_all(["span", "time", "small", "p"], limit=4)
                         for e in elems:
-                            d = try_extract_date_from_text(e.get_text(" ", strip=True))
+                            d = extract_date(e.get_text(" ", strip=True))
                             if d:
                                 date_str = d
                                 break
@@ -170,7 +162,9 @@ def extract_notices_from_soup(soup, base_url):
                 return notices
 
     # fallback: scan all <a> tags and apply heuristics
-    for a in soup.find_all("a", href=True):
+    for a in anchors:
+        if not a.get("href"):
+            continue
         text = a.get_text(" ", strip=True)
         href = a["href"]
         if not text:
@@ -184,93 +178,109 @@ def extract_notices_from_soup(soup, base_url):
     print(f"🔎 Fallback strategy used. Found {len(notices)} link candidates.")
     return notices
 
+def _date_from_hint(date_hint):
+    """convert date_hint (could already be date object) to date"""
+    if isinstance(date_hint, datetime):
+        return date_hint.date()
+    if hasattr(date_hint, "year"):  # date object
+        return date_hint
+    if isinstance(date_hint, str):
+        # try parse common formats
+        return extract_date(date_hint)
+    return None
+
 def save_notices(notice_items):
-    saved = 0
-    for title, href, date_hint in notice_items:
-        try:
-            # avoid duplicates
-            existing = run_query("SELECT id FROM notices WHERE link=%s OR title=%s", (href, title), fetch=True)
-            if existing:
-                continue
+    """Returns number of new notices saved, or None if the DB step failed."""
+    # 1) resolve dates we already have from the listing, then drop duplicates
+    #    (within the page and against the DB) with a single lookup
+    rows = [
+        {"title": title, "link": href, "date": _date_from_hint(date_hint), "source": "GNDEC"}
+        for title, href, date_hint in notice_items
+    ]
+    try:
+        pending = filter_new_notices(rows)
+    except Exception as e:
+        print("❌ Error checking duplicates:", e)
+        return None
 
-            # convert date_hint (could already be date object) to date
-            date_val = None
-            if isinstance(date_hint, datetime):
-                date_val = date_hint.date()
-            elif hasattr(date_hint, "year"):  # date object
-                date_val = date_hint
-            elif isinstance(date_hint, str):
-                # try parse common formats
-                date_val = try_extract_date_from_text(date_hint)
-
-            # If no date from list, attempt to open the notice page and extract date
-            if not date_val:
-                # politely fetch the notice page for a date
-                page_date = get_notice_date_from_page(href)
-                if page_date:
-                    date_val = page_date
-                else:
-                    date_val = datetime.now().date()
-
-                # small delay
-                time.sleep(PER_PAGE_DELAY)
-
-            # insert into DB with source tag and notify alerts
-            try:
-                run_query(
-                    "INSERT INTO notices (title, link, date, source) VALUES (%s, %s, %s, %s)",
-                    (title, href, date_val, "GNDEC")
-                )
-                # fetch inserted id
-                res = run_query("SELECT id FROM notices WHERE link=%s", (href,), fetch=True)
-                if res:
-                    nid = res[0].get("id")
-                    notice_row = {"id": nid, "title": title, "link": href, "date": date_val, "source": "GNDEC"}
-                    try:
-                        notify_if_matches(notice_row)
-                    except Exception as e:
-                        print("Notify error (GNDEC):", e)
-                saved += 1
-            except Exception as e:
-                print("❌ Error saving notice (insert):", e)
-        except Exception as e:
-            print("❌ Error saving notice:", e)
-    return saved
+    # 2) notices without a list date: open their pages on the polite fetch pool
+    #    (bounded per-host concurrency + spacing instead of a fixed sleep per page)
+    page_dates = polite_map(get_notice_date_from_page, [r["link"] for r in pending if not r["date"]])
+    for r in pending:
+        if not r["date"]:
+            r["date"] = page_dates.get(r["link"]) or datetime.now().date()
+
+    # 3) one multi-row insert with source tag (alerts are notified in one batch below)
+    try:
+        new_rows = insert_notices(pending)
+    except Exception as e:
+        print("❌ Error saving notices (insert):", e)
+        return None
+
+    try:
+        notify_batch(new_rows)
+    except Exception as e:
+        print("Notify error (GNDEC):", e)
+    return len(new_rows)
 
 def find_valid_page():
+    """
+    Returns (url, soup, page). page is a scrape_state.FetchResult; when
+    page.unchanged is True (304 / identical body) soup is None and nothing is parsed.
+    """
     # try candidate paths (currently GNDEC_URL)
     for p in CANDIDATE_PATHS:
         url = GNDEC_URL if not p else GNDEC_URL.rstrip("/") + "/" + p.lstrip("/")
         print("Trying:", url)
-        html = fetch_page(url)
-        if not html:
+        page = scrape_state.fetch("GNDEC", url, headers=HEADERS)
+        if not page:
             continue
-        soup = BeautifulSoup(html, "html.parser")
+        if page.unchanged:
+            return url, None, page
+        soup = make_soup(page.html, only=LISTING_PARSE_ONLY)
         text_lower = soup.get_text(" ", strip=True).lower()
         if "notice" in text_lower or len(soup.find_all("a")) > 8:
-            return url, soup
+            return url, soup, page
     # fallback to GNDEC_URL homepage
-    html = fetch_page(GNDEC_URL)
-    if html:
-        return GNDEC_URL, BeautifulSoup(html, "html.parser")
-    return None, None
+    page = scrape_state.fetch("GNDEC", GNDEC_URL, headers=HEADERS)
+    if page:
+        soup = None if page.unchanged else make_soup(page.html, only=LISTING_PARSE_ONLY)
+        return GNDEC_URL, soup, page
+    return None, None, None
 
 def run():
     print("🔔 GNDEC Scraper starting...")
-    url, soup = find_valid_page()
-    if not url or not soup:
+    url, soup, page = find_valid_page()
+    if not page:
         print("❌ Could not fetch GNDEC page. Adjust GNDEC_URL or candidate paths.")
-        return
+        return 0
+    if page.unchanged:
+        # 304 or byte-identical page: nothing to parse, nothing to write
+        print(f"✅ GNDEC page unchanged ({page.status}) — skipping.")
+        scrape_state.commit(page)
+        return 0
 
     print("✅ Page chosen:", url)
     items = extract_notices_from_soup(soup, url)
     if not items:
         print("⚠️ No candidate notices found. Inspect the page and update selectors.")
-        return
+        return 0
+
+    # the ERP page changes on every load (tokens, timestamps); compare the notice list itself
+    items_hash = scrape_state.digest("\n".join(f"{title}\t{href}" for title, href, _ in items))
+    if scrape_state.fragment_unchanged(page, items_hash):
+        print("✅ GNDEC notice list unchanged — skipping DB work.")
+        scrape_state.commit(page, items_hash)
+        return 0
 
     print(f"ℹ️ Candidates found: {len(items)}. Saving to DB (avoiding duplicates)...")
     saved = save_notices(items)
+    if saved is None:
+        # leave scrape_state untouched so the next run retries this list
+        return 0
+    scrape_state.commit(page, items_hash)
     print(f"✅ Scraped and stored {saved} new notices successfully.")
+    return saved
 
 if __name__ == "__main__":
     run()
@@ -6,13 +6,17 @@ PTU Noticeboard scraper (robust, date-detection + row heuristics).
 How to run:
     venv\Scripts\activate
     python -m modules.scraper_ptu
+Offline, from recorded pages (modules/recorded_pages.py):
+    SCRAPER_OFFLINE_DIR=benchmarks/fixtures python -m modules.scraper_ptu
 """
 from datetime import datetime, timedelta
 from urllib.parse import urljoin
-import requests, re, time
-from bs4 import BeautifulSoup
-from modules.database import run_query
-from modules.alerts import notify_if_matches  # notify after insert
+import requests, time
+from modules.html_parsing import make_soup
+from modules.database import ingest_notices
+from modules.alerts import notify_batch  # notify after insert
+from modules import recorded_pages, scrape_state
+from modules.dates import extract_date
 
 PTU_BASE = "https://ptu.ac.in"
 PTU_NOTICE_PAGE = "https://ptu.ac.in/noticeboard-main/"
@@ -22,17 +26,13 @@ MAX_AGE_DAYS = 30   # only keep notices posted within last 30 days
 MAX_ROWS = 100      # top rows to scan (adjust for speed)
 DEBUG = True
 
-date_regexes = [
-    re.compile(r"\b(\d{1,2})[/-](\d{1,2})[/-](\d{4})\b"),         # 28/11/2025 or 28-11-2025
-    re.compile(r"\b(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})\b"),         # 28 November 2025
-    re.compile(r"\b(\d{4})[/-](\d{1,2})[/-](\d{1,2})\b"),         # 2025-11-28 (ISO)
-]
-
 def debug(*a, **k):
     if DEBUG:
         print(*a, **k)
 
 def fetch_html(url):
+    if recorded_pages.OFFLINE_DIR:
+        return recorded_pages.load(url)
     try:
         r = requests.get(url, headers=HEADERS, timeout=12)
         r.raise_for_status()
@@ -41,44 +41,6 @@ def fetch_html(url):
         debug("❌ Fetch error:", e)
         return None
 
-def try_parse_date(text):
-    if not text:
-        return None
-    t = text.strip()
-    # common formats
-    # try dd/mm/yyyy or dd-mm-yyyy
-    m = date_regexes[0].search(t)
-    if m:
-        d = f"{m.group(1).zfill(2)}-{m.group(2).zfill(2)}-{m.group(3)}"
-        try:
-            return datetime.strptime(d, "%d-%m-%Y").date()
-        except:
-            pass
-    # try dd Month yyyy
-    m = date_regexes[1].search(t)
-    if m:
-        try:
-            return datetime.strptime(m.group(0), "%d %B %Y").date()
-        except:
-            try:
-                return datetime.strptime(m.group(0), "%d %b %Y").date()
-            except:
-                pass
-    # try ISO yyyy-mm-dd
-    m = date_regexes[2].search(t)
-    if m:
-        try:
-            return datetime.strptime(m.group(0), "%Y-%m-%d").date()
-        except:
-            pass
-    # fallback: try to parse common tokens
-    for fmt in ("%d-%m-%Y", "%d/%m/%Y", "%d %b %Y", "%d %B %Y", "%Y-%m-%d"):
-        try:
-            return datetime.strptime(t, fmt).date()
-        except:
-            pass
-    return None
-
 def best_title_and_link_from_row(tr):
     """
     Heuristic:
@@ -92,24 +54,27 @@ def best_title_and_link_from_row(tr):
     if not tds:
         return None, None, None  # no useful data
 
+    texts = [td.get_text(" ", strip=True) for td in tds]  # each cell's text is built once
+
     date_td = None
-    for td in tds:
-        if try_parse_date(td.get_text(" ", strip=True)):
+    date_val = None
+    for td, text in zip(tds, texts):
+        date_val = extract_date(text)
+        if date_val:
             date_td = td
             break
 
     # select candidate title cell: max text length except date_td and small cells
     candidate = None
+    title = None
     max_len = 0
-    for td in tds:
+    for td, text in zip(tds, texts):
         if td is date_td:
             continue
-        text = td.get_text(" ", strip=True)
         if len(text) > max_len:
             max_len = len(text)
             candidate = td
-
-    title = candidate.get_text(" ", strip=True) if candidate else None
+            title = text
 
     # find link: prefer <a> in candidate, else first 'useful' anchor in the whole row
     link = None
@@ -131,45 +96,48 @@ def best_title_and_link_from_row(tr):
         if not link and anchors:
             link = anchors[0]["href"]
 
-    # try parse date from date_td or from any td containing date regex
-    date_val = None
-    if date_td:
-        date_val = try_parse_date(date_td.get_text(" ", strip=True))
-    if not date_val:
-        # fallback: scan all tds for date-like text
-        for td in tds:
-            dv = try_parse_date(td.get_text(" ", strip=True))
-            if dv:
-                date_val = dv
-                break
-
+    # date_val was parsed from date_td above (None when no cell holds a date)
     return title, link, date_val
 
 def run():
     debug("🔔 PTU Scraper starting...")
-    html = fetch_html(PTU_NOTICE_PAGE)
-    if not html:
+    page = scrape_state.fetch("PTU", PTU_NOTICE_PAGE, headers=HEADERS)
+    if not page:
         print("❌ Unable to fetch PTU noticeboard page.")
-        return
-
-    soup = BeautifulSoup(html, "html.parser")
+        return 0
+    if page.unchanged:
+        # 304 or byte-identical page: nothing to parse, nothing to write
+        print(f"✅ PTU noticeboard unchanged ({page.status}) — skipping.")
+        scrape_state.commit(page)
+        return 0
+    html = page.html
+
+    # only the <table> subtrees are built; the rest of the page is skipped
+    soup = make_soup(html, only="table")
     table = soup.find("table")
     if not table:
         debug("❌ No table found on page. Please verify the page structure.")
         debug("HTML snippet:", html[:1500])
-        return
+        return 0
 
     rows = table.find_all("tr")
     if len(rows) <= 1:
         debug("⚠️ No data rows found in table.")
         debug("Table snippet:", str(table)[:1500])
-        return
+        return 0
+
+    # page changed but the notice table itself did not (e.g. rotating banners)
+    table_hash = scrape_state.digest(str(table))
+    if scrape_state.fragment_unchanged(page, table_hash):
+        print("✅ PTU notice table unchanged — skipping DB work.")
+        scrape_state.commit(page, table_hash)
+        return 0
 
     # skip header row(s)
     data_rows = rows[1: MAX_ROWS + 1]
     debug(f"➡️ Scanning top {len(data_rows)} rows (MAX_ROWS={MAX_ROWS}).")
 
-    saved = 0
+    candidates = []  # deduped + inserted in bulk after the loop
     limit_date = datetime.now().date() - timedelta(days=MAX_AGE_DAYS)
 
     for idx, tr in enumerate(data_rows, start=1):
@@ -197,35 +165,27 @@ def run():
             debug(f"  ⚠️ Skipped: date {date_val} older than {MAX_AGE_DAYS} days (limit {limit_date}).")
             continue
 
-        # check duplicates
-        try:
-            existing = run_query("SELECT id FROM notices WHERE link=%s OR title=%s", (link, title), fetch=True)
-            if existing:
-                debug("  ↩️ Skipped: duplicate found in DB.")
-                continue
-        except Exception as e:
-            debug("  ❌ DB check error:", e)
-            continue
+        candidates.append({"title": title, "link": link, "date": date_val, "source": "PTU"})
+        debug("  ➕ Candidate.")
+
+    # dedupe + insert the whole batch: one lookup, one multi-row INSERT
+    try:
+        new_rows = ingest_notices(candidates)
+    except Exception as e:
+        print("❌ PTU bulk insert failed:", e)
+        return 0
+    saved = len(new_rows)
+    debug(f"  ↩️ {len(candidates) - saved} duplicate(s) skipped, {saved} inserted.")
 
-        # insert and notify alerts
-        try:
-            run_query("INSERT INTO notices (title, link, date, source) VALUES (%s, %s, %s, %s)",
-                      (title, link, date_val, "PTU"))
-            # fetch inserted id
-            res = run_query("SELECT id FROM notices WHERE link=%s", (link,), fetch=True)
-            if res:
-                nid = res[0].get("id")
-                notice_row = {"id": nid, "title": title, "link": link, "date": date_val, "source": "PTU"}
-                try:
-                    notify_if_matches(notice_row)
-                except Exception as e:
-                    debug("Notify error (PTU):", e)
-            saved += 1
-            debug("  ✅ Inserted.")
-        except Exception as e:
-            debug("  ❌ Insert failed:", e)
+    # alerts for every new notice in one batch
+    try:
+        notify_batch(new_rows)
+    except Exception as e:
+        debug("Notify error (PTU):", e)
 
+    scrape_state.commit(page, table_hash)
     print(f"\n✅ Finished. Saved {saved} new notices (source=PTU).")
+    return saved
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,152 @@
+# modules/telegram_client.py
+"""
+Shared Telegram Bot API client (plain HTTPS, no PTB).
+- one keep-alive requests.Session per process with a pooled HTTPAdapter, so
+  a busy chat reuses warm TLS connections instead of handshaking per message
+- (connect, read) timeouts on every call
+- retries with exponential backoff + jitter for connection failures and 5xx;
+  a read timeout is NOT retried (the message may already have been sent)
+- 429 answers: short retry_after waits are slept through, longer ones raise
+  TelegramRetryAfter so callers with their own queue (the alert outbox) can
+  reschedule instead of blocking a thread
+- each call (retries included) is timed per method, see modules/metrics.py
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules import metrics
+
+API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")  # local stand-ins: benchmarks/fakes.py
+CONNECT_TIMEOUT = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", 3.05))  # seconds
+READ_TIMEOUT = float(os.getenv("TELEGRAM_READ_TIMEOUT", 10))          # seconds
+RETRIES = int(os.getenv("TELEGRAM_RETRIES", 2))                       # extra attempts after the first
+BACKOFF_BASE = 0.5                                                     # seconds, doubled per attempt
+MAX_INLINE_WAIT = float(os.getenv("TELEGRAM_MAX_INLINE_WAIT", 5))      # sleep through 429s up to this
+POOL_MAXSIZE = int(os.getenv("TELEGRAM_POOL_MAXSIZE", 20))             # keep-alive connections kept open
+
+
+class TelegramError(Exception):
+    def __init__(self, description, error_code=None):
+        super().__init__(f"{error_code}: {description}" if error_code else description)
+        self.description = description
+        self.error_code = error_code
+
+
+class TelegramRetryAfter(TelegramError):
+    """Telegram answered 429; try again after `retry_after` seconds."""
+
+    def __init__(self, retry_after, description="Too Many Requests"):
+        super().__init__(description, 429)
+        self.retry_after = float(retry_after)
+
+
+# ---------------- Session ----------------
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide keep-alive session (re-created after fork)."""
+    global _session, _session_pid
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)   # TELEGRAM_API_BASE pointing at a local stand-in
+            _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _backoff(attempt):
+    delay = BACKOFF_BASE * (2 ** attempt)
+    return delay + random.uniform(0, delay / 2)
+
+
+# ---------------- Client ----------------
+class TelegramClient:
+    def __init__(self, token, max_inline_wait=MAX_INLINE_WAIT, retries=RETRIES):
+        self.token = token
+        self.max_inline_wait = max_inline_wait
+        self.retries = retries
+
+    def call(self, method, payload):
+        """POST a Bot API method. Returns the `result` field; raises TelegramError / TelegramRetryAfter."""
+        start = time.perf_counter()
+        try:
+            return self._call(method, payload)
+        except Exception:
+            metrics.outbound_errors.inc("telegram", method)
+            raise
+        finally:
+            metrics.outbound_latency.observe(time.perf_counter() - start, "telegram", method)
+
+    def _call(self, method, payload):
+        if not self.token:
+            raise TelegramError("Telegram bot token missing")
+        url = f"{API_BASE}/bot{self.token}/{method}"
+
+        attempt = 0
+        while True:
+            try:
+                r = get_session().post(url, json=payload, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            except requests.ConnectionError as e:
+                # includes ConnectTimeout; a ReadTimeout falls through to the
+                # generic handler below since the message may have been delivered
+                if attempt >= self.retries:
+                    raise TelegramError(f"network error: {e}")
+                time.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+            except requests.RequestException as e:
+                raise TelegramError(f"network error: {e}")
+
+            try:
+                body = r.json()
+            except ValueError:
+                body = {}
+
+            if r.status_code == 429:
+                retry_after = (body.get("parameters") or {}).get("retry_after", 1)
+                if retry_after > self.max_inline_wait or attempt >= self.retries:
+                    raise TelegramRetryAfter(retry_after, body.get("description") or "Too Many Requests")
+                time.sleep(retry_after)
+                attempt += 1
+                continue
+
+            if r.status_code >= 500 and attempt < self.retries:
+                time.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+
+            if not body.get("ok"):
+                raise TelegramError(body.get("description") or f"HTTP {r.status_code}",
+                                    body.get("error_code") or r.status_code)
+            return body.get("result")
+
+    def send_message(self, chat_id, text, reply_markup=None, **extra):
+        payload = {"chat_id": chat_id, "text": text, "disable_web_page_preview": True}
+        if reply_markup:
+            payload["reply_markup"] = reply_markup
+        payload.update(extra)
+        return self.call("sendMessage", payload)
+
+
+_clients = {}
+
+
+def get_client(token, **kwargs):
+    """One client per (token, options); all of them share the keep-alive session."""
+    key = (token, tuple(sorted(kwargs.items())))
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = TelegramClient(token, **kwargs)
+    return client
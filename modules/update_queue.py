@@ -0,0 +1,147 @@
+# modules/update_queue.py
+"""
+Background processing for webhook updates (used by the Telegram webhook in app.py).
+- the webhook only enqueues and answers 200 at once; DB work and Bot API
+  calls happen on a small pool of worker threads
+- updates are routed by key (chat id): one chat always lands on the same
+  worker, so its messages are handled in the order they arrived, while
+  different chats proceed in parallel
+- each worker has a bounded queue; when it is full submit() returns False and
+  the webhook answers 503 so Telegram redelivers later instead of us
+  buffering without limit
+- update ids seen recently are skipped (Telegram redelivers when an ack is slow)
+"""
+import atexit
+import os
+import queue
+import threading
+import zlib
+from collections import OrderedDict
+
+WORKERS = int(os.getenv("TELEGRAM_WORKERS", 4))
+QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", 200))   # per worker
+SEEN_UPDATES = 5000                                        # recent update ids remembered for dedupe
+
+_STOP = object()
+
+
+class KeyedWorkerPool:
+    """N threads, one bounded FIFO each; items with the same key share a thread."""
+
+    def __init__(self, handler, workers=WORKERS, queue_size=QUEUE_SIZE, name="updates"):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.name = name
+        self._queues = []
+        self._threads = []
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()
+        self._pid = None
+        self.stats = {"accepted": 0, "rejected": 0, "duplicates": 0, "failed": 0}   # updated under _lock
+
+    def _start(self):
+        # started lazily and per process, so gunicorn --preload workers each get their own threads
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queues = [queue.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+            self._threads = []
+            for i, q in enumerate(self._queues):
+                t = threading.Thread(target=self._run, args=(q,), name=f"{self.name}-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            self._pid = os.getpid()
+
+    def _count(self, name, amount=1):
+        # bumped from the webhook thread and every worker: a bare += can lose updates
+        with self._lock:
+            self.stats[name] += amount
+
+    def _run(self, q):
+        while True:
+            item = q.get()
+            try:
+                if item is _STOP:
+                    return
+                self.handler(item)
+            except Exception as e:
+                self._count("failed")
+                print(f"❌ {self.name} worker error:", e)
+            finally:
+                q.task_done()
+
+    def _duplicate(self, item_id):
+        if item_id is None:
+            return False
+        with self._lock:
+            if item_id in self._seen:
+                return True
+            self._seen[item_id] = True
+            if len(self._seen) > SEEN_UPDATES:
+                self._seen.popitem(last=False)
+            return False
+
+    def submit(self, key, item, item_id=None):
+        """Queue item behind earlier items with the same key. False if that worker's queue is full."""
+        if self._pid != os.getpid():
+            self._start()
+        if self._duplicate(item_id):
+            self._count("duplicates")
+            return True
+        index = zlib.crc32(str(key).encode()) % self.workers
+        try:
+            self._queues[index].put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._seen.pop(item_id, None)  # let the redelivery through
+                self.stats["rejected"] += 1
+            return False
+        self._count("accepted")
+        return True
+
+    def snapshot(self):
+        """Consistent copy of stats."""
+        with self._lock:
+            return dict(self.stats)
+
+    def depth(self):
+        return sum(q.qsize() for q in self._queues)
+
+    def stop(self, timeout=5):
+        """Let queued items finish (up to timeout per worker), then stop the threads."""
+        if self._pid != os.getpid():
+            return
+        for q in self._queues:
+            try:
+                q.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+        for t in self._threads:
+            t.join(timeout)
+        self._pid = None
+
+
+def telegram_chat_id(update):
+    """Chat an update belongs to (message or button press); None if it has none."""
+    if "callback_query" in update:
+        return ((update["callback_query"].get("message") or {}).get("chat") or {}).get("id")
+    for field in ("message", "edited_message", "channel_post"):
+        if field in update:
+            return (update[field].get("chat") or {}).get("id")
+    return None
+
+
+_pools = []
+
+
+def make_pool(handler, **kwargs):
+    pool = KeyedWorkerPool(handler, **kwargs)
+    _pools.append(pool)
+    return pool
+
+
+@atexit.register
+def _drain_on_exit():
+    for pool in _pools:
+        pool.stop(timeout=2)
@@ -1,18 +1,28 @@
 # scheduler.py
 """
 Scheduler for Campus Info Chatbot
-- Periodically runs scrapers (PTU + GNDEC)
+- Periodically runs scrapers (PTU + GNDEC) concurrently, timing each source
 - Sends daily digest for alerts with frequency='daily'
+- Runs the outbox delivery workers (modules.outbox) for alert messages
+- Serves its metrics (scrapers, outbox deliveries, queries) on
+  SCHEDULER_METRICS_PORT (default 9102, 0 disables)
 - Use: python scheduler.py
 """
 import pytz
 import os
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 from modules.database import run_query
 from modules import alerts as alerts_module
+from modules import alert_matcher
+from modules import outbox
+from modules import metrics
+from modules.query_profiler import profiled, request_profile
+from modules.migrations import migrate_on_startup
 
 # import scraper run functions (these are the modules you replaced earlier)
 from modules.scraper_ptu import run as run_scraper_ptu
@@ -22,25 +32,43 @@ from modules.scraper_gndec import run as run_scraper_gndec
 SCRAPE_INTERVAL_MINUTES = 30  # change if you want more/less frequent scraping
 DAILY_DIGEST_HOUR = 18        # 24-hour clock (server/local time). Change to desired hour.
 DAILY_DIGEST_MINUTE = 0
+SCHEDULER_METRICS_PORT = int(os.getenv("SCHEDULER_METRICS_PORT", 9102))  # GET /metrics; 0 disables
 
 sched = BlockingScheduler(timezone=pytz.timezone("Asia/Kolkata"))
 
 # ---- Job: run both scrapers ----
+SCRAPERS = {
+    "PTU": run_scraper_ptu,
+    "GNDEC": run_scraper_gndec,
+}
+
+def _timed_scrape(source, fn):
+    """Run one scraper; returns (source, seconds, saved_or_None)."""
+    start = time.perf_counter()
+    saved = None
+    try:
+        with request_profile(f"scrape {source}"):
+            saved = fn()
+    except Exception as e:
+        print(f"Error running {source} scraper:", e)
+        traceback.print_exc()
+    seconds = time.perf_counter() - start
+    metrics.scraper_duration.observe(seconds, source)
+    if saved is None:
+        metrics.scraper_failures.inc(source)
+    else:
+        metrics.scraper_rows.inc(source, amount=saved)
+    return source, seconds, saved
+
 def run_all_scrapers():
-    print(f"[{datetime.now()}] Scheduler: Running scrapers (PTU + GNDEC)...")
+    print(f"[{datetime.now()}] Scheduler: Running scrapers ({' + '.join(SCRAPERS)}) concurrently...")
     try:
-        try:
-            run_scraper_ptu()
-        except Exception as e:
-            print("Error running PTU scraper:", e)
-            traceback.print_exc()
-
-        try:
-            run_scraper_gndec()
-        except Exception as e:
-            print("Error running GNDEC scraper:", e)
-            traceback.print_exc()
+        with ThreadPoolExecutor(max_workers=len(SCRAPERS)) as pool:
+            results = list(pool.map(lambda item: _timed_scrape(*item), SCRAPERS.items()))
 
+        for source, seconds, saved in results:
+            status = f"saved {saved}" if saved is not None else "failed"
+            print(f"  ⏱ {source}: {seconds:.2f}s ({status})")
         print(f"[{datetime.now()}] Scheduler: Scrapers finished.")
     except Exception as e:
         print("Unexpected error in run_all_scrapers:", e)
@@ -65,56 +93,64 @@ def fetch_recent_notices(since_date):
         return []
 
 # ---- Job: daily digest ----
+DIGEST_ENQUEUE_BATCH = 1000  # outbox rows per bulk insert
+
+def compute_daily_digests(since_date):
+    """
+    Set-based digest computation:
+      1) daily alerts come from the in-memory matcher (alerts with the same
+         keyword+source share one automaton entry, so each group is matched once)
+      2) recent notices: one query
+      3) anti-join against alerts_sent in SQL: only the matched
+         (alert_id, notice_id) pairs are looked up (alerts.sent_pairs)
+    Returns list of (alert_row, [notice_rows]) with only unsent notices.
+    """
+    matcher = alert_matcher.get_matcher("daily")
+    if not len(matcher):
+        return []
+
+    recent_notices = fetch_recent_notices(since_date)
+    if not recent_notices:
+        return []
+
+    matches = matcher.match(recent_notices)
+    done = alerts_module.sent_pairs((int(a["id"]), int(n["id"])) for a, n in matches)
+
+    by_alert = {}
+    for a, n in matches:
+        aid = int(a["id"])
+        if (aid, int(n["id"])) in done:
+            continue
+        by_alert.setdefault(aid, (a, []))[1].append(n)
+    return list(by_alert.values())
+
+@profiled("daily_digest")
 def daily_digest():
     """
     For each alert with frequency='daily' and active=1:
       - get notices from last 24 hours
       - filter by alert.source (if set) and alert.keyword (if set)
       - avoid notices already in alerts_sent
-      - send a single digest message per alert (telegram or whatsapp)
-      - mark_sent for those (so duplicates are avoided)
+      - queue a single digest message per alert (telegram or whatsapp) in the outbox;
+        the outbox workers deliver it and mark_sent the notices (so duplicates are avoided)
     """
     now = datetime.now()
     since = (now - timedelta(days=1)).date()
     print(f"[{now}] Running daily_digest for notices since {since}...")
 
     try:
-        alerts = run_query("SELECT * FROM alerts WHERE frequency='daily' AND active=1", fetch=True) or []
-        if not alerts:
-            print("No daily alerts to process.")
+        digests = compute_daily_digests(since)
+        if not digests:
+            print("No daily digests to send.")
             return
 
-        recent_notices = fetch_recent_notices(since)
-        if not recent_notices:
-            print("No recent notices in last 24 hours.")
-            return
-
-        for a in alerts:
+        items = []
+        for a, matched in digests:
             try:
-                aid = a.get("id")
-                user_ident = a.get("user_identifier")
+                aid = int(a.get("id"))
                 channel = a.get("channel")
-                kw = (a.get("keyword") or "").strip().lower()
-                alert_source = (a.get("source") or "").upper()
-
-                # match notices
-                matched = []
-                for n in recent_notices:
-                    # source filter
-                    n_source = (n.get("source") or "").upper()
-                    if alert_source and alert_source != n_source:
-                        continue
-                    # keyword filter
-                    if kw:
-                        if kw not in (n.get("title") or "").lower():
-                            continue
-                    # already sent?
-                    if alerts_module.already_sent(aid, n["id"]):
-                        continue
-                    matched.append(n)
-
-                if not matched:
-                    # nothing new for this alert
+                if channel not in ("telegram", "whatsapp"):
+                    print(f"Unknown channel for alert {aid}: {channel}")
                     continue
 
                 # build digest message
@@ -122,25 +158,26 @@ def daily_digest():
                 for m in matched:
                     text += f"- {m['title']}\n{m['link']}\n🗓 {m['date']}\n\n"
 
-                sent = False
-                if channel == "telegram":
-                    sent = alerts_module.send_telegram(user_ident, text)
-                elif channel == "whatsapp":
-                    sent = alerts_module.send_whatsapp(user_ident, text)
-                else:
-                    print(f"Unknown channel for alert {aid}: {channel}")
-
-                if sent:
-                    for m in matched:
-                        alerts_module.mark_sent(aid, m["id"])
-                    print(f"Sent daily digest for alert {aid} ({len(matched)} items).")
-                else:
-                    print(f"Failed sending digest for alert {aid} via {channel}.")
+                notice_ids = [int(m["id"]) for m in matched]
+                items.append(outbox.OutboxItem(
+                    channel=channel,
+                    recipient=str(a.get("user_identifier")),
+                    body=text,
+                    dedupe_key=outbox.digest_key(aid, notice_ids),
+                    alert_id=aid,
+                    notice_ids=tuple(notice_ids),
+                ))
 
             except Exception as inner:
                 print("Error processing alert in daily_digest:", inner)
                 traceback.print_exc()
 
+        # delivery + mark_sent happen in the outbox workers
+        for i in range(0, len(items), DIGEST_ENQUEUE_BATCH):
+            outbox.enqueue_many(items[i:i + DIGEST_ENQUEUE_BATCH])
+        print(f"[{datetime.now()}] daily_digest queued {len(items)} digests in "
+              f"{(datetime.now() - now).total_seconds():.1f}s.")
+
     except Exception as e:
         print("daily_digest unexpected error:", e)
         traceback.print_exc()
@@ -149,7 +186,10 @@ def daily_digest():
 # 1) scraper job every SCRAPE_INTERVAL_MINUTES
 sched.add_job(run_all_scrapers, 'interval', minutes=SCRAPE_INTERVAL_MINUTES, id='scrapers_interval')
 
-# 2) daily digest at specified hour minute (server local time)
+# 2) put rows abandoned by a crashed delivery worker back in the queue
+sched.add_job(outbox.requeue_stale_claims, 'interval', minutes=5, id='outbox_requeue')
+
+# 3) daily digest at specified hour minute (server local time)
 # Using CronTrigger ensures it's run once a day at that time
 sched.add_job(
     daily_digest,
@@ -161,9 +201,15 @@ sched.add_job(
 
 # ---- If run as main, start scheduler and run an immediate smoke test ----
 if __name__ == "__main__":
+    migrate_on_startup()
+    if SCHEDULER_METRICS_PORT:
+        metrics.serve(SCHEDULER_METRICS_PORT)
     print("Scheduler starting. First, running scrapers once for immediate check...")
     run_all_scrapers()
 
+    # alert delivery runs in background threads next to the scheduler
+    outbox.start_workers()
+
     print(f"Starting APScheduler (scrape every {SCRAPE_INTERVAL_MINUTES} minutes, daily digest at {DAILY_DIGEST_HOUR:02d}:{DAILY_DIGEST_MINUTE:02d})")
     try:
         sched.start()
@@ -0,0 +1,72 @@
+# tests/test_alert_matcher.py
+"""AlertMatcher.refresh against an in-memory alerts table (no MySQL)."""
+import itertools
+
+import pytest
+
+from modules import alert_matcher
+from modules.alert_matcher import AlertMatcher
+
+NOTICE = {"id": 1, "title": "Admit card for B.Tech exams", "source": "PTU"}
+
+
+class FakeAlerts:
+    """alerts with an updated_at that moves on every write, like ON UPDATE CURRENT_TIMESTAMP."""
+
+    def __init__(self):
+        self.rows = {}
+        self.clock = itertools.count(1)
+
+    def write(self, id, **fields):
+        row = self.rows.setdefault(id, {"id": id, "keyword": None, "source": None,
+                                        "active": 1, "frequency": "immediate"})
+        row.update(fields, updated_at=next(self.clock))
+
+    def run_query(self, query, params=None, fetch=False):
+        frequency = params[-1]
+        rows = [r for r in self.rows.values() if r["active"] and r["frequency"] == frequency]
+        if query.startswith("SELECT COUNT(*)"):
+            return [{"n": len(rows), "max_id": max((r["id"] for r in rows), default=0),
+                     "updated": max((r["updated_at"] for r in rows), default=None)}]
+        if "updated_at >= %s" in query:
+            old_max, old_updated = params[0], params[1]
+            return [dict(r) for r in rows if r["id"] > old_max or r["updated_at"] >= old_updated]
+        return [dict(r) for r in rows]
+
+
+@pytest.fixture
+def alerts(monkeypatch):
+    table = FakeAlerts()
+    monkeypatch.setattr(alert_matcher, "run_query", table.run_query)
+    return table
+
+
+def matched_ids(matcher):
+    matcher.refresh()
+    return sorted(int(a["id"]) for a, _ in matcher.match([NOTICE]))
+
+
+def test_in_place_edits_are_picked_up(alerts):
+    alerts.write(1, keyword="admit card")
+    alerts.write(2, keyword="scholarship")
+    matcher = AlertMatcher()
+    assert matched_ids(matcher) == [1]
+
+    alerts.write(1, keyword="tender")           # same COUNT / MAX(id), new keyword
+    alerts.write(2, keyword="b.tech")
+    assert matched_ids(matcher) == [2]
+
+    alerts.write(2, source="GNDEC")             # source change
+    assert matched_ids(matcher) == []
+
+
+def test_deactivate_one_reactivate_another_reloads(alerts):
+    alerts.write(1, keyword="admit card")
+    alerts.write(2, keyword="exams", active=0)
+    matcher = AlertMatcher()
+    assert matched_ids(matcher) == [1]
+
+    alerts.write(1, active=0)
+    alerts.write(2, active=1)
+    assert matched_ids(matcher) == [2]
+    assert len(matcher) == 1
@@ -0,0 +1,20 @@
+# tests/test_alerts.py
+"""alerts.sent_pairs: the alerts_sent anti-join only fetches the candidate pairs."""
+from modules import alerts
+
+
+def test_sent_pairs_looks_up_exact_pairs_in_chunks(monkeypatch):
+    sent = {(1, 10), (2, 10), (3, 11)}
+    calls = []
+
+    def run_query(query, params=None, fetch=False):
+        calls.append(query)
+        asked = set(zip(params[::2], params[1::2]))
+        return [{"alert_id": a, "notice_id": n} for a, n in sent & asked]
+
+    monkeypatch.setattr(alerts, "run_query", run_query)
+    monkeypatch.setattr(alerts, "SENT_PAIRS_CHUNK", 2)
+    assert alerts.sent_pairs([(1, 10), (3, 10), (3, 11)]) == {(1, 10), (3, 11)}
+    assert len(calls) == 2
+    assert all("(alert_id, notice_id) IN (" in q for q in calls)
+    assert alerts.sent_pairs([]) == set()
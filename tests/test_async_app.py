@@ -0,0 +1,12 @@
+# tests/test_async_app.py
+"""async_app.py shares modules/chat_core.py with app.py instead of importing it."""
+import subprocess
+import sys
+
+
+def test_importing_async_app_builds_no_flask_app():
+    loaded = subprocess.run(
+        [sys.executable, "-c", "import sys, async_app; print('app' in sys.modules, 'flask' in sys.modules)"],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    assert loaded == ["False", "False"]
@@ -0,0 +1,41 @@
+# tests/test_commands.py
+"""CommandRouter on a private router with stub handlers (no DB)."""
+from modules.commands import CommandRouter, Reply
+
+
+def make_router():
+    router = CommandRouter()
+
+    @router.command("notices")
+    def notices(cmd):
+        return Reply(f"notices {' '.join(cmd.args)}".strip())
+
+    return router
+
+
+def test_telegram_strips_slash_and_bot_suffix():
+    router = make_router()
+    assert router.dispatch("telegram", "1", "/notices@CampusBot PTU").text == "notices PTU"
+    assert router.dispatch("telegram_bot", "1", "/notices").text == "notices"
+
+
+def test_whatsapp_keeps_slash_and_bot_suffix_as_text():
+    router = make_router()
+    assert router.dispatch("whatsapp", "w", "notices").text == "notices"
+    assert router.dispatch("whatsapp", "w", "/notices") is None
+    assert router.dispatch("whatsapp", "w", "notices@CampusBot") is None
+
+
+def test_metrics_come_from_the_prometheus_histogram():
+    from modules import metrics
+    router = make_router()
+    before = metrics.command_latency.count("telegram", "notices")
+    router.dispatch("telegram", "1", "/notices")
+    with router.timed("telegram", "fallback"):
+        pass
+    summary = router.metrics()["telegram:notices"]
+    assert summary["count"] == before + 1 == metrics.command_latency.count("telegram", "notices")
+    assert summary["p50_ms"] == 1 and summary["buckets"]["1"] >= 1
+    assert "telegram:fallback" in router.metrics()
+    assert 'bot_command_duration_seconds_bucket{channel="telegram",command="notices",le="0.001"}' \
+        in metrics.render()
@@ -0,0 +1,69 @@
+# tests/test_faq_index.py
+"""FaqIndex.refresh against an in-memory faqs table (no MySQL)."""
+import zlib
+
+import pytest
+
+from modules import faq_index as faq_module
+from modules.faq_index import FaqIndex
+
+
+class FakeFaqs:
+    def __init__(self, rows):
+        self.rows = {r[0]: {"id": r[0], "question": r[1], "answer": r[2]} for r in rows}
+        self.down = False
+
+    @staticmethod
+    def checksum(r):
+        return zlib.crc32(f"{r['question']}\x1f{r['answer']}".encode())
+
+    def run_query(self, query, params=None, fetch=False):
+        if self.down:
+            return None
+        rows = sorted(self.rows.values(), key=lambda r: r["id"])
+        if query.startswith("SELECT COUNT(*)"):
+            return [{"n": len(rows), "max_id": max(self.rows, default=0),
+                     "checksum": sum(self.checksum(r) for r in rows)}]
+        if "WHERE id > %s" in query:
+            return [dict(r, checksum=self.checksum(r)) for r in rows if r["id"] > params[0]]
+        return [dict(r) for r in rows]
+
+
+@pytest.fixture
+def faqs(monkeypatch):
+    table = FakeFaqs([(1, "hostel fee last date", "31 March"), (2, "exam date sheet", "On the ERP")])
+    monkeypatch.setattr(faq_module, "run_query", table.run_query)
+    return table
+
+
+def answers(index, question):
+    return [hit["answer"] for hit in index.search(question)]
+
+
+def test_appended_edited_and_deleted_faqs_are_picked_up(faqs):
+    index = FaqIndex()
+    index.refresh(force=True)
+    assert answers(index, "hostel fee")[0] == "31 March"
+
+    faqs.rows[3] = {"id": 3, "question": "library timings", "answer": "9 to 5"}
+    index.refresh(force=True)
+    assert len(index) == 3
+
+    faqs.rows[1]["answer"] = "15 April"
+    index.refresh(force=True)
+    assert answers(index, "hostel fee")[0] == "15 April"
+
+    del faqs.rows[2]
+    index.refresh(force=True)
+    assert "On the ERP" not in answers(index, "exam date sheet")
+    assert len(index) == 2
+
+
+def test_failed_load_is_retried_on_the_next_call(faqs):
+    index = FaqIndex()
+    faqs.down = True
+    index.refresh()
+    assert index.last_refresh == 0.0
+    faqs.down = False
+    index.refresh()
+    assert len(index) == 2
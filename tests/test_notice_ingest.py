@@ -0,0 +1,103 @@
+# tests/test_notice_ingest.py
+"""A failed notice insert must raise, so scrapers skip scrape_state.commit() and retry."""
+import pytest
+from mysql.connector.errors import ProgrammingError
+
+from modules import database, metrics, scrape_state, scraper_gndec
+
+ROWS = [{"title": "Date sheet", "link": "https://example.edu/n/1", "date": None, "source": "GNDEC"}]
+INSERT_FINGERPRINT = metrics.sql_fingerprint(
+    "INSERT IGNORE INTO notices (title, link, link_hash, date, source) VALUES (%s, %s, %s, %s, %s)")
+
+
+class NoConnectionPool:
+    def acquire(self):
+        return None
+
+
+class FailingCursor:
+    def execute(self, query, params):
+        raise ProgrammingError(msg="Unknown column 'source'")
+
+    def close(self):
+        pass
+
+
+class FailingConnection:
+    def cursor(self, **kwargs):
+        return FailingCursor()
+
+    def rollback(self):
+        pass
+
+
+class FailingPool:
+    class Pooled:
+        connection = FailingConnection()
+
+    def acquire(self):
+        return self.Pooled()
+
+    def release(self, pooled, broken=False):
+        pass
+
+
+class NoticesTable:
+    """notices with its unique link_hash key, behind the cursor API insert_notices uses."""
+
+    def __init__(self):
+        self.ids = {}        # link_hash -> id
+        self.rowcount = self.lastrowid = 0
+
+    def execute(self, query, params):
+        title, link, hashed, day, source = params
+        if hashed in self.ids:
+            self.rowcount = 0          # INSERT IGNORE: duplicate key
+            return
+        self.lastrowid = self.ids[hashed] = len(self.ids) + 100
+        self.rowcount = 1
+
+    def close(self):
+        pass
+
+
+class TablePool(FailingPool):
+    def __init__(self, table):
+        connection = type("Connection", (), {"cursor": lambda self, **kw: table, "commit": lambda self: None})()
+        self.pooled = type("Pooled", (), {"connection": connection})()
+
+    def acquire(self):
+        return self.pooled
+
+
+@pytest.mark.parametrize("pool", [NoConnectionPool(), FailingPool()], ids=["no connection", "sql error"])
+def test_insert_notices_raises_and_is_observed(monkeypatch, pool):
+    monkeypatch.setattr(database, "get_pool", lambda: pool)
+    errors = metrics.db_query_errors.value(INSERT_FINGERPRINT)
+    with pytest.raises(Exception):
+        database.insert_notices(ROWS)
+    assert metrics.db_query_errors.value(INSERT_FINGERPRINT) == errors + 1
+
+
+def test_insert_notices_reports_only_rows_it_inserted(monkeypatch):
+    table = NoticesTable()
+    monkeypatch.setattr(database, "get_pool", lambda: TablePool(table))
+    raced = {"title": "Fee", "link": "https://example.edu/n/2", "date": None, "source": "PTU"}
+    table.execute(None, ("Fee", raced["link"], database.link_hash(raced["link"]), None, "PTU"))  # another run won
+    inserted = database.insert_notices(ROWS + [raced])
+    assert [(r["link"], r["id"]) for r in inserted] == [(ROWS[0]["link"], 101)]
+
+
+def test_gndec_run_does_not_commit_scrape_state_when_insert_fails(monkeypatch):
+    page = scrape_state.FetchResult("GNDEC", "https://erp.gndec.ac.in/notice", 200, "<html></html>",
+                                    None, None, "hash", False)
+    committed = []
+    monkeypatch.setattr(scraper_gndec, "find_valid_page", lambda: (page.url, object(), page))
+    monkeypatch.setattr(scraper_gndec, "extract_notices_from_soup",
+                        lambda soup, url: [(r["title"], r["link"], "28 November 2025") for r in ROWS])
+    monkeypatch.setattr(scraper_gndec, "filter_new_notices", lambda rows: rows)
+    monkeypatch.setattr(scraper_gndec.scrape_state, "fragment_unchanged", lambda page, h: False)
+    monkeypatch.setattr(scraper_gndec.scrape_state, "commit", lambda *a: committed.append(a))
+    monkeypatch.setattr(database, "get_pool", lambda: NoConnectionPool())
+    assert scraper_gndec.run() == 0
+    assert committed == []
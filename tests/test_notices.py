@@ -0,0 +1,77 @@
+# tests/test_notices.py
+"""
+latest_per_source against a recording run_query: the SQL shape (one LIMITed
+branch per source) and the grouping of the rows it returns.
+
+    python -m pytest -q tests
+"""
+import pytest
+
+from modules import notices
+
+
+class RecordingQuery:
+    def __init__(self, rows, distinct=()):
+        self.rows, self.distinct, self.calls = rows, distinct, []
+
+    def __call__(self, query, params=None, fetch=False):
+        self.calls.append((query, params))
+        if query.startswith("SELECT DISTINCT source"):
+            return [{"source": s} for s in self.distinct]
+        return self.rows
+
+
+def test_one_limited_branch_per_source(monkeypatch):
+    run = RecordingQuery([{"title": "a", "link": "l", "date": None, "source": "PTU"}])
+    monkeypatch.setattr(notices, "run_query", run)
+    latest = notices.latest_per_source(["ptu", "GNDEC"], 2)
+    (query, params), = run.calls
+    assert query.count("UNION ALL") == 1
+    assert query.count("WHERE source=%s ORDER BY date DESC, id DESC LIMIT %s") == 2
+    assert "ROW_NUMBER" not in query
+    assert params == ("PTU", 2, "GNDEC", 2)
+    assert latest == {"PTU": run.rows, "GNDEC": []}
+
+
+def test_all_sources_come_from_distinct(monkeypatch):
+    run = RecordingQuery([], distinct=["PTU", "GNDEC", None])
+    monkeypatch.setattr(notices, "run_query", run)
+    assert notices.latest_per_source(None, 5) == {"GNDEC": [], "PTU": []}
+    assert run.calls[1][1] == ("GNDEC", 5, "PTU", 5)
+
+
+def test_db_error_is_not_cached_as_empty(monkeypatch):
+    monkeypatch.setattr(notices, "run_query", lambda *a, **k: None)
+    with pytest.raises(RuntimeError):
+        notices.latest_per_source(["PTU"])
+
+
+# ---------------- Cache ----------------
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(notices, "_cache", {})
+    monkeypatch.setattr(notices, "_version", None)
+    monkeypatch.setattr(notices, "_checked_at", None)
+
+
+def test_text_rendered_before_a_version_bump_is_not_cached(monkeypatch, fresh_cache):
+    versions = iter([1, 2])
+    monkeypatch.setattr(notices, "_current_version", lambda: next(versions))
+
+    def render(source):
+        # a concurrent request polls while this one renders and sees version 2
+        monkeypatch.setattr(notices, "_checked_at", None)
+        notices._sync_version()
+        return "rendered at version 1"
+
+    monkeypatch.setitem(notices.RENDERERS, "whatsapp", render)
+    assert notices.render_notices("whatsapp") == "rendered at version 1"
+    assert notices._version == 2 and notices._cache == {}
+
+
+def test_version_poll_stays_throttled_while_db_is_down(monkeypatch, fresh_cache):
+    polls = []
+    monkeypatch.setattr(notices, "_current_version", lambda: polls.append(1))
+    for _ in range(3):
+        notices._sync_version()
+    assert len(polls) == 1
@@ -0,0 +1,203 @@
+# tests/test_outbox.py
+"""
+Outbox delivery against local stand-ins: outbox.SENDERS is swapped for
+recording senders and the alert_outbox / alerts_sent statements run against
+an in-memory table, so no MySQL, Twilio or Telegram is needed.
+
+    python -m pytest -q tests
+"""
+import re
+import subprocess
+import sys
+import time
+
+import pytest
+
+from modules import delivery, outbox
+
+
+class FakeOutboxTable:
+    """In-memory alert_outbox + alerts_sent for the statements process_batch issues."""
+
+    def __init__(self):
+        self.rows = {}
+        self.alerts_sent = set()
+
+    def add(self, id, recipient, body, attempts=1, alert_id=None, notice_ids=None, channel="telegram"):
+        self.rows[id] = {"id": id, "channel": channel, "recipient": recipient, "body": body,
+                         "alert_id": alert_id, "notice_ids": notice_ids, "attempts": attempts,
+                         "status": "sending", "next_attempt_in": 0, "last_error": None}
+        return dict(self.rows[id], age=0)
+
+    def run_query(self, query, params=None, fetch=False):
+        params = tuple(params or ())
+        if query.startswith("UPDATE alert_outbox SET status='sent'"):
+            flipped = 0
+            for id in params:
+                if self.rows[id]["status"] == "sending":
+                    self.rows[id]["status"] = "sent"
+                    flipped += 1
+            return flipped
+        if query.startswith("UPDATE alert_outbox SET status=%s"):
+            status, error, delay, *ids = params
+            for id in ids:
+                row = self.rows[id]
+                if row["status"] != "sending":
+                    continue
+                row.update(status=status, last_error=error, next_attempt_in=delay)
+                if "attempts = attempts - 1" in query:
+                    row["attempts"] -= 1
+            return len(ids)
+        raise AssertionError(f"unexpected statement: {query}")
+
+    def run_many(self, query, seq_params):
+        assert re.match(r"INSERT IGNORE INTO alerts_sent", query)
+        before = len(self.alerts_sent)
+        self.alerts_sent.update(tuple(p) for p in seq_params)
+        return len(self.alerts_sent) - before
+
+
+class RecordingSender:
+    """Stand-in for deliver_telegram / deliver_whatsapp: records messages, scripted results."""
+
+    def __init__(self, results=()):
+        self.sent = []
+        self.results = list(results)
+
+    def __call__(self, recipient, text):
+        self.sent.append((recipient, text))
+        result = self.results.pop(0) if self.results else True
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeOutboxTable()
+    monkeypatch.setattr(outbox, "run_query", table.run_query)
+    monkeypatch.setattr(delivery, "run_many", table.run_many)
+    for channel in outbox.CHANNEL_RATES:
+        monkeypatch.setitem(outbox._buckets, channel, outbox.TokenBucket(1000, 1000))
+    return table
+
+
+def use_sender(monkeypatch, sender, channel="telegram"):
+    monkeypatch.setitem(outbox.SENDERS, channel, sender)
+    return sender
+
+
+# ---------------- Token bucket ----------------
+def test_token_bucket_allows_burst_then_waits_for_rate():
+    bucket = outbox.TokenBucket(rate=50, capacity=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.01
+    bucket.acquire()                      # 4th token refills at 50/s: ~20 ms
+    assert time.monotonic() - start >= 0.015
+
+
+def test_token_bucket_pause_blocks_until_retry_after():
+    bucket = outbox.TokenBucket(rate=1000, capacity=10)
+    bucket.pause(0.05)
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.045
+
+
+# ---------------- Delivery ----------------
+def test_delivered_rows_are_marked_sent_with_alerts_sent(table, monkeypatch):
+    sender = use_sender(monkeypatch, RecordingSender())
+    rows = [table.add(1, "100", "a", alert_id=7, notice_ids="11"),
+            table.add(2, "100", "b", alert_id=7, notice_ids="12")]
+    assert outbox.process_batch("telegram", rows) == 2
+    assert sender.sent == [("100", "a\n\nb")]          # coalesced per recipient
+    assert {r["status"] for r in table.rows.values()} == {"sent"}
+    assert table.alerts_sent == {(7, 11), (7, 12)}
+
+
+def test_retry_later_pauses_channel_and_reschedules_rest(table, monkeypatch):
+    use_sender(monkeypatch, RecordingSender([True, delivery.RetryLater(7, "429")]))
+    rows = [table.add(1, "100", "a", attempts=2), table.add(2, "200", "b", attempts=2),
+            table.add(3, "300", "c", attempts=2)]
+    assert outbox.process_batch("telegram", rows) == 1
+    assert table.rows[1]["status"] == "sent"
+    for id in (2, 3):
+        row = table.rows[id]
+        assert row["status"] == "pending"
+        assert row["next_attempt_in"] == 7
+        assert row["attempts"] == 1                     # a rate limit does not use up an attempt
+    assert outbox._buckets["telegram"].paused_until > time.monotonic() + 6
+
+
+def test_failures_back_off_then_give_up_after_max_attempts(table, monkeypatch):
+    use_sender(monkeypatch, RecordingSender([False, False]))
+    rows = [table.add(1, "100", "a", attempts=1), table.add(2, "200", "b", attempts=outbox.MAX_ATTEMPTS)]
+    assert outbox.process_batch("telegram", rows) == 0
+    assert table.rows[1]["status"] == "pending"
+    assert table.rows[1]["next_attempt_in"] == 20       # 2 ** attempts * 10
+    assert table.rows[2]["status"] == "failed"
+
+
+def test_mark_delivered_is_idempotent(table):
+    rows = [table.add(1, "100", "a", alert_id=7, notice_ids="11,12")]
+    outbox.mark_delivered(rows)
+    outbox.mark_delivered(rows)
+    assert table.rows[1]["status"] == "sent"
+    assert table.alerts_sent == {(7, 11), (7, 12)}
+    assert table.run_query("UPDATE alert_outbox SET status='sent' WHERE status='sending' AND id IN (%s)",
+                           (1,)) == 0
+
+
+# ---------------- Message size ----------------
+def test_oversized_body_is_split_into_ordered_parts():
+    body = "\n".join(f"line {i} " + "x" * 80 for i in range(60))
+    item = outbox.OutboxItem("whatsapp", "whatsapp:+91", body, "digest:1:abc", 1, (5, 6))
+    parts = outbox._split_item(item)
+    assert len(parts) > 1
+    assert all(len(p.body) <= outbox.MAX_MESSAGE_CHARS["whatsapp"] for p in parts)
+    assert [p.dedupe_key for p in parts] == [f"digest:1:abc#{i}" for i in range(1, len(parts) + 1)]
+    assert [p.notice_ids for p in parts] == [()] * (len(parts) - 1) + [(5, 6)]
+    assert parts[0].body.startswith(f"(1/{len(parts)})\n")
+
+
+def test_coalesce_truncates_rows_queued_too_long():
+    groups = outbox._coalesce("telegram", [{"recipient": "100", "body": "y" * 5000}])
+    assert len(groups[0]["text"]) <= outbox.MAX_MESSAGE_CHARS["telegram"]
+    assert groups[0]["text"].endswith(outbox.TRUNCATED_NOTE)
+
+
+# ---------------- Retry-After ----------------
+def test_retry_after_header_seconds_and_http_date():
+    assert delivery.retry_after_seconds({"Retry-After": "12"}) == 12
+    assert delivery.retry_after_seconds({}) == delivery.RATE_LIMIT_DEFAULT_WAIT
+    assert 0 <= delivery.retry_after_seconds({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) <= 1
+
+
+def test_twilio_429_uses_retry_after_from_response(monkeypatch):
+    class Twilio429(Exception):
+        status = 429
+        headers = {"Retry-After": "3"}
+
+    class Messages:
+        def create(self, **kwargs):
+            raise Twilio429("Too Many Requests")
+
+    class Client:
+        messages = Messages()
+
+    monkeypatch.setattr(delivery, "_get_twilio_client", lambda: Client())
+    monkeypatch.setattr(delivery, "TWILIO_WHATSAPP_NUMBER", "whatsapp:+10000000000")
+    with pytest.raises(delivery.RetryLater) as raised:
+        delivery.deliver_whatsapp("whatsapp:+91", "hi")
+    assert raised.value.retry_after == 3
+
+
+# ---------------- Imports ----------------
+def test_outbox_does_not_import_alerts():
+    loaded = subprocess.run(
+        [sys.executable, "-c", "import sys, modules.outbox; print('modules.alerts' in sys.modules)"],
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    assert loaded == "False"
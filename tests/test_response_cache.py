@@ -0,0 +1,15 @@
+# tests/test_response_cache.py
+from modules.response_cache import ResponseCache, cached_answer, gemini_cache
+
+
+def test_equivalent_questions_share_a_key():
+    assert ResponseCache.make_key("chat", "When is the exam??") == ResponseCache.make_key("chat", "when is the  exam")
+
+
+def test_emoji_and_punctuation_only_messages_are_not_cached():
+    assert ResponseCache.make_key("chat", "👍") is None
+    assert ResponseCache.make_key("chat", "??") is None
+    gemini_cache.clear()
+    assert cached_answer("chat", "👍", lambda: "first answer") == "first answer"
+    assert cached_answer("chat", "??", lambda: "second answer") == "second answer"
+    assert gemini_cache.stats()["entries"] == 0
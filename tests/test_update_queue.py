@@ -0,0 +1,29 @@
+# tests/test_update_queue.py
+"""KeyedWorkerPool counters stay exact under concurrent submits and worker failures."""
+import threading
+
+from modules.update_queue import KeyedWorkerPool
+
+
+def test_stats_do_not_lose_updates_under_contention():
+    def handler(item):
+        if item % 2:
+            raise ValueError("boom")
+
+    pool = KeyedWorkerPool(handler, workers=4, queue_size=10000, name="test")
+
+    def submit_many(offset):
+        for i in range(2000):
+            pool.submit(i % 16, offset + i)
+
+    threads = [threading.Thread(target=submit_many, args=(n * 2000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for q in pool._queues:
+        q.join()
+    stats = pool.snapshot()
+    assert stats["accepted"] + stats["rejected"] == 8000
+    assert stats["failed"] == stats["accepted"] // 2
+    pool.stop()